@@ -2,12 +2,14 @@
 Flask アプリケーションファクトリ
 """
 import os
+import hmac
 import logging
-from flask import Flask
+from flask import Flask, request
 from flask_cors import CORS
 
 from app.extensions import db, bcrypt, jwt, migrate
 from app.config import Config, DevelopmentConfig, ProductionConfig
+from app.services.http_client import http_client
 
 
 def create_app(config_name='development'):
@@ -39,6 +41,17 @@ def create_app(config_name='development'):
     bcrypt.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
+    http_client.init_app(app)
+
+    # 外部APIの利用枠を設定
+    from app.services.rate_limiter import init_rate_limits
+    init_rate_limits(app)
+    from app.services.circuit_breaker import init_circuit_breakers
+    init_circuit_breakers(app)
+
+    # キャッシュサイズを設定
+    from app.services.cache import configure_caches
+    configure_caches(app)
 
     # CORS設定
     CORS(app,
@@ -54,11 +67,85 @@ def create_app(config_name='development'):
     app.register_blueprint(news_bp, url_prefix='/api/news')
     app.register_blueprint(danger_bp, url_prefix='/api/danger')
 
+    # 最寄り都市検索用の空間インデックスを構築
+    from app.services.geocoding_service import init_city_index
+    init_city_index(app)
+
+    # バックグラウンドジョブを起動
+    from app.services.cache_warmer import init_cache_warmer
+    init_cache_warmer(app)
+    from app.services.news_ingester import init_news_ingester
+    init_news_ingester(app)
+    from app.services.danger_snapshot import init_danger_snapshots
+    init_danger_snapshots(app)
+
     # ヘルスチェックエンドポイント
     @app.route('/health', methods=['GET'])
     def health_check():
         return {'status': 'OK', 'message': 'JoyJaunt API is running'}, 200
 
+    def check_admin_token():
+        """
+        管理用トークン(X-Admin-Token)を確認する
+
+        Returns:
+            tuple: 拒否する場合は (本文, ステータス)、許可する場合はNone
+        """
+        token = app.config['ADMIN_API_TOKEN']
+        if not token:
+            return {'error': 'Not found'}, 404
+        if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+            return {'error': 'Unauthorized'}, 401
+        return None
+
+    # メトリクスエンドポイント(上流の利用状況や追跡中の目的地を含むため管理用トークンが必要)
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        denied = check_admin_token()
+        if denied:
+            return denied
+
+        from app.services.cache import get_cache_stats
+        from app.services.circuit_breaker import get_circuit_stats
+        from app.services.country_catalog import get_country_catalog_stats
+        from app.services.danger_board import get_danger_board_stats
+        from app.services.danger_scores import get_danger_score_stats
+        from app.services.danger_snapshot import get_danger_snapshot_stats
+        from app.services.cache_warmer import get_cache_warmer_stats
+        from app.services.news_ingester import get_news_ingester_stats
+        from app.services.news_service import get_news_store_stats
+        from app.services.rate_limiter import get_budget_stats
+        from app.services.scheduler import get_job_stats
+        from app.services.singleflight import get_singleflight_stats
+        return {
+            'upstream_budgets': get_budget_stats(),
+            'circuit_breakers': get_circuit_stats(),
+            'caches': get_cache_stats(),
+            'news_store': get_news_store_stats(),
+            'singleflight': get_singleflight_stats(),
+            'cache_warmer': get_cache_warmer_stats(),
+            'news_ingester': get_news_ingester_stats(),
+            'danger_scores': get_danger_score_stats(),
+            'danger_board': get_danger_board_stats(),
+            'danger_snapshot': get_danger_snapshot_stats(),
+            'country_catalog': get_country_catalog_stats(),
+            'jobs': get_job_stats()
+        }, 200
+
+    # 国データ更新後に国カタログを読み込み直す管理用フック(ADMIN_API_TOKEN 設定時のみ有効)
+    @app.route('/admin/country_catalog/invalidate', methods=['POST'])
+    def invalidate_country_catalog():
+        from app.services.country_catalog import invalidate_country_catalog
+        from app.services.danger_board import invalidate_danger_board
+
+        denied = check_admin_token()
+        if denied:
+            return denied
+
+        invalidate_country_catalog()
+        invalidate_danger_board()
+        return {'status': 'OK', 'message': 'Country catalog invalidated'}, 200
+
     # ルートエンドポイント
     @app.route('/', methods=['GET'])
     def index():
@@ -0,0 +1,172 @@
+"""
+ASGIアプリケーション - I/O待ちの多いAPIを非同期で処理し、それ以外はFlaskに渡す
+
+天気・ニュース・危険度の主要なエンドポイントは非同期サービス(httpx)で処理するため、
+1プロセスで多数の同時リクエストを上流の応答待ちのままワーカースレッドを占有せずに扱える。
+それ以外のエンドポイント・ストリーミング応答・CORSのプリフライトは
+asgiref の WsgiToAsgi 経由で既存のFlaskアプリケーションが処理する。
+asgiref と httpx が必要。
+"""
+import json
+from urllib.parse import parse_qs
+import logging
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app.services.async_http_client import async_http_client
+from app.services.streaming import STREAM_FORMATS
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRequest:
+    """非同期ハンドラーに渡すリクエスト"""
+
+    def __init__(self, scope, body):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.args = {
+            key: values[-1]
+            for key, values in parse_qs(scope.get('query_string', b'').decode('latin-1')).items()
+        }
+        self.headers = {
+            name.decode('latin-1').lower(): value.decode('latin-1')
+            for name, value in scope.get('headers', [])
+        }
+        self.body = body
+
+    def get_json(self):
+        """ボディをJSONとして読み込む(不正な場合はNone)"""
+        if not self.body:
+            return None
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return None
+
+    def wants_stream(self, data):
+        """ストリーミング応答が要求されているか(Flask側で処理する)"""
+        if 'stream' in self.args or (isinstance(data, dict) and data.get('stream')):
+            return True
+        accept = self.headers.get('accept', '')
+        return any(mimetype in accept for mimetype in STREAM_FORMATS.values())
+
+
+class AsgiApp:
+    """
+    非同期ハンドラーとFlaskアプリケーションを束ねるASGIアプリケーション
+
+    ハンドラーは (HTTPメソッド, パス) で登録し、
+    AsyncRequest を受け取って (レスポンスボディ(dict), ステータスコード) を返す。
+    ハンドラーが None を返した場合はFlaskに処理を渡す。
+    """
+
+    def __init__(self, flask_app, routes):
+        self.flask_app = flask_app
+        self.routes = routes
+        self.wsgi = WsgiToAsgi(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+
+        handler = None
+        if scope['type'] == 'http':
+            handler = self.routes.get((scope['method'], scope['path']))
+        if handler is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        request = AsyncRequest(scope, body)
+
+        with self.flask_app.app_context():
+            result = await handler(request)
+
+        if result is None:
+            # ハンドラーが処理しない場合は読み込んだボディをそのままFlaskに渡す
+            await self.wsgi(scope, _replay_body(body, receive), send)
+            return
+
+        payload, status = result
+        await self._send_json(request, payload, status, send)
+
+    async def _send_json(self, request, payload, status, send):
+        body = self.flask_app.json.dumps(payload).encode('utf-8') + b'\n'
+        headers = [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('latin-1'))
+        ]
+        headers.extend(self._cors_headers(request))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    def _cors_headers(self, request):
+        """FlaskのCORS設定と同じ条件でCORSヘッダーを付ける"""
+        origin = request.headers.get('origin')
+        if not origin:
+            return []
+        allowed = self.flask_app.config.get('CORS_ALLOWED_ORIGINS') or []
+        if isinstance(allowed, str):
+            allowed = [allowed]
+        if '*' not in allowed and origin not in allowed:
+            return []
+        return [
+            (b'access-control-allow-origin', origin.encode('latin-1')),
+            (b'access-control-allow-credentials', b'true'),
+            (b'vary', b'Origin')
+        ]
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_http_client.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+async def _read_body(receive):
+    """リクエストボディを全て読み込む"""
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] != 'http.request':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            break
+    return b''.join(chunks)
+
+
+def _replay_body(body, receive):
+    """読み込み済みのボディを返す receive 関数(Flaskに処理を渡す場合用)"""
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        return await receive()
+
+    return replay
+
+
+def create_asgi_app(flask_app):
+    """
+    FlaskアプリケーションからASGIアプリケーションを作成する
+
+    Args:
+        flask_app: create_app() で作成したFlaskアプリケーション
+
+    Returns:
+        AsgiApp: ASGIアプリケーション
+    """
+    from app.routes.async_api import ASYNC_ROUTES
+
+    async_http_client.init_app(flask_app)
+    return AsgiApp(flask_app, ASYNC_ROUTES)
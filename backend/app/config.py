@@ -29,6 +29,7 @@ class Config:
 
     # CORS設定
     CORS_ORIGINS = ["http://localhost:3001", "http://localhost:3000"]
+    CORS_ALLOWED_ORIGINS = CORS_ORIGINS
     CORS_SUPPORTS_CREDENTIALS = True
 
     # 外部API設定
@@ -37,10 +38,138 @@ class Config:
     OPEN_WEATHER_API_KEY = os.getenv('OPEN_WEATHER_API_KEY')
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
-    # API URL
-    NEWS_API_URL = 'https://newsapi.org/v2/everything'
+    # API URL(ローカルのモックサーバー mock_upstream.py に向ける場合は環境変数で上書き)
+    NEWS_API_URL = os.getenv('NEWS_API_URL', 'https://newsapi.org/v2/everything')
     TRAVEL_ADVISORY_API_URL = 'https://www.travel-advisory.info/api'
-    OPEN_WEATHER_API_URL = 'https://api.openweathermap.org/data/2.5'
+    OPEN_WEATHER_API_URL = os.getenv(
+        'OPEN_WEATHER_API_URL', 'https://api.openweathermap.org/data/2.5')
+    OPEN_WEATHER_GEO_URL = os.getenv(
+        'OPEN_WEATHER_GEO_URL', 'http://api.openweathermap.org/geo/1.0')
+
+    # 外部APIの利用枠(ワーカープロセスごと、0は無制限)
+    NEWS_API_RATE_PER_MINUTE = int(os.getenv('NEWS_API_RATE_PER_MINUTE', 30))
+    NEWS_API_DAILY_QUOTA = int(os.getenv('NEWS_API_DAILY_QUOTA', 100))
+    OPEN_WEATHER_RATE_PER_MINUTE = int(os.getenv('OPEN_WEATHER_RATE_PER_MINUTE', 60))
+    OPEN_WEATHER_DAILY_QUOTA = int(os.getenv('OPEN_WEATHER_DAILY_QUOTA', 1000))
+    # バックグラウンド処理が使わずにユーザーリクエスト用に残す割合
+    BACKGROUND_BUDGET_RESERVE = float(os.getenv('BACKGROUND_BUDGET_RESERVE', 0.3))
+
+    # 外部API用HTTPクライアント設定
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 10))
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 20))
+    HTTP_POOL_BLOCK = os.getenv('HTTP_POOL_BLOCK', 'true').lower() == 'true'
+    # ASGIエントリーポイントの非同期HTTPクライアントの最大接続数(イベントループごと)
+    ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv('ASYNC_HTTP_MAX_CONNECTIONS', 100))
+
+    # サーキットブレーカー設定: 連続失敗回数、オープン後に試行を再開するまでの秒数、
+    # ハーフオープン時に通す試行数
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(
+        os.getenv('CIRCUIT_BREAKER_FAILURE_THRESHOLD', 5))
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT = int(
+        os.getenv('CIRCUIT_BREAKER_RECOVERY_TIMEOUT', 30))
+    CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS = int(
+        os.getenv('CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS', 1))
+
+    # 上流が「見つからない」(404)と返した都市を覚えておく秒数
+    NOT_FOUND_CACHE_TTL = int(os.getenv('NOT_FOUND_CACHE_TTL', 600))
+
+    # 天気予報キャッシュ設定(秒)
+    WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', 600))
+    WEATHER_CACHE_STALE_TTL = int(os.getenv('WEATHER_CACHE_STALE_TTL', 3600))
+
+    # リクエスト内の並行取得設定(ワーカー数は1リクエストあたりの上限)
+    REQUEST_FANOUT_MAX_WORKERS = int(os.getenv('REQUEST_FANOUT_MAX_WORKERS', 16))
+    TRAVEL_INFO_DEADLINE = float(os.getenv('TRAVEL_INFO_DEADLINE', 8))
+    LOCATION_DANGER_TIME_BUDGET = float(
+        os.getenv('LOCATION_DANGER_TIME_BUDGET', 8))
+    LOCATION_DANGER_MAX_TIME_BUDGET = float(
+        os.getenv('LOCATION_DANGER_MAX_TIME_BUDGET', 20))
+
+    # 現在の天気・ニュースキャッシュ設定(秒)
+    # ニュースはプロセス内キャッシュとnews_cacheテーブルの両方にNEWS_CACHE_TTLで保存
+    CURRENT_WEATHER_CACHE_TTL = int(os.getenv('CURRENT_WEATHER_CACHE_TTL', 300))
+    CURRENT_WEATHER_CACHE_STALE_TTL = int(
+        os.getenv('CURRENT_WEATHER_CACHE_STALE_TTL', 600))
+    NEWS_CACHE_TTL = int(os.getenv('NEWS_CACHE_TTL', 1800))
+    NEWS_CACHE_STALE_TTL = int(os.getenv('NEWS_CACHE_STALE_TTL', 3600))
+    NEWS_CACHE_MAX_SIZE = int(os.getenv('NEWS_CACHE_MAX_SIZE', 1024))
+
+    # ニュース統合取得モード: 1回の広いクエリで一般ニュースを取得し、
+    # 危険関連ニュースはキーワードでローカルに分類する
+    NEWS_UNIFIED_FETCH = os.getenv('NEWS_UNIFIED_FETCH', 'false').lower() == 'true'
+    NEWS_UNIFIED_PAGE_SIZE = int(os.getenv('NEWS_UNIFIED_PAGE_SIZE', 50))
+    # 統合取得で上流から取得する日数(これより短い期間はこの結果を絞り込んで返す)
+    NEWS_UNIFIED_DAYS = int(os.getenv('NEWS_UNIFIED_DAYS', 7))
+
+    # ニュース取り込み設定: 追跡中の場所の新着記事をnews_articleテーブルに保存し、
+    # ニュースAPIのハンドラはデータベースから読む
+    NEWS_INGEST_ENABLED = os.getenv('NEWS_INGEST_ENABLED', 'false').lower() == 'true'
+    NEWS_INGEST_POLL_INTERVAL = int(os.getenv('NEWS_INGEST_POLL_INTERVAL', 60))
+    NEWS_INGEST_INTERVAL = int(os.getenv('NEWS_INGEST_INTERVAL', 900))
+    NEWS_INGEST_BATCH_SIZE = int(os.getenv('NEWS_INGEST_BATCH_SIZE', 10))
+    NEWS_INGEST_PAGE_SIZE = int(os.getenv('NEWS_INGEST_PAGE_SIZE', 100))
+    # 1か所の1回の取り込みで取得する最大ページ数(新着が多い場合に前回の位置まで遡る)
+    NEWS_INGEST_MAX_PAGES = int(os.getenv('NEWS_INGEST_MAX_PAGES', 5))
+    NEWS_INGEST_LOOKBACK_DAYS = int(os.getenv('NEWS_INGEST_LOOKBACK_DAYS', 7))
+    NEWS_INGEST_RETENTION_DAYS = int(os.getenv('NEWS_INGEST_RETENTION_DAYS', 14))
+    # この日数以上読まれていない場所は取り込み対象から外す
+    NEWS_INGEST_IDLE_DAYS = int(os.getenv('NEWS_INGEST_IDLE_DAYS', 3))
+
+    # キャッシュウォーマー設定
+    CACHE_WARMER_ENABLED = os.getenv(
+        'CACHE_WARMER_ENABLED', 'false').lower() == 'true'
+    CACHE_WARMER_INTERVAL = int(os.getenv('CACHE_WARMER_INTERVAL', 300))
+    CACHE_WARMER_REFRESH_AHEAD = int(os.getenv('CACHE_WARMER_REFRESH_AHEAD', 60))
+    CACHE_WARMER_TOP_N = int(os.getenv('CACHE_WARMER_TOP_N', 50))
+    CACHE_WARMER_MAX_WORKERS = int(os.getenv('CACHE_WARMER_MAX_WORKERS', 4))
+    CACHE_WARMER_BUDGET_PER_MINUTE = int(
+        os.getenv('CACHE_WARMER_BUDGET_PER_MINUTE', 30))
+
+    # 逆ジオコーディングキャッシュ設定
+    GEOCODING_GEOHASH_PRECISION = int(os.getenv('GEOCODING_GEOHASH_PRECISION', 6))
+    GEOCODING_CACHE_TTL = int(os.getenv('GEOCODING_CACHE_TTL', 86400))
+    REVERSE_GEOCODING_CACHE_MAX_SIZE = int(
+        os.getenv('REVERSE_GEOCODING_CACHE_MAX_SIZE', 4096))
+
+    # 最寄り都市検索用の空間インデックス設定
+    CITY_INDEX_PRELOAD = os.getenv('CITY_INDEX_PRELOAD', 'true').lower() == 'true'
+    CITY_INDEX_REBUILD_INTERVAL = int(os.getenv('CITY_INDEX_REBUILD_INTERVAL', 3600))
+    # 逆ジオコーディングで特定できない場合に最寄り都市を使う最大距離(km)
+    GEOCODING_FALLBACK_MAX_DISTANCE_KM = float(
+        os.getenv('GEOCODING_FALLBACK_MAX_DISTANCE_KM', 50))
+
+    # 国カタログ: マイグレーションのバージョンを確認する間隔(秒、0で確認しない)
+    COUNTRY_CATALOG_CHECK_INTERVAL = int(os.getenv('COUNTRY_CATALOG_CHECK_INTERVAL', 300))
+
+    # 管理用エンドポイント(/admin/...・/metrics)のトークン(空の場合は無効)
+    ADMIN_API_TOKEN = os.getenv('ADMIN_API_TOKEN', '')
+
+    # 危険度スコアのデータファイル(更新時刻を確認する間隔は秒、0で確認しない)
+    DANGER_SCORES_PATH = os.getenv('DANGER_SCORES_PATH', '')
+    DANGER_SCORES_CHECK_INTERVAL = int(os.getenv('DANGER_SCORES_CHECK_INTERVAL', 30))
+
+    # 危険度スナップショット設定: 有効な場合は計算済みの危険度を danger_score_snapshot テーブルに保存し、
+    # check_realtime_danger はテーブルから読む(無効な場合は毎回計算する)
+    # ENABLED: スナップショットと更新ジョブを使うか、POLL_INTERVAL: ジョブの実行間隔、
+    # INTERVAL: 1か所あたりの更新間隔、MAX_AGE: これより古い行はリクエスト時に計算し直す(秒)、
+    # TOP_N: 更新対象にするアクセスの多い場所の数(保存済みの場所も対象)
+    DANGER_SNAPSHOT_ENABLED = os.getenv('DANGER_SNAPSHOT_ENABLED', 'false').lower() == 'true'
+    DANGER_SNAPSHOT_POLL_INTERVAL = int(os.getenv('DANGER_SNAPSHOT_POLL_INTERVAL', 60))
+    DANGER_SNAPSHOT_INTERVAL = int(os.getenv('DANGER_SNAPSHOT_INTERVAL', 1800))
+    DANGER_SNAPSHOT_BATCH_SIZE = int(os.getenv('DANGER_SNAPSHOT_BATCH_SIZE', 20))
+    DANGER_SNAPSHOT_MAX_AGE = int(os.getenv('DANGER_SNAPSHOT_MAX_AGE', 7200))
+    DANGER_SNAPSHOT_TOP_N = int(os.getenv('DANGER_SNAPSHOT_TOP_N', 50))
+
+    # 危険度一覧(/api/danger/scores)を作り直す間隔(秒)
+    DANGER_BOARD_REFRESH_INTERVAL = int(os.getenv('DANGER_BOARD_REFRESH_INTERVAL', 60))
+    # 安全な順・危険な順の上位件数(/api/danger/top)の最大値
+    DANGER_TOP_MAX_K = int(os.getenv('DANGER_TOP_MAX_K', 50))
+
+    # 天気予報一括取得の設定
+    WEATHER_BATCH_MAX_CITIES = int(os.getenv('WEATHER_BATCH_MAX_CITIES', 50))
+    WEATHER_BATCH_MAX_WORKERS = int(os.getenv('WEATHER_BATCH_MAX_WORKERS', 8))
 
 
 class DevelopmentConfig(Config):
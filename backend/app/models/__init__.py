@@ -3,5 +3,8 @@
 """
 from app.models.user import User
 from app.models.location import Country, City
+from app.models.news import NewsCacheEntry, NewsArticle, NewsIngestState
+from app.models.danger import DangerScoreSnapshot
 
-__all__ = ['User', 'Country', 'City']
+__all__ = ['User', 'Country', 'City', 'NewsCacheEntry',
+           'NewsArticle', 'NewsIngestState', 'DangerScoreSnapshot']
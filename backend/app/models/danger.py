@@ -0,0 +1,32 @@
+"""
+危険度スナップショットモデル
+"""
+import json
+from app.extensions import db
+
+
+class DangerScoreSnapshot(db.Model):
+    """場所ごとに計算済みの危険度(バックグラウンドで定期的に更新)"""
+    __tablename__ = 'danger_score_snapshot'
+
+    CountryName = db.Column(db.String(52), primary_key=True)
+    CityName = db.Column(db.String(35), primary_key=True, default='')  # 国単位は空文字
+    BaseScore = db.Column(db.Float, nullable=False)
+    NewsCount = db.Column(db.Integer, nullable=False)
+    NewsAdjustment = db.Column(db.Float, nullable=False)
+    Score = db.Column(db.Float, nullable=False)
+    IsDangerous = db.Column(db.Boolean, nullable=False)
+    RecentNews = db.Column(db.Text, nullable=False)  # 整形済み記事リストのJSON
+    ComputedAt = db.Column(db.DateTime, nullable=False, index=True)
+
+    def to_danger_info(self):
+        """calculate_danger_level と同じ形式の辞書に変換"""
+        return {
+            'score': self.Score,
+            'base_score': self.BaseScore,
+            'news_count': self.NewsCount,
+            'news_adjustment': self.NewsAdjustment,
+            'is_dangerous': self.IsDangerous,
+            'recent_news': json.loads(self.RecentNews),
+            'computed_at': self.ComputedAt.strftime('%Y-%m-%dT%H:%M:%SZ')
+        }
@@ -39,6 +39,9 @@ class City(db.Model):
         db.ForeignKey('country.Code'),
         nullable=False
     )
+    # 天気予報用の座標(初回取得時に保存)
+    Latitude = db.Column(db.Float, nullable=True)
+    Longitude = db.Column(db.Float, nullable=True)
 
     def to_dict(self):
         """辞書形式に変換"""
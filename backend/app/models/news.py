@@ -0,0 +1,63 @@
+"""
+ニュースキャッシュモデル
+"""
+from app.extensions import db
+
+
+class NewsCacheEntry(db.Model):
+    """ニュース検索結果の永続キャッシュテーブル"""
+    __tablename__ = 'news_cache'
+
+    CacheKey = db.Column(db.String(255), primary_key=True)
+    Payload = db.Column(db.Text, nullable=False)  # 整形済み記事リストのJSON
+    CreatedAt = db.Column(db.DateTime, nullable=False)
+    ExpiresAt = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class NewsArticle(db.Model):
+    """取り込み済みニュース記事テーブル"""
+    __tablename__ = 'news_article'
+    __table_args__ = (
+        db.Index('ix_news_article_location_published',
+                 'CountryName', 'CityName', 'PublishedAt'),
+        db.UniqueConstraint('CountryName', 'CityName', 'UrlHash',
+                            name='uq_news_article_location_url'),
+    )
+
+    ID = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    CountryName = db.Column(db.String(52), nullable=False)
+    CityName = db.Column(db.String(35), nullable=False, default='')  # 国単位の記事は空文字
+    UrlHash = db.Column(db.String(40), nullable=False)  # URLのSHA-1(重複排除用)
+    Url = db.Column(db.Text, nullable=False)
+    Title = db.Column(db.Text)
+    Description = db.Column(db.Text)
+    Source = db.Column(db.String(255))
+    UrlToImage = db.Column(db.Text)
+    PublishedAt = db.Column(db.DateTime, nullable=False)
+    IsDanger = db.Column(db.Boolean, nullable=False, default=False)
+    FetchedAt = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self, include_image=True):
+        """辞書形式に変換(NewsAPIの整形済み記事と同じ形式)"""
+        article = {
+            'title': self.Title or '',
+            'description': self.Description or '',
+            'url': self.Url,
+            'publishedAt': self.PublishedAt.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'source': self.Source or ''
+        }
+        if include_image:
+            article['urlToImage'] = self.UrlToImage or ''
+        return article
+
+
+class NewsIngestState(db.Model):
+    """ニュース取り込み対象の場所と取り込み状況"""
+    __tablename__ = 'news_ingest_state'
+
+    CountryName = db.Column(db.String(52), primary_key=True)
+    CityName = db.Column(db.String(35), primary_key=True, default='')
+    LastPublishedAt = db.Column(db.DateTime)  # 取り込み済みの最新記事の日時
+    LastPolledAt = db.Column(db.DateTime, index=True)
+    LastReadAt = db.Column(db.DateTime)  # 最後に記事が読まれた日時(古い場所は対象から外す)
+    CreatedAt = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,237 @@
+"""
+非同期ルート - ASGIエントリーポイント(asgi.py)で使うI/O待ちの多いAPI
+リクエスト・レスポンスの形式は同じパスのFlaskルートと同じ
+"""
+import asyncio
+import time
+from flask import current_app
+import logging
+
+# 入力の検証と応答本文の組み立ては同じパスのFlaskルートと共通
+from app.routes.danger import (
+    _build_location_danger_response, _build_realtime_danger_response,
+    _build_travel_info_response, _location_not_found_response, _parse_country_request,
+    _parse_location_danger_request, _resolve_location_names
+)
+from app.routes.news import _build_news_response, _parse_news_request
+from app.services.concurrency import run_sync
+from app.services.country_catalog import get_country_catalog
+from app.services.danger_service import calculate_danger_level_async
+from app.services.danger_snapshot import get_danger_level_snapshot_async
+from app.services.geocoding_service import get_location_from_coordinates_async
+from app.services.news_service import get_news_by_location_async, get_general_news_async
+from app.services.weather_service import (
+    get_weather_forecast_async, get_current_weather_async
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _gather_with_deadline(tasks, timeout, required=()):
+    """
+    run_concurrently の非同期版
+
+    Args:
+        tasks: 名前 -> コルーチン の辞書
+        timeout: 全体の締め切り(秒)
+        required: 締め切り後も完了を待つ処理の名前
+
+    Returns:
+        tuple: (名前 -> 結果, 時間切れになった名前のリスト, 名前 -> 例外)
+    """
+    futures = {name: asyncio.ensure_future(coro) for name, coro in tasks.items()}
+    done, pending = await asyncio.wait(futures.values(), timeout=max(timeout, 0))
+
+    # 必須の処理は締め切りを過ぎても完了を待つ
+    pending_required = {futures[name] for name in required if futures.get(name) in pending}
+    if pending_required:
+        await asyncio.wait(pending_required)
+        pending -= pending_required
+
+    results = {}
+    errors = {}
+    timed_out = []
+    for name, future in futures.items():
+        if future in pending:
+            future.cancel()
+            timed_out.append(name)
+        elif future.exception() is not None:
+            errors[name] = future.exception()
+        else:
+            results[name] = future.result()
+
+    return results, sorted(timed_out), errors
+
+
+async def weather_forecast(request):
+    """天気予報を取得"""
+    try:
+        city = request.args.get('city', 'Tokyo')
+        logger.info(f"天気予報リクエスト - 都市: {city}")
+
+        forecast_data = await get_weather_forecast_async(city)
+
+        if not forecast_data:
+            logger.warning(f"天気データが取得できませんでした: {city}")
+            return {"error": "Could not fetch weather forecast"}, 500
+
+        logger.info(f"天気予報取得成功: {city}, {len(forecast_data)}日分")
+        return {"forecast": forecast_data}, 200
+
+    except Exception as e:
+        logger.error(f"天気予報エラー: {str(e)}")
+        return {"error": "An error occurred", "details": str(e)}, 500
+
+
+async def current_weather(request):
+    """現在の天気を取得"""
+    try:
+        city = request.args.get('city', 'Tokyo')
+        logger.info(f"現在の天気リクエスト - 都市: {city}")
+
+        weather_data = await get_current_weather_async(city)
+
+        if not weather_data:
+            logger.warning(f"天気データが取得できませんでした: {city}")
+            return {"error": "Could not fetch current weather"}, 500
+
+        logger.info(f"現在の天気取得成功: {city}")
+        return weather_data, 200
+
+    except Exception as e:
+        logger.error(f"現在の天気エラー: {str(e)}")
+        return {"error": "An error occurred", "details": str(e)}, 500
+
+
+async def location_news(request):
+    """指定された場所の最新ニュースを取得"""
+    data = request.get_json()
+    if request.wants_stream(data):
+        return None
+
+    try:
+        country_name, city_name, _, error = _parse_news_request(data or {})
+        if error:
+            return error
+
+        news_articles = await get_news_by_location_async(country_name, city_name)
+        return _build_news_response(country_name, city_name, news_articles), 200
+
+    except Exception as e:
+        logger.error(f"ニュース取得エラー: {str(e)}")
+        return {'error': 'An error occurred', 'details': str(e)}, 500
+
+
+async def general_news(request):
+    """指定された場所の一般ニュースを取得"""
+    data = request.get_json()
+    if request.wants_stream(data):
+        return None
+
+    try:
+        country_name, city_name, days, error = _parse_news_request(data or {}, with_days=True)
+        if error:
+            return error
+
+        news_articles = await get_general_news_async(country_name, city_name, days)
+        return _build_news_response(country_name, city_name, news_articles), 200
+
+    except Exception as e:
+        logger.error(f"一般ニュース取得エラー: {str(e)}")
+        return {'error': 'An error occurred', 'details': str(e)}, 500
+
+
+async def check_realtime_danger(request):
+    """リアルタイム危険度チェック(計算済みのスナップショットを返す、?fresh=1 でその場で計算)"""
+    try:
+        country_name, city_name, error = _parse_country_request(request.get_json() or {})
+        if error:
+            return error
+
+        # 国の存在確認
+        country = (await run_sync(get_country_catalog)).by_name(country_name)
+        if not country:
+            return {'error': f'Country "{country_name}" not found'}, 404
+
+        fresh = request.args.get('fresh', '').lower() in ('1', 'true', 'yes')
+        danger_info = await get_danger_level_snapshot_async(
+            country_name, city_name, fresh=fresh)
+
+        return _build_realtime_danger_response(country_name, city_name, danger_info), 200
+
+    except Exception as e:
+        logger.error(f"危険度チェックエラー: {str(e)}")
+        return {'error': 'An error occurred', 'details': str(e)}, 500
+
+
+async def travel_info(request):
+    """総合的な旅行情報を取得(危険度と天気予報を並行して取得)"""
+    data = request.get_json()
+    if request.wants_stream(data):
+        return None
+
+    try:
+        country_name, city_name, error = _parse_country_request(data or {})
+        if error:
+            return error
+
+        tasks = {'danger': calculate_danger_level_async(country_name, city_name)}
+        if city_name:
+            tasks['weather'] = get_weather_forecast_async(city_name)
+
+        results, timed_out, errors = await _gather_with_deadline(
+            tasks, timeout=current_app.config['TRAVEL_INFO_DEADLINE'])
+
+        return _build_travel_info_response(
+            country_name, city_name, results, timed_out, errors), 200
+
+    except Exception as e:
+        logger.error(f"旅行情報取得エラー: {str(e)}")
+        return {'error': 'An error occurred', 'details': str(e)}, 500
+
+
+async def check_danger_by_location(request):
+    """位置情報(緯度経度)から危険度をチェック"""
+    try:
+        started = time.monotonic()
+        lat, lon, time_budget, error = _parse_location_danger_request(
+            request.get_json() or {}, current_app.config)
+        if error:
+            return error
+
+        logger.info(f"位置情報ベース危険度チェック: lat={lat}, lon={lon}")
+
+        location_info = await get_location_from_coordinates_async(lat, lon)
+
+        if not location_info:
+            return _location_not_found_response(lat, lon), 404
+
+        names = _resolve_location_names(location_info, await run_sync(get_country_catalog))
+        city_name, country_name, _ = names
+
+        tasks = {'danger': calculate_danger_level_async(country_name, city_name)}
+        if city_name:
+            tasks['weather'] = get_weather_forecast_async(city_name)
+
+        remaining = time_budget - (time.monotonic() - started)
+        results, timed_out, errors = await _gather_with_deadline(
+            tasks, timeout=remaining, required=('danger',))
+
+        return _build_location_danger_response(
+            location_info, names, lat, lon, results, timed_out, errors), 200
+
+    except Exception as e:
+        logger.error(f"位置情報ベース危険度チェックエラー: {str(e)}")
+        return {'error': 'An error occurred', 'details': str(e)}, 500
+
+
+# (HTTPメソッド, パス) -> 非同期ハンドラー
+ASYNC_ROUTES = {
+    ('GET', '/api/weather/weather_forecast'): weather_forecast,
+    ('GET', '/api/weather/current_weather'): current_weather,
+    ('POST', '/api/news/location_news'): location_news,
+    ('POST', '/api/news/general_news'): general_news,
+    ('POST', '/api/danger/check_realtime_danger'): check_realtime_danger,
+    ('POST', '/api/danger/travel_info'): travel_info,
+    ('POST', '/api/danger/check_danger_by_location'): check_danger_by_location
+}
@@ -1,10 +1,18 @@
 """
 危険度評価ルート
 """
-from flask import Blueprint, request, jsonify
-from app.services.danger_service import calculate_danger_level, get_danger_level_description
+import time
+from flask import Blueprint, request, jsonify, current_app
+from app.services.danger_service import (
+    calculate_danger_level, get_danger_level_description, get_travel_advisory_score
+)
 from app.services.weather_service import get_weather_forecast
 from app.services.geocoding_service import get_location_from_coordinates
+from app.services.concurrency import iter_concurrently, run_concurrently
+from app.services.country_catalog import get_country_catalog
+from app.services.streaming import get_stream_format, stream_events
+from app.services.danger_board import get_danger_board
+from app.services.danger_snapshot import get_danger_level_snapshot
 from app.models import Country
 import logging
 
@@ -12,80 +20,373 @@ logger = logging.getLogger(__name__)
 danger_bp = Blueprint('danger', __name__)
 
 
+# 以下の _parse_* / _build_*_response は非同期ルート(async_api)と共通
+def _parse_country_request(data):
+    """
+    国名・都市名を受け取るリクエストの本文を検証する
+
+    Returns:
+        tuple: (国名, 都市名, エラー)。エラーは (本文, ステータス) または None
+    """
+    country_name = data.get('country', '').strip()
+    city_name = data.get('city', '').strip()
+    if not country_name:
+        return country_name, city_name, ({'error': 'Country name is required'}, 400)
+    return country_name, city_name, None
+
+
+def _build_realtime_danger_response(country_name, city_name, danger_info):
+    """リアルタイム危険度チェックの応答本文"""
+    return {
+        'is_dangerous': danger_info['is_dangerous'],
+        'danger_score': danger_info['score'],
+        'base_score': danger_info['base_score'],
+        'news_count': danger_info['news_count'],
+        'news_adjustment': danger_info['news_adjustment'],
+        'danger_level': get_danger_level_description(danger_info['score']),
+        'country': country_name,
+        'city': city_name if city_name else None,
+        'recent_news': danger_info['recent_news'],
+        'computed_at': danger_info['computed_at']
+    }
+
+
+def _build_travel_info_response(country_name, city_name, results, timed_out, errors):
+    """旅行情報の応答本文(取得失敗・締め切り超過の項目はログに残して省く)"""
+    for name, error in errors.items():
+        logger.error(f"旅行情報の取得に失敗 ({name}): {str(error)}")
+    if timed_out:
+        logger.warning(f"旅行情報の取得が締め切りを超過: {', '.join(timed_out)}")
+
+    danger_info = results.get('danger')
+    danger = None
+    recent_news = []
+    if danger_info:
+        danger = {
+            'is_dangerous': danger_info['is_dangerous'],
+            'score': danger_info['score'],
+            'base_score': danger_info['base_score'],
+            'news_count': danger_info['news_count'],
+            'danger_level': get_danger_level_description(danger_info['score'])
+        }
+        recent_news = danger_info['recent_news'][:3]  # 最新3件のみ
+
+    return {
+        'country': country_name,
+        'city': city_name,
+        'danger': danger,
+        'weather': results.get('weather'),
+        'recent_news': recent_news,
+        'timed_out': timed_out
+    }
+
+
+def _parse_location_danger_request(data, config):
+    """
+    位置情報ベース危険度チェックのリクエスト本文を検証する
+    time_budget は 0〜LOCATION_DANGER_MAX_TIME_BUDGET 秒に丸める
+
+    Returns:
+        tuple: (緯度, 経度, 時間予算, エラー)。エラーは (本文, ステータス) または None
+    """
+    latitude = data.get('latitude')
+    longitude = data.get('longitude')
+
+    try:
+        time_budget = float(data.get('time_budget', config['LOCATION_DANGER_TIME_BUDGET']))
+    except (ValueError, TypeError):
+        return None, None, None, ({
+            'error': 'Invalid time_budget',
+            'details': 'time_budget must be a number of seconds'
+        }, 400)
+    time_budget = min(max(time_budget, 0), config['LOCATION_DANGER_MAX_TIME_BUDGET'])
+
+    # バリデーション
+    if latitude is None or longitude is None:
+        return None, None, None, ({
+            'error': 'Latitude and longitude are required',
+            'details': 'Please provide both latitude and longitude'
+        }, 400)
+
+    # 緯度経度の範囲チェック
+    try:
+        lat = float(latitude)
+        lon = float(longitude)
+        if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+            raise ValueError("Invalid coordinates")
+    except (ValueError, TypeError):
+        return None, None, None, ({
+            'error': 'Invalid coordinates',
+            'details': 'Latitude must be between -90 and 90, longitude between -180 and 180'
+        }, 400)
+
+    return lat, lon, time_budget, None
+
+
+def _location_not_found_response(lat, lon):
+    """逆ジオコーディングで場所を特定できなかった場合の応答本文"""
+    return {
+        'error': 'Could not determine location',
+        'details': 'Unable to identify city/country from coordinates',
+        'latitude': lat,
+        'longitude': lon
+    }
+
+
+def _resolve_location_names(location_info, catalog):
+    """
+    逆ジオコーディング結果から (都市名, 国名, 国コード) を決める
+    国カタログで国名を検証・取得する(逆ジオコーディングの国コードは alpha-2)
+    """
+    city_name = location_info.get('city', '')
+    country_code = location_info.get('country_code', '')
+    country_name = location_info.get('country', '')
+
+    country = catalog.by_code(country_code)
+    if country:
+        country_name = country.name
+
+    logger.info(f"特定された位置: {city_name}, {country_name} ({country_code})")
+    return city_name, country_name, country_code
+
+
+def _build_location_danger_response(location_info, names, lat, lon,
+                                    results, timed_out, errors):
+    """
+    位置情報ベース危険度チェックの応答本文
+    危険度の取得失敗はそのまま送出し、天気予報の失敗・時間予算超過は省略する
+    """
+    city_name, country_name, country_code = names
+    if 'danger' in errors:
+        raise errors['danger']
+    if 'weather' in errors:
+        logger.warning(f"天気情報取得失敗: {str(errors['weather'])}")
+    if timed_out:
+        logger.warning(f"時間予算超過のため省略: {', '.join(timed_out)}")
+
+    danger_info = results['danger']
+    weather_data = results.get('weather')
+
+    return {
+        'location': {
+            'city': city_name,
+            'country': country_name,
+            'country_code': country_code,
+            'state': location_info.get('state', ''),
+            'latitude': lat,
+            'longitude': lon
+        },
+        'danger': {
+            'is_dangerous': danger_info['is_dangerous'],
+            'danger_score': danger_info['score'],
+            'base_score': danger_info['base_score'],
+            'news_count': danger_info['news_count'],
+            'news_adjustment': danger_info['news_adjustment'],
+            'danger_level': get_danger_level_description(danger_info['score']),
+            'recent_news': danger_info['recent_news'][:5]  # 最新5件
+        },
+        'weather': weather_data[:3] if weather_data else None,  # 3日分の天気
+        'timed_out': timed_out
+    }
+
+
 @danger_bp.route('/check_realtime_danger', methods=['POST'])
 def check_realtime_danger():
     """
     リアルタイム危険度チェック
     静的スコア + ニュース情報で総合判定
+    スナップショットが有効な場合はバックグラウンドで計算済みの値を返し、?fresh=1 でその場で計算する
     """
     try:
         data = request.json
-        country_name = data.get('country', '').strip()
-        city_name = data.get('city', '').strip()
-
-        if not country_name:
-            return jsonify({'error': 'Country name is required'}), 400
+        country_name, city_name, error = _parse_country_request(data)
+        if error:
+            return jsonify(error[0]), error[1]
 
         # 国の存在確認
-        country = Country.query.filter_by(Name=country_name).first()
+        country = get_country_catalog().by_name(country_name)
         if not country:
             return jsonify({'error': f'Country "{country_name}" not found'}), 404
 
-        # 総合的な危険度を計算
-        danger_info = calculate_danger_level(country_name, city_name)
+        # 総合的な危険度を取得
+        fresh = request.args.get('fresh', '').lower() in ('1', 'true', 'yes')
+        danger_info = get_danger_level_snapshot(country_name, city_name, fresh=fresh)
+
+        return jsonify(
+            _build_realtime_danger_response(country_name, city_name, danger_info)), 200
+
+    except Exception as e:
+        logger.error(f"危険度チェックエラー: {str(e)}")
+        return jsonify({'error': 'An error occurred', 'details': str(e)}), 500
+
+
+@danger_bp.route('/scores', methods=['GET'])
+def get_danger_scores():
+    """
+    全ての国・都市の危険度を一括取得(地図表示用)
+    ?continent=Asia で大陸、?code=JPN,FRA で国コードを絞り込める
+    ニュース件数はキャッシュ済みの値のみを使い、ETagが一致する場合は304を返す
+    """
+    try:
+        continent = request.args.get('continent', '').strip()
+        codes = tuple(
+            code.strip().upper()
+            for code in request.args.get('code', '').split(',') if code.strip()
+        )
+
+        continents = Country.__table__.c.Continent.type.enums
+        if continent and continent.casefold() not in {c.casefold() for c in continents}:
+            return jsonify({
+                'error': 'Invalid continent',
+                'details': f"continent must be one of: {', '.join(continents)}"
+            }), 400
+
+        board = get_danger_board()
+        body, etag = board.render(current_app, continent or None, codes)
+
+        response = current_app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config['DANGER_BOARD_REFRESH_INTERVAL']
+        return response.make_conditional(request)
+
+    except Exception as e:
+        logger.error(f"危険度一覧取得エラー: {str(e)}")
+        return jsonify({'error': 'An error occurred', 'details': str(e)}), 500
+
+
+@danger_bp.route('/top', methods=['GET'])
+def get_top_destinations():
+    """
+    最も安全な(または危険な)国・都市の上位k件を取得(おすすめ表示用)
+    ?order=safest|dangerous, ?kind=country|city, ?k=10, ?continent=Asia
+    """
+    try:
+        order = request.args.get('order', 'safest').strip().lower()
+        kind = request.args.get('kind', 'country').strip().lower()
+        continent = request.args.get('continent', '').strip()
+
+        if order not in ('safest', 'dangerous'):
+            return jsonify({
+                'error': 'Invalid order',
+                'details': 'order must be "safest" or "dangerous"'
+            }), 400
+        if kind not in ('country', 'city'):
+            return jsonify({
+                'error': 'Invalid kind',
+                'details': 'kind must be "country" or "city"'
+            }), 400
+
+        max_k = current_app.config['DANGER_TOP_MAX_K']
+        try:
+            k = int(request.args.get('k', 10))
+        except ValueError:
+            return jsonify({
+                'error': 'Invalid k',
+                'details': f'k must be an integer between 1 and {max_k}'
+            }), 400
+        k = min(max(k, 1), max_k)
+
+        continents = Country.__table__.c.Continent.type.enums
+        if continent and continent.casefold() not in {c.casefold() for c in continents}:
+            return jsonify({
+                'error': 'Invalid continent',
+                'details': f"continent must be one of: {', '.join(continents)}"
+            }), 400
+
+        board = get_danger_board()
+        results = board.top(kind, order, k, continent or None)
 
         return jsonify({
-            'is_dangerous': danger_info['is_dangerous'],
-            'danger_score': danger_info['score'],
-            'base_score': danger_info['base_score'],
-            'news_count': danger_info['news_count'],
-            'news_adjustment': danger_info['news_adjustment'],
-            'danger_level': get_danger_level_description(danger_info['score']),
-            'country': country_name,
-            'city': city_name if city_name else None,
-            'recent_news': danger_info['recent_news']
+            'order': order,
+            'kind': kind,
+            'continent': continent or None,
+            'count': len(results),
+            'results': results
         }), 200
 
     except Exception as e:
-        logger.error(f"危険度チェックエラー: {str(e)}")
+        logger.error(f"危険度ランキング取得エラー: {str(e)}")
         return jsonify({'error': 'An error occurred', 'details': str(e)}), 500
 
 
+def _stream_travel_info(country_name, city_name):
+    """
+    旅行情報をストリーミングで返すイベント列
+    静的な基本スコアを最初に送り、危険度・天気予報は取得できた順に送る
+    危険度のあとに最新ニュースを1件ずつ article として送り、最後に done を送る
+    """
+    base_score = get_travel_advisory_score(country_name, city_name)
+    yield 'base_score', {
+        'country': country_name,
+        'city': city_name,
+        'base_score': base_score,
+        'danger_level': get_danger_level_description(base_score) if base_score is not None else None
+    }
+
+    tasks = {'danger': (calculate_danger_level, (country_name, city_name))}
+    if city_name:
+        tasks['weather'] = (get_weather_forecast, (city_name,))
+
+    timed_out = []
+    for name, status, value in iter_concurrently(
+            tasks, timeout=current_app.config['TRAVEL_INFO_DEADLINE']):
+        if status == 'timed_out':
+            timed_out.append(name)
+            continue
+        if status == 'error':
+            logger.error(f"旅行情報の取得に失敗 ({name}): {str(value)}")
+            value = None
+
+        if name == 'weather':
+            yield 'weather', value
+        elif value:
+            yield 'danger', {
+                'is_dangerous': value['is_dangerous'],
+                'score': value['score'],
+                'base_score': value['base_score'],
+                'news_count': value['news_count'],
+                'danger_level': get_danger_level_description(value['score'])
+            }
+            for article in value['recent_news'][:3]:  # 最新3件のみ
+                yield 'article', article
+        else:
+            yield 'danger', None
+
+    if timed_out:
+        logger.warning(f"旅行情報の取得が締め切りを超過: {', '.join(timed_out)}")
+    yield 'done', {'timed_out': timed_out}
+
+
 @danger_bp.route('/travel_info', methods=['POST'])
 def get_travel_info():
     """
     総合的な旅行情報を取得
     危険度、天気予報、ニュースをまとめて返す
+    危険度と天気予報は並行して取得し、締め切りに間に合わなかった項目は timed_out に含める
+    stream=ndjson|sse を指定した場合は準備できた項目から順にストリーミングで返す
     """
     try:
         data = request.json
-        country_name = data.get('country', '').strip()
-        city_name = data.get('city', '').strip()
-
-        if not country_name:
-            return jsonify({'error': 'Country name is required'}), 400
+        country_name, city_name, error = _parse_country_request(data)
+        if error:
+            return jsonify(error[0]), error[1]
 
-        # 危険度情報を取得
-        danger_info = calculate_danger_level(country_name, city_name)
+        stream_format = get_stream_format(data)
+        if stream_format:
+            return stream_events(
+                _stream_travel_info(country_name, city_name), stream_format)
 
-        # 天気予報を取得
-        weather_data = None
+        # 危険度情報と天気予報を並行して取得
+        tasks = {'danger': (calculate_danger_level, (country_name, city_name))}
         if city_name:
-            weather_data = get_weather_forecast(city_name)
+            tasks['weather'] = (get_weather_forecast, (city_name,))
 
-        return jsonify({
-            'country': country_name,
-            'city': city_name,
-            'danger': {
-                'is_dangerous': danger_info['is_dangerous'],
-                'score': danger_info['score'],
-                'base_score': danger_info['base_score'],
-                'news_count': danger_info['news_count'],
-                'danger_level': get_danger_level_description(danger_info['score'])
-            },
-            'weather': weather_data,
-            'recent_news': danger_info['recent_news'][:3]  # 最新3件のみ
-        }), 200
+        results, timed_out, errors = run_concurrently(
+            tasks, timeout=current_app.config['TRAVEL_INFO_DEADLINE'])
+
+        return jsonify(_build_travel_info_response(
+            country_name, city_name, results, timed_out, errors)), 200
 
     except Exception as e:
         logger.error(f"旅行情報取得エラー: {str(e)}")
@@ -97,31 +398,15 @@ def check_danger_by_location():
     """
     位置情報（緯度経度）から危険度をチェック
     1. 緯度経度から都市・国を特定
-    2. その場所の危険度を計算して返す
+    2. その場所の危険度と天気予報を並行して取得して返す
+    time_budget(秒)を超えた場合、任意項目の天気予報は省略する
     """
     try:
+        started = time.monotonic()
         data = request.json
-        latitude = data.get('latitude')
-        longitude = data.get('longitude')
-
-        # バリデーション
-        if latitude is None or longitude is None:
-            return jsonify({
-                'error': 'Latitude and longitude are required',
-                'details': 'Please provide both latitude and longitude'
-            }), 400
-
-        # 緯度経度の範囲チェック
-        try:
-            lat = float(latitude)
-            lon = float(longitude)
-            if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
-                raise ValueError("Invalid coordinates")
-        except (ValueError, TypeError):
-            return jsonify({
-                'error': 'Invalid coordinates',
-                'details': 'Latitude must be between -90 and 90, longitude between -180 and 180'
-            }), 400
+        lat, lon, time_budget, error = _parse_location_danger_request(data, current_app.config)
+        if error:
+            return jsonify(error[0]), error[1]
 
         logger.info(f"位置情報ベース危険度チェック: lat={lat}, lon={lon}")
 
@@ -129,57 +414,22 @@ def check_danger_by_location():
         location_info = get_location_from_coordinates(lat, lon)
 
         if not location_info:
-            return jsonify({
-                'error': 'Could not determine location',
-                'details': 'Unable to identify city/country from coordinates',
-                'latitude': lat,
-                'longitude': lon
-            }), 404
+            return jsonify(_location_not_found_response(lat, lon)), 404
 
-        city_name = location_info.get('city', '')
-        country_code = location_info.get('country_code', '')
+        names = _resolve_location_names(location_info, get_country_catalog())
+        city_name, country_name, _ = names
 
-        # 国名を取得（データベースから、または逆ジオコーディング結果から）
-        country_name = location_info.get('country', '')
-
-        # データベースで国名を検証・取得
-        country = Country.query.filter_by(CODE=country_code).first()
-        if country:
-            country_name = country.NAME
-
-        logger.info(f"特定された位置: {city_name}, {country_name} ({country_code})")
-
-        # 危険度を計算
-        danger_info = calculate_danger_level(country_name, city_name)
-
-        # 天気情報も取得（オプション）
-        weather_data = None
+        # 危険度と天気情報（オプション）を並行して取得
+        tasks = {'danger': (calculate_danger_level, (country_name, city_name))}
         if city_name:
-            try:
-                weather_data = get_weather_forecast(city_name)
-            except Exception as weather_error:
-                logger.warning(f"天気情報取得失敗: {str(weather_error)}")
+            tasks['weather'] = (get_weather_forecast, (city_name,))
 
-        return jsonify({
-            'location': {
-                'city': city_name,
-                'country': country_name,
-                'country_code': country_code,
-                'state': location_info.get('state', ''),
-                'latitude': lat,
-                'longitude': lon
-            },
-            'danger': {
-                'is_dangerous': danger_info['is_dangerous'],
-                'danger_score': danger_info['score'],
-                'base_score': danger_info['base_score'],
-                'news_count': danger_info['news_count'],
-                'news_adjustment': danger_info['news_adjustment'],
-                'danger_level': get_danger_level_description(danger_info['score']),
-                'recent_news': danger_info['recent_news'][:5]  # 最新5件
-            },
-            'weather': weather_data[:3] if weather_data else None  # 3日分の天気
-        }), 200
+        remaining = time_budget - (time.monotonic() - started)
+        results, timed_out, errors = run_concurrently(
+            tasks, timeout=remaining, required=('danger',))
+
+        return jsonify(_build_location_danger_response(
+            location_info, names, lat, lon, results, timed_out, errors)), 200
 
     except Exception as e:
         logger.error(f"位置情報ベース危険度チェックエラー: {str(e)}")
@@ -3,7 +3,8 @@
 """
 from flask import Blueprint, jsonify, request
 from app.extensions import db
-from app.models import Country, City
+from app.models import City
+from app.services.country_catalog import get_country_catalog
 
 location_bp = Blueprint('location', __name__)
 
@@ -12,8 +13,7 @@ location_bp = Blueprint('location', __name__)
 def get_countries():
     """全国リスト取得"""
     try:
-        countries = Country.query.all()
-        return jsonify([country.to_dict() for country in countries]), 200
+        return jsonify(get_country_catalog().to_list()), 200
     except Exception as e:
         return jsonify({"error": "Failed to fetch countries", "details": str(e)}), 500
 
@@ -3,33 +3,80 @@
 """
 from flask import Blueprint, request, jsonify
 from app.services.news_service import get_news_by_location, get_general_news
+from app.services.streaming import get_stream_format, stream_events
 import logging
 
 logger = logging.getLogger(__name__)
 news_bp = Blueprint('news', __name__)
 
+# NewsAPIで遡れる期間(無料プランは過去1か月まで)
+MAX_NEWS_DAYS = 30
+
+
+def _parse_news_request(data, with_days=False):
+    """
+    ニュース取得リクエストの本文を検証する(非同期ルートと共通)
+
+    Returns:
+        tuple: (国名, 都市名, 日数, エラー)。エラーは (本文, ステータス) または None
+    """
+    country_name = data.get('country', '').strip()
+    city_name = data.get('city', '').strip()
+    days = data.get('days', 7) if with_days else None
+
+    if not country_name:
+        return country_name, city_name, days, ({'error': 'Country name is required'}, 400)
+    if with_days and (isinstance(days, bool) or not isinstance(days, int)
+                      or not 1 <= days <= MAX_NEWS_DAYS):
+        return country_name, city_name, days, (
+            {'error': f'days must be an integer between 1 and {MAX_NEWS_DAYS}'}, 400)
+    return country_name, city_name, days, None
+
+
+def _build_news_response(country_name, city_name, news_articles):
+    """ニュース取得の応答本文(非同期ルートと共通)"""
+    return {
+        'country': country_name,
+        'city': city_name,
+        'news_count': len(news_articles),
+        'articles': news_articles
+    }
+
+
+def _stream_news(country_name, city_name, fetch):
+    """
+    ニュースをストリーミングで返すイベント列
+    meta → 記事ごとの article → done の順に送る
+    """
+    yield 'meta', {'country': country_name, 'city': city_name}
+    news_articles = fetch()
+    for article in news_articles:
+        yield 'article', article
+    yield 'done', {'news_count': len(news_articles)}
+
 
 @news_bp.route('/location_news', methods=['POST'])
 def get_location_news():
     """
     指定された場所の最新ニュースを取得
+    stream=ndjson|sse を指定した場合は記事ごとにストリーミングで返す
     """
     try:
         data = request.json
-        country_name = data.get('country', '').strip()
-        city_name = data.get('city', '').strip()
+        country_name, city_name, _, error = _parse_news_request(data)
+        if error:
+            return jsonify(error[0]), error[1]
 
-        if not country_name:
-            return jsonify({'error': 'Country name is required'}), 400
+        stream_format = get_stream_format(data)
+        if stream_format:
+            return stream_events(_stream_news(
+                country_name, city_name,
+                lambda: get_news_by_location(country_name, city_name)
+            ), stream_format)
 
         news_articles = get_news_by_location(country_name, city_name)
 
-        return jsonify({
-            'country': country_name,
-            'city': city_name,
-            'news_count': len(news_articles),
-            'articles': news_articles
-        }), 200
+        return jsonify(_build_news_response(country_name, city_name, news_articles)), 200
 
     except Exception as e:
         logger.error(f"ニュース取得エラー: {str(e)}")
@@ -40,24 +87,24 @@ def get_location_news():
 def get_general_location_news():
     """
     指定された場所の一般ニュースを取得
+    stream=ndjson|sse を指定した場合は記事ごとにストリーミングで返す
     """
     try:
         data = request.json
-        country_name = data.get('country', '').strip()
-        city_name = data.get('city', '').strip()
-        days = data.get('days', 7)
+        country_name, city_name, days, error = _parse_news_request(data, with_days=True)
+        if error:
+            return jsonify(error[0]), error[1]
 
-        if not country_name:
-            return jsonify({'error': 'Country name is required'}), 400
+        stream_format = get_stream_format(data)
+        if stream_format:
+            return stream_events(_stream_news(
+                country_name, city_name,
+                lambda: get_general_news(country_name, city_name, days)
+            ), stream_format)
 
         news_articles = get_general_news(country_name, city_name, days)
 
-        return jsonify({
-            'country': country_name,
-            'city': city_name,
-            'news_count': len(news_articles),
-            'articles': news_articles
-        }), 200
+        return jsonify(_build_news_response(country_name, city_name, news_articles)), 200
 
     except Exception as e:
         logger.error(f"一般ニュース取得エラー: {str(e)}")
@@ -1,14 +1,19 @@
 """
 天気予報ルート
 """
-from flask import Blueprint, request, jsonify
-from app.services.weather_service import get_weather_forecast, get_current_weather
-from app.models import User, db
+from flask import Blueprint, request, jsonify, current_app
+from app.services.weather_service import (
+    get_weather_forecast, get_weather_forecasts, get_current_weather
+)
+from app.models import User
 import logging
 
 logger = logging.getLogger(__name__)
 weather_bp = Blueprint('weather', __name__)
 
+# 一括取得で指定できる最大日数
+MAX_FORECAST_DAYS = 8
+
 
 @weather_bp.route('/weather_forecast', methods=['GET'])
 def weather_forecast():
@@ -31,6 +36,63 @@ def weather_forecast():
         return jsonify({"error": "An error occurred", "details": str(e)}), 500
 
 
+@weather_bp.route('/weather_forecast_batch', methods=['POST'])
+def weather_forecast_batch():
+    """複数都市の天気予報をまとめて取得"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        cities = data.get('cities')
+        days = data.get('days', 7)
+
+        if not isinstance(cities, list) or not cities or not all(
+                isinstance(city, str) and city.strip() for city in cities):
+            return jsonify({"error": "cities must be a non-empty list of non-empty strings"}), 400
+
+        # One Call APIの日別予報は最大8日分
+        if isinstance(days, bool) or not isinstance(days, int) \
+                or not 1 <= days <= MAX_FORECAST_DAYS:
+            return jsonify({
+                "error": f"days must be an integer between 1 and {MAX_FORECAST_DAYS}"
+            }), 400
+
+        # 重複を取り除く(順序は維持)
+        cities = list(dict.fromkeys(city.strip() for city in cities))
+
+        max_cities = current_app.config['WEATHER_BATCH_MAX_CITIES']
+        if len(cities) > max_cities:
+            return jsonify({
+                "error": f"Too many cities (max {max_cities})"
+            }), 400
+
+        logger.info(f"天気予報一括リクエスト - {len(cities)}都市")
+
+        forecasts = get_weather_forecasts(
+            cities,
+            days=days,
+            max_workers=current_app.config['WEATHER_BATCH_MAX_WORKERS']
+        )
+
+        results = {}
+        failed = []
+        for city in cities:
+            forecast_data = forecasts.get(city)
+            if forecast_data:
+                results[city] = {"forecast": forecast_data}
+            else:
+                results[city] = {"error": "Could not fetch weather forecast"}
+                failed.append(city)
+
+        logger.info(
+            f"天気予報一括取得完了: 成功{len(cities) - len(failed)}件, 失敗{len(failed)}件")
+        return jsonify({"results": results, "failed": failed}), 200
+
+    except Exception as e:
+        logger.error(f"天気予報一括取得エラー: {str(e)}")
+        return jsonify({"error": "An error occurred", "details": str(e)}), 500
+
+
 @weather_bp.route('/weather_forecast_for_user', methods=['GET'])
 def weather_forecast_for_user():
     """ユーザーの居住国に基づいて天気予報を取得"""
@@ -46,23 +108,23 @@ def weather_forecast_for_user():
             return jsonify({"error": "User not found"}), 404
 
         # ユーザーの国コードから国名を取得
-        from app.models import Country
-        country = Country.query.filter_by(CODE=user.COUNTRY_Code).first()
+        from app.services.country_catalog import get_country_catalog
+        country = get_country_catalog().by_code(user.COUNTRY_Code)
         if not country:
             logger.warning(f"国が見つかりません: {user.COUNTRY_Code}")
             return jsonify({"error": "Country not found"}), 404
 
-        logger.info(f"ユーザーの天気予報リクエスト - Email: {email}, 国: {country.NAME}")
+        logger.info(f"ユーザーの天気予報リクエスト - Email: {email}, 国: {country.name}")
 
-        forecast_data = get_weather_forecast(country.NAME)
+        forecast_data = get_weather_forecast(country.name)
 
         if not forecast_data:
-            logger.warning(f"天気データが取得できませんでした: {country.NAME}")
+            logger.warning(f"天気データが取得できませんでした: {country.name}")
             return jsonify({"error": "Could not fetch weather forecast"}), 500
 
-        logger.info(f"天気予報取得成功: {country.NAME}, {len(forecast_data)}日分")
+        logger.info(f"天気予報取得成功: {country.name}, {len(forecast_data)}日分")
         return jsonify({
-            "country": country.NAME,
+            "country": country.name,
             "forecast": forecast_data
         }), 200
 
@@ -0,0 +1,108 @@
+"""
+外部API呼び出し用の非同期HTTPクライアント(ASGIエントリーポイント用)
+httpx が必要(未インストールの場合は同期クライアントのみ使える)
+"""
+import asyncio
+import threading
+import logging
+
+from app.services.http_client import (
+    before_upstream_call, record_upstream_failure, record_upstream_response,
+    release_upstream_call
+)
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - ASGIを使わない環境では不要
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHttpClient:
+    """
+    接続プール付きの非同期HTTPクライアント
+
+    httpx.AsyncClient はイベントループに結び付くため、ループごとに1つ作成して共有する。
+    サーキットブレーカー・利用枠は同期クライアントと共通のものを使う。
+    """
+
+    def __init__(self):
+        self._clients = {}  # イベントループ -> httpx.AsyncClient
+        self._lock = threading.Lock()
+        self.connect_timeout = 3.05
+        self.read_timeout = 10
+        self.max_connections = 20
+
+    def init_app(self, app):
+        """アプリケーション設定からタイムアウト・接続数を読み込む"""
+        self.connect_timeout = app.config['HTTP_CONNECT_TIMEOUT']
+        self.read_timeout = app.config['HTTP_READ_TIMEOUT']
+        self.max_connections = app.config['ASYNC_HTTP_MAX_CONNECTIONS']
+        app.extensions['async_http_client'] = self
+
+    def _get_client(self):
+        """現在のイベントループ用のクライアントを取得(無ければ作成)"""
+        if httpx is None:
+            raise RuntimeError(
+                "非同期HTTPクライアントには httpx が必要です (pip install httpx)")
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    )
+                )
+                self._clients[loop] = client
+        return client
+
+    async def get(self, url, params=None, upstream=None):
+        """
+        GETリクエストを送信
+        upstream を指定した場合はサーキットブレーカーと利用枠を確認してから送信する
+
+        Args:
+            url: リクエストURL
+            params: クエリパラメータ
+            upstream: 上流名('newsapi' または 'openweather')
+
+        Returns:
+            httpx.Response: レスポンス
+
+        Raises:
+            CircuitOpen: サーキットが開いている場合
+            BudgetExhausted: 利用枠が残っていない場合
+        """
+        client = self._get_client()
+        if upstream is None:
+            return await client.get(url, params=params)
+
+        breaker = before_upstream_call(upstream)
+        try:
+            response = await client.get(url, params=params)
+        except httpx.HTTPError:
+            record_upstream_failure(breaker)
+            raise
+        except BaseException:
+            # 締め切りによるキャンセルなど
+            release_upstream_call(breaker)
+            raise
+
+        record_upstream_response(breaker, response.status_code)
+        return response
+
+    async def aclose(self):
+        """現在のイベントループのクライアントを閉じる(ASGIのシャットダウン時)"""
+        with self._lock:
+            client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+# アプリケーション全体で共有するインスタンス
+async_http_client = AsyncHttpClient()
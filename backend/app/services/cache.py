@@ -0,0 +1,292 @@
+"""
+インメモリキャッシュ - TTL + stale-while-revalidate
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+import logging
+
+from app.services.rate_limiter import with_current_priority
+
+logger = logging.getLogger(__name__)
+
+# 名前 -> キャッシュインスタンス(メトリクス出力用)
+_registry = {}
+
+# 実行中の非同期再取得タスク
+_background_tasks = set()
+
+
+class Expiring:
+    """
+    ローダーの戻り値でエントリごとのTTLを指定する場合に使う
+    (永続ストアから読んだ値など、残り寿命が決まっている値用)
+    """
+    __slots__ = ('value', 'ttl')
+
+    def __init__(self, value, ttl):
+        self.value = value
+        self.ttl = ttl
+
+
+def _unwrap(value, ttl):
+    """ローダーの戻り値から (値, TTL) を取り出す"""
+    if isinstance(value, Expiring):
+        return value.value, min(ttl, value.ttl)
+    return value, ttl
+
+
+class TTLCache:
+    """
+    TTL付きのスレッドセーフなLRUキャッシュ
+
+    TTLを過ぎたエントリも stale_ttl の間は古い値を返し、
+    裏でキーごとに1本だけ再取得スレッドを走らせる(stale-while-revalidate)。
+    """
+
+    def __init__(self, name, max_size=512):
+        self.name = name
+        self.max_size = max_size
+        self._data = OrderedDict()  # key -> (value, fresh_until, stale_until)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'evictions': 0
+        }
+        _registry[name] = self
+
+    def resize(self, max_size):
+        """最大エントリ数を変更する(超過分は古い順に削除)"""
+        with self._lock:
+            self.max_size = max_size
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def get(self, key, allow_stale=False):
+        """
+        キャッシュから値を取得(ローダーは呼ばない)
+
+        Returns:
+            キャッシュされた値、無い場合はNone
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, fresh_until, stale_until = entry
+            if now < fresh_until or (allow_stale and now < stale_until):
+                self._data.move_to_end(key)
+                return value
+            return None
+
+    def peek(self, key):
+        """
+        期限切れでも残っている値を取得(上流が使えない場合のフォールバック用)
+
+        Returns:
+            キャッシュされた値、無い場合はNone
+        """
+        with self._lock:
+            entry = self._data.get(key)
+        return entry[0] if entry is not None else None
+
+    def remaining_ttl(self, key):
+        """
+        エントリが新鮮でいられる残り秒数を取得
+
+        Returns:
+            float: 残り秒数(期限切れは0以下)、エントリが無い場合はNone
+        """
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None:
+            return None
+        return entry[1] - time.monotonic()
+
+    def set(self, key, value, ttl, stale_ttl=0):
+        """値を保存する"""
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (value, now + ttl, now + ttl + stale_ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def delete(self, key):
+        """エントリを削除する"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """全エントリを削除する"""
+        with self._lock:
+            self._data.clear()
+
+    def get_or_load(self, key, loader, ttl, stale_ttl=0):
+        """
+        キャッシュから値を取得し、無ければ loader() で取得して保存する
+
+        Args:
+            key: キャッシュキー
+            loader: 値を取得する引数なしの関数(Noneを返した場合はキャッシュしない。
+                Expiringを返すとそのTTLとの短い方を使う)
+            ttl: 新鮮とみなす秒数
+            stale_ttl: TTL切れ後も古い値を返してよい秒数
+
+        Returns:
+            キャッシュされた値または loader() の戻り値
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, fresh_until, stale_until = entry
+                if now < fresh_until:
+                    self._stats['hits'] += 1
+                    self._data.move_to_end(key)
+                    return value
+                if now < stale_until:
+                    self._stats['stale_hits'] += 1
+                    self._data.move_to_end(key)
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        self._start_refresh(key, loader, ttl, stale_ttl)
+                    return value
+            self._stats['misses'] += 1
+
+        value, entry_ttl = _unwrap(loader(), ttl)
+        if value is not None:
+            self.set(key, value, entry_ttl, stale_ttl)
+        return value
+
+    def _start_refresh(self, key, loader, ttl, stale_ttl):
+        """バックグラウンドで値を再取得する"""
+        def refresh():
+            try:
+                value, entry_ttl = _unwrap(loader(), ttl)
+                if value is not None:
+                    self.set(key, value, entry_ttl, stale_ttl)
+                with self._lock:
+                    self._stats['refreshes'] += 1
+            except Exception as e:
+                logger.error(f"キャッシュ再取得エラー ({self.name}): {str(e)}")
+                with self._lock:
+                    self._stats['refresh_errors'] += 1
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        # 呼び出し元(キャッシュウォーマーなど)の上流の利用枠の優先度で再取得する
+        threading.Thread(
+            target=with_current_priority(refresh),
+            name=f"cache-refresh-{self.name}",
+            daemon=True
+        ).start()
+
+    async def aget_or_load(self, key, loader, ttl, stale_ttl=0):
+        """
+        get_or_load の非同期版(ASGI用)
+
+        Args:
+            key: キャッシュキー
+            loader: 値を取得する引数なしのコルーチン関数(戻り値の扱いは get_or_load と同じ)
+            ttl: 新鮮とみなす秒数
+            stale_ttl: TTL切れ後も古い値を返してよい秒数
+
+        Returns:
+            キャッシュされた値または loader() の戻り値
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, fresh_until, stale_until = entry
+                if now < fresh_until:
+                    self._stats['hits'] += 1
+                    self._data.move_to_end(key)
+                    return value
+                if now < stale_until:
+                    self._stats['stale_hits'] += 1
+                    self._data.move_to_end(key)
+                    refresh = key not in self._refreshing
+                    if refresh:
+                        self._refreshing.add(key)
+                else:
+                    entry = None
+            if entry is None:
+                self._stats['misses'] += 1
+
+        if entry is not None:
+            if refresh:
+                self._start_async_refresh(key, loader, ttl, stale_ttl)
+            return value
+
+        value, entry_ttl = _unwrap(await loader(), ttl)
+        if value is not None:
+            self.set(key, value, entry_ttl, stale_ttl)
+        return value
+
+    def _start_async_refresh(self, key, loader, ttl, stale_ttl):
+        """イベントループ上で値を再取得する"""
+        async def refresh():
+            try:
+                value, entry_ttl = _unwrap(await loader(), ttl)
+                if value is not None:
+                    self.set(key, value, entry_ttl, stale_ttl)
+                with self._lock:
+                    self._stats['refreshes'] += 1
+            except Exception as e:
+                logger.error(f"キャッシュ再取得エラー ({self.name}): {str(e)}")
+                with self._lock:
+                    self._stats['refresh_errors'] += 1
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        # 完了まで参照を保持する(途中でGCされないように)
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    def stats(self):
+        """ヒット率などの統計情報を返す"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._data)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = round(
+            (stats['hits'] + stats['stale_hits']) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+def configure_caches(app):
+    """
+    設定からキャッシュの最大エントリ数を読み込む
+    キャッシュ名を大文字にした '<NAME>_CACHE_MAX_SIZE' が設定されていれば適用する
+
+    Args:
+        app: Flaskアプリケーション
+    """
+    for name, cache in _registry.items():
+        max_size = app.config.get(f"{name.upper()}_CACHE_MAX_SIZE")
+        if max_size:
+            cache.resize(int(max_size))
+
+
+def get_cache_stats():
+    """
+    登録済みの全キャッシュの統計情報を取得
+
+    Returns:
+        dict: キャッシュ名 -> 統計情報
+    """
+    return {name: cache.stats() for name, cache in _registry.items()}
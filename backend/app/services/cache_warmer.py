@@ -0,0 +1,270 @@
+"""
+キャッシュウォーマー - 人気の目的地の天気・ニュースを期限切れ前に更新する
+"""
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from app.services.concurrency import with_app_context
+from app.services.circuit_breaker import CircuitOpen
+from app.services.rate_limiter import BudgetExhausted, background_priority
+
+logger = logging.getLogger(__name__)
+
+# アクセス頻度を保持する目的地の最大数
+MAX_TRACKED_DESTINATIONS = 10000
+
+# (国名, 都市名) -> アクセス回数
+_access_counts = Counter()
+# 都市名(casefold) -> 国名 (国名なしで記録された都市のアクセスを同じ目的地にまとめる用)
+_city_countries = {}
+_access_lock = threading.Lock()
+
+_stats = {
+    'runs': 0,
+    'refreshed': 0,
+    'skipped_fresh': 0,
+    'skipped_budget': 0,
+    'skipped_circuit': 0,
+    'errors': 0,
+    'last_run_at': None,
+    'last_run_seconds': None
+}
+_stats_lock = threading.Lock()
+
+
+class MinuteBudget:
+    """1分あたりの上流リクエスト数の上限"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._window_start = time.monotonic()
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, cost=1):
+        """枠が cost 以上残っていれば消費してTrueを返す"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 60:
+                self._window_start = now
+                self._used = 0
+            if self._used + cost > self.limit:
+                return False
+            self._used += cost
+            return True
+
+    def refund(self, cost=1):
+        """上流を呼ばなかった場合に枠を戻す"""
+        with self._lock:
+            self._used = max(0, self._used - cost)
+
+    def remaining(self):
+        """現在の1分枠の残り"""
+        with self._lock:
+            if time.monotonic() - self._window_start >= 60:
+                return self.limit
+            return self.limit - self._used
+
+
+def record_access(country_name, city_name):
+    """
+    目的地へのアクセスを記録(ウォーム対象の優先度に使う)
+
+    Args:
+        country_name: 国名(不明な場合はNone)
+        city_name: 都市名(不明な場合はNone)
+    """
+    country = ' '.join((country_name or '').split())
+    city = ' '.join((city_name or '').split())
+    if not country and not city:
+        return
+    with _access_lock:
+        # 天気(都市のみ)とニュース(国・都市)のアクセスを同じ目的地として数える
+        if city and not country:
+            country = _city_countries.get(city.casefold(), '')
+        elif city:
+            _city_countries[city.casefold()] = country
+            # 国が分かる前に都市のみで記録した回数を引き継ぐ
+            _access_counts[(country, city)] += _access_counts.pop(('', city), 0)
+        _access_counts[(country, city)] += 1
+        if len(_access_counts) > MAX_TRACKED_DESTINATIONS:
+            kept = _access_counts.most_common(MAX_TRACKED_DESTINATIONS // 2)
+            _access_counts.clear()
+            _access_counts.update(dict(kept))
+            kept_cities = {c.casefold() for _, c in _access_counts}
+            for name in [n for n in _city_countries if n not in kept_cities]:
+                del _city_countries[name]
+
+
+def get_accessed_destinations(limit):
+    """
+    アクセスのあった目的地をアクセス回数の多い順に取得(危険度データでの補完はしない)
+
+    Args:
+        limit: 最大件数
+
+    Returns:
+        list: (国名, 都市名) のリスト(不明な要素は空文字)
+    """
+    with _access_lock:
+        return [key for key, _ in _access_counts.most_common(limit)]
+
+
+def get_top_destinations(limit):
+    """
+    ウォーム対象の目的地を優先度順に取得
+    アクセス頻度の高い順に並べ、足りない分は危険度データの都市で補う
+
+    Args:
+        limit: 最大件数
+
+    Returns:
+        list: (国名, 都市名) のリスト(不明な要素は空文字)
+    """
+    from app.services.danger_scores import get_danger_index
+
+    destinations = get_accessed_destinations(limit)
+
+    seen = set(destinations)
+    for country_name, _, cities in get_danger_index().countries():
+        if len(destinations) >= limit:
+            break
+        for city_name, _ in cities:
+            if len(destinations) >= limit:
+                break
+            key = (country_name, city_name)
+            if key not in seen:
+                seen.add(key)
+                destinations.append(key)
+
+    return destinations[:limit]
+
+
+def _min_remaining(app, ttl):
+    """
+    キャッシュを更新する残りTTLのしきい値(次回の実行 + REFRESH_AHEAD 秒までに切れるものを更新)
+    TTL以上にすると取得直後のエントリまで毎回更新してしまうため、TTLより短くする
+    """
+    ahead = app.config['CACHE_WARMER_REFRESH_AHEAD']
+    return min(app.config['CACHE_WARMER_INTERVAL'] + ahead, max(ttl - ahead, ttl // 2))
+
+
+def warm_caches(app, budget):
+    """
+    上位の目的地について期限切れが近いキャッシュを更新する
+    (アプリケーションコンテキスト内で呼ぶこと)
+
+    Args:
+        app: Flaskアプリケーション
+        budget: MinuteBudget
+    """
+    from app.services.weather_service import (
+        forecast_upstream_calls, refresh_weather_forecast, refresh_current_weather
+    )
+    from app.services.news_service import refresh_news_by_location
+
+    started = time.monotonic()
+    config = app.config
+    forecast_remaining = _min_remaining(app, config['WEATHER_CACHE_TTL'])
+    current_remaining = _min_remaining(app, config['CURRENT_WEATHER_CACHE_TTL'])
+    news_remaining = _min_remaining(app, config['NEWS_CACHE_TTL'])
+
+    # (更新関数, 引数, 残りTTLのしきい値, 上流の呼び出し回数)
+    tasks = []
+    for country_name, city_name in get_top_destinations(config['CACHE_WARMER_TOP_N']):
+        if city_name:
+            tasks.append((refresh_weather_forecast, (city_name,),
+                          forecast_remaining, forecast_upstream_calls(city_name)))
+            tasks.append((refresh_current_weather, (city_name,), current_remaining, 1))
+        if country_name:
+            tasks.append((refresh_news_by_location, (country_name, city_name or None),
+                          news_remaining, 1))
+
+    counts = {'refreshed': 0, 'skipped_fresh': 0,
+              'skipped_budget': 0, 'skipped_circuit': 0, 'errors': 0}
+    counts_lock = threading.Lock()
+
+    def run(refresh, args, min_remaining, cost):
+        if not budget.try_acquire(cost):
+            result = 'skipped_budget'
+        else:
+            try:
+                # 上流の利用枠はユーザーリクエストを優先する
+                with background_priority():
+                    refreshed = refresh(*args, min_remaining=min_remaining)
+                if refreshed:
+                    result = 'refreshed'
+                else:
+                    budget.refund(cost)
+                    result = 'skipped_fresh'
+            except BudgetExhausted:
+                # 上流を呼べなかったので枠を戻す
+                budget.refund(cost)
+                result = 'skipped_budget'
+            except CircuitOpen:
+                budget.refund(cost)
+                result = 'skipped_circuit'
+            except Exception as e:
+                logger.error(f"キャッシュウォームエラー {args}: {str(e)}")
+                result = 'errors'
+        with counts_lock:
+            counts[result] += 1
+
+    run_in_context = with_app_context(run)
+    with ThreadPoolExecutor(
+            max_workers=app.config['CACHE_WARMER_MAX_WORKERS']) as executor:
+        for task in tasks:
+            executor.submit(run_in_context, *task)
+
+    elapsed = time.monotonic() - started
+    with _stats_lock:
+        _stats['runs'] += 1
+        for name, count in counts.items():
+            _stats[name] += count
+        _stats['last_run_at'] = time.time()
+        _stats['last_run_seconds'] = round(elapsed, 3)
+
+    logger.info(
+        f"キャッシュウォーム完了: 更新{counts['refreshed']}件, "
+        f"予算超過{counts['skipped_budget']}件 ({elapsed:.1f}秒)")
+
+
+def init_cache_warmer(app):
+    """
+    設定で有効な場合にキャッシュウォーマーを起動する
+
+    Args:
+        app: Flaskアプリケーション
+    """
+    from app.services.scheduler import should_start_background_jobs, start_job
+
+    if not app.config['CACHE_WARMER_ENABLED']:
+        return
+    if not should_start_background_jobs(app):
+        return
+
+    budget = MinuteBudget(app.config['CACHE_WARMER_BUDGET_PER_MINUTE'])
+    start_job(
+        app,
+        'cache_warmer',
+        app.config['CACHE_WARMER_INTERVAL'],
+        lambda: warm_caches(app, budget),
+        initial_delay=5
+    )
+
+
+def get_cache_warmer_stats():
+    """
+    キャッシュウォーマーの統計情報を取得
+
+    Returns:
+        dict: 実行回数・更新件数・追跡中の目的地数など
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    with _access_lock:
+        stats['tracked_destinations'] = len(_access_counts)
+    return stats
@@ -0,0 +1,147 @@
+"""
+サーキットブレーカー - 障害中の上流APIへの呼び出しを止めて即座に失敗させる
+"""
+import threading
+import time
+import logging
+
+from app.services.rate_limiter import UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+# 上流名 -> CircuitBreaker
+_breakers = {}
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(UpstreamUnavailable):
+    """サーキットが開いているため上流APIを呼ばない"""
+
+    def __init__(self, upstream, retry_after):
+        super().__init__(f"{upstream} のサーキットが開いています")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    1つの上流APIのサーキットブレーカー
+
+    連続した失敗が failure_threshold 回に達するとオープンになり、
+    recovery_timeout 秒の間は呼び出しを即座に失敗させる。
+    その後ハーフオープンになり、half_open_max_calls 本の試行だけを通す。
+    試行が成功すればクローズ、失敗すれば再びオープンに戻る。
+    """
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30,
+                 half_open_max_calls=1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._stats = {'opened': 0, 'rejected': 0, 'failures': 0, 'successes': 0}
+        self._lock = threading.Lock()
+
+    def _current_state(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def before_call(self):
+        """
+        上流を呼ぶ前に呼び出してよいか確認する
+
+        Raises:
+            CircuitOpen: オープン中、またはハーフオープンの試行枠が埋まっている場合
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return
+            self._stats['rejected'] += 1
+            retry_after = max(0.0, self._opened_at + self.recovery_timeout - now)
+        raise CircuitOpen(self.name, retry_after)
+
+    def release(self):
+        """上流を呼ばずに終わった場合に試行枠を戻す"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def record_success(self):
+        """呼び出しの成功を記録する"""
+        with self._lock:
+            self._stats['successes'] += 1
+            self._failures = 0
+            if self._state != CLOSED:
+                logger.info(f"サーキットをクローズ: {self.name}")
+            self._state = CLOSED
+
+    def record_failure(self):
+        """呼び出しの失敗(接続エラー・タイムアウト・5xxなど)を記録する"""
+        with self._lock:
+            self._stats['failures'] += 1
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._stats['opened'] += 1
+                    logger.warning(
+                        f"サーキットをオープン: {self.name} (連続失敗{self._failures}回)")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self):
+        """状態と統計情報を返す"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['state'] = self._current_state(time.monotonic())
+            stats['consecutive_failures'] = self._failures
+        return stats
+
+
+def init_circuit_breakers(app):
+    """
+    設定から上流ごとのサーキットブレーカーを作成する
+
+    Args:
+        app: Flaskアプリケーション
+    """
+    for name in ('newsapi', 'openweather'):
+        _breakers[name] = CircuitBreaker(
+            name,
+            failure_threshold=app.config['CIRCUIT_BREAKER_FAILURE_THRESHOLD'],
+            recovery_timeout=app.config['CIRCUIT_BREAKER_RECOVERY_TIMEOUT'],
+            half_open_max_calls=app.config['CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS']
+        )
+
+
+def get_breaker(upstream):
+    """
+    上流のサーキットブレーカーを取得(未設定の場合はNone)
+
+    Args:
+        upstream: 上流名('newsapi' または 'openweather')
+    """
+    return _breakers.get(upstream)
+
+
+def get_circuit_stats():
+    """
+    上流ごとのサーキットの状態を取得
+
+    Returns:
+        dict: 上流名 -> 統計情報
+    """
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
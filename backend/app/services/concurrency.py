@@ -0,0 +1,149 @@
+"""
+並行処理ユーティリティ - ワーカースレッドでアプリケーションコンテキストを引き継ぐ
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+# Python 3.10 では as_completed のタイムアウトは組み込みの TimeoutError ではない
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from flask import current_app
+
+from app.services.rate_limiter import with_current_priority
+
+
+def with_app_context(fn):
+    """
+    現在のアプリケーションコンテキスト内で fn を実行するラッパーを返す
+    (ThreadPoolExecutor などの別スレッドに渡す関数用、上流の利用枠の優先度も引き継ぐ)
+
+    Args:
+        fn: ラップする関数
+
+    Returns:
+        callable: アプリケーションコンテキストを張ってから fn を呼ぶ関数
+    """
+    app = current_app._get_current_object()
+    fn_with_priority = with_current_priority(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with app.app_context():
+            return fn_with_priority(*args, **kwargs)
+
+    return wrapper
+
+
+async def run_sync(fn, *args):
+    """
+    同期関数(データベースアクセスなど)をワーカースレッドで実行して待つ
+    (非同期サービスからイベントループを止めずに呼ぶ用)
+
+    Args:
+        fn: 同期関数
+        *args: fn に渡す引数
+
+    Returns:
+        fn(*args) の戻り値
+    """
+    return await asyncio.to_thread(with_app_context(fn), *args)
+
+
+def _request_executor(task_count):
+    """
+    1リクエスト分のワーカープールを作成する
+    プロセス全体で共有すると、締め切りを過ぎても止まらない遅い処理がワーカーを埋め、
+    他のリクエストのキャッシュから返せる処理まで待たされるため、リクエストごとに分ける
+    (ワーカー数は処理数と REQUEST_FANOUT_MAX_WORKERS の小さい方)
+    """
+    return ThreadPoolExecutor(
+        max_workers=max(1, min(task_count, current_app.config['REQUEST_FANOUT_MAX_WORKERS'])),
+        thread_name_prefix='request-fanout'
+    )
+
+
+def run_concurrently(tasks, timeout, required=()):
+    """
+    独立した複数の処理を並行実行し、全体の締め切りまで待つ
+
+    Args:
+        tasks: 名前 -> (関数, 引数タプル) の辞書
+        timeout: 全体の締め切り(秒)
+        required: 締め切り後も完了を待つ処理の名前
+
+    Returns:
+        tuple: (名前 -> 結果, 時間切れになった名前のリスト, 名前 -> 例外)
+    """
+    executor = _request_executor(len(tasks))
+    try:
+        return _collect(executor, tasks, timeout, required)
+    finally:
+        # 時間切れの処理は待たない(実行中のものはワーカーで最後まで実行される)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _collect(executor, tasks, timeout, required):
+    """run_concurrently の本体"""
+    futures = {
+        executor.submit(with_app_context(fn), *args): name
+        for name, (fn, args) in tasks.items()
+    }
+
+    done, not_done = wait(futures, timeout=max(timeout, 0))
+
+    # 必須の処理は締め切りを過ぎても完了を待つ
+    pending_required = {f for f in not_done if futures[f] in required}
+    if pending_required:
+        wait(pending_required)
+        done |= pending_required
+        not_done -= pending_required
+
+    results = {}
+    errors = {}
+    for future in done:
+        name = futures[future]
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            errors[name] = e
+
+    timed_out = []
+    for future in not_done:
+        future.cancel()
+        timed_out.append(futures[future])
+
+    return results, sorted(timed_out), errors
+
+
+def iter_concurrently(tasks, timeout):
+    """
+    独立した複数の処理を並行実行し、完了した順に結果を返す
+    (ストリーミング応答で準備できた項目から送る用)
+
+    Args:
+        tasks: 名前 -> (関数, 引数タプル) の辞書
+        timeout: 全体の締め切り(秒)
+
+    Yields:
+        tuple: (名前, 状態, 値)。状態は 'ok'(値は結果)、'error'(値は例外)、
+            'timed_out'(値はNone)のいずれか
+    """
+    executor = _request_executor(len(tasks))
+    futures = {
+        executor.submit(with_app_context(fn), *args): name
+        for name, (fn, args) in tasks.items()
+    }
+
+    pending = dict(futures)
+    try:
+        for future in as_completed(futures, timeout=max(timeout, 0)):
+            name = pending.pop(future)
+            try:
+                yield name, 'ok', future.result()
+            except Exception as e:
+                yield name, 'error', e
+    except FuturesTimeoutError:
+        for future, name in sorted(pending.items(), key=lambda item: item[1]):
+            future.cancel()
+            yield name, 'timed_out', None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,193 @@
+"""
+国カタログ - countryテーブルをワーカーごとに1回読み込み、国名・国コードの検索をメモリ上で行う
+
+国名(表記ゆれを吸収)、ISO 3166-1 alpha-3(countryテーブルのCode)、alpha-2 のいずれでも1回の辞書参照で引ける。
+alpha-2 は app/data/country_codes.json の対応表から求める。
+マイグレーションのバージョン(alembic_version)が変わった場合と
+invalidate_country_catalog() が呼ばれた場合に読み込み直す。
+"""
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+import logging
+
+from app.extensions import db
+from app.services.danger_scores import normalize_place_name
+
+logger = logging.getLogger(__name__)
+
+# alpha-3 -> alpha-2 の対応表
+COUNTRY_CODES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'data', 'country_codes.json')
+
+CountryEntry = namedtuple('CountryEntry', ['code', 'alpha2', 'name', 'continent'])
+
+
+def _entry_to_dict(entry):
+    """Country.to_dict と同じ形式に変換"""
+    return {'code': entry.code, 'name': entry.name, 'continent': entry.continent}
+
+
+class CountryCatalog:
+    """
+    国の一覧と検索用の辞書(構築後は変更しない)
+    """
+
+    def __init__(self, rows, alpha2_codes, migration_version=None):
+        """
+        Args:
+            rows: (国コード, 国名, 大陸) のリスト
+            alpha2_codes: alpha-3 -> alpha-2 の辞書
+            migration_version: 読み込み時のマイグレーションのバージョン
+        """
+        self.migration_version = migration_version
+        self.entries = tuple(
+            CountryEntry(code, alpha2_codes.get(code.upper()), name, continent)
+            for code, name, continent in rows
+        )
+        self._by_code = {}
+        self._by_name = {}
+        for entry in self.entries:
+            self._by_code.setdefault(entry.code.upper(), entry)
+            self._by_name.setdefault(normalize_place_name(entry.name), entry)
+        # alpha-3 と alpha-2 は長さが違うため同じ辞書に入れる
+        for entry in self.entries:
+            if entry.alpha2:
+                self._by_code.setdefault(entry.alpha2, entry)
+        self._dicts = [_entry_to_dict(entry) for entry in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def by_name(self, name):
+        """
+        国名から検索(大文字小文字・アクセント記号・余分な空白は無視)
+
+        Returns:
+            CountryEntry: 見つからない場合はNone
+        """
+        return self._by_name.get(normalize_place_name(name))
+
+    def by_code(self, code):
+        """
+        ISO 3166-1 alpha-3 または alpha-2 の国コードから検索
+
+        Returns:
+            CountryEntry: 見つからない場合はNone
+        """
+        if not code:
+            return None
+        return self._by_code.get(code.strip().upper())
+
+    def to_list(self):
+        """全ての国を Country.to_dict と同じ形式で返す"""
+        return self._dicts
+
+
+_alpha2_codes = None
+_catalog = None
+_catalog_checked_at = 0.0
+_catalog_lock = threading.Lock()
+_stats = {'loads': 0, 'invalidations': 0}
+
+
+def _load_alpha2_codes():
+    """alpha-3 -> alpha-2 の対応表を読み込む(初回のみ)"""
+    global _alpha2_codes
+    if _alpha2_codes is None:
+        with open(COUNTRY_CODES_PATH, encoding='utf-8') as f:
+            _alpha2_codes = json.load(f)['alpha3_to_alpha2']
+    return _alpha2_codes
+
+
+def _current_migration_version():
+    """適用済みのマイグレーションのバージョン(テーブルが無い場合はNone)"""
+    try:
+        versions = db.session.execute(
+            db.text('SELECT version_num FROM alembic_version')).scalars().all()
+        return ','.join(sorted(versions)) or None
+    except Exception:
+        db.session.rollback()
+        return None
+
+
+def load_country_catalog():
+    """
+    countryテーブルからカタログを作成
+
+    Returns:
+        CountryCatalog: 新しいカタログ
+    """
+    from app.models import Country
+
+    version = _current_migration_version()
+    rows = Country.query.with_entities(
+        Country.Code, Country.Name, Country.Continent
+    ).order_by(Country.Code).all()
+    catalog = CountryCatalog(rows, _load_alpha2_codes(), version)
+    logger.info(f"国カタログ読み込み: {len(catalog)}か国 (migration={version})")
+    return catalog
+
+
+def get_country_catalog():
+    """
+    カタログを取得(未読み込み・無効化後・マイグレーション適用後は読み込み直す)
+
+    Returns:
+        CountryCatalog: 国カタログ
+    """
+    global _catalog, _catalog_checked_at
+
+    catalog = _catalog
+    if catalog is not None:
+        interval = current_app.config['COUNTRY_CATALOG_CHECK_INTERVAL']
+        if interval <= 0 or time.monotonic() - _catalog_checked_at < interval:
+            return catalog
+
+    with _catalog_lock:
+        if _catalog is not catalog:
+            return _catalog
+        if catalog is not None:
+            _catalog_checked_at = time.monotonic()
+            if _current_migration_version() == catalog.migration_version:
+                return catalog
+            logger.info("マイグレーションが適用されたため国カタログを読み込み直します")
+        try:
+            _catalog = load_country_catalog()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"国カタログ読み込みエラー: {str(e)}")
+            if catalog is None:
+                raise
+            return catalog
+        _catalog_checked_at = time.monotonic()
+        _stats['loads'] += 1
+        return _catalog
+
+
+def invalidate_country_catalog():
+    """カタログを破棄し、次回の取得時に読み込み直す(国データの更新後など)"""
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
+        _stats['invalidations'] += 1
+    logger.info("国カタログを無効化しました")
+
+
+def get_country_catalog_stats():
+    """
+    国カタログの統計情報を取得
+
+    Returns:
+        dict: 読み込み回数・無効化回数・国数
+    """
+    catalog = _catalog
+    return {
+        'loads': _stats['loads'],
+        'invalidations': _stats['invalidations'],
+        'countries': len(catalog) if catalog is not None else 0,
+        'migration_version': catalog.migration_version if catalog is not None else None
+    }
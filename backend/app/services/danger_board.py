@@ -0,0 +1,297 @@
+"""
+危険度一覧サービス - 全ての国・都市の危険度を地図表示用にまとめて返す
+
+一覧は危険度データ・国テーブル・計算済み/キャッシュ済みのニュース件数から一定間隔で作り直し、
+その間は同じスナップショットを使う。レスポンスボディとETagは絞り込み条件ごとに
+1回だけシリアライズして使い回す。NewsAPIは呼ばない(件数が無い場所は基本スコアのみ)。
+安全な順・危険な順の上位k件も、作成時に並べ替えた配列を切り出して返す。
+"""
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from flask import current_app
+import logging
+
+from app.services.danger_scores import get_danger_index
+from app.services.danger_service import _combine_danger_score, get_danger_level_description
+
+logger = logging.getLogger(__name__)
+
+# 絞り込み条件ごとにキャッシュするレスポンスの最大数
+_MAX_RENDERED = 256
+
+
+class DangerBoard:
+    """
+    ある時点の全ての国・都市の危険度(構築後は変更しない)
+    """
+
+    def __init__(self, countries, version, index):
+        """
+        Args:
+            countries: 国ごとの危険度の辞書のリスト(都市は 'cities' に含める)
+            version: 危険度データのバージョン
+            index: 構築に使った DangerScoreIndex
+        """
+        self.countries = countries
+        self.version = version
+        self.index = index
+        self.generated_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        self.built_at = time.monotonic()
+        self._rendered = {}  # (大陸, 国コード) -> (ボディ, ETag)
+        self._lock = threading.Lock()
+        self._ranked = self._build_rankings(countries)
+
+    @staticmethod
+    def _build_rankings(countries):
+        """
+        上位k件の検索用に、種別('country' / 'city')・順序・大陸ごとに並べ替えた配列を作る
+        大陸の指定なしは None をキーにする(同じスコアは名前順)
+        """
+        entries = {'country': [], 'city': []}
+        for country in countries:
+            location = {'country': country['country'], 'code': country['code'],
+                        'continent': country['continent']}
+            entries['country'].append({k: v for k, v in country.items() if k != 'cities'})
+            entries['city'].extend(dict(location, **city) for city in country['cities'])
+
+        orders = {
+            'safest': lambda e: (e['danger_score'], e.get('city') or e['country']),
+            'dangerous': lambda e: (-e['danger_score'], e.get('city') or e['country'])
+        }
+        ranked = {}
+        for kind, items in entries.items():
+            for order, key in orders.items():
+                for item in sorted(items, key=key):
+                    ranked.setdefault((kind, order, None), []).append(item)
+                    if item['continent']:
+                        ranked.setdefault(
+                            (kind, order, item['continent'].casefold()), []).append(item)
+        return ranked
+
+    def top(self, kind='country', order='safest', k=10, continent=None):
+        """
+        最も安全な(または危険な)k件を返す(並べ替え済みの配列を切り出すだけ)
+
+        Args:
+            kind: 'country' または 'city'
+            order: 'safest' または 'dangerous'
+            k: 件数
+            continent: 大陸名(大文字小文字は区別しない)
+
+        Returns:
+            list: 危険度の辞書のリスト(order の順)
+        """
+        key = (kind, order, continent.casefold() if continent else None)
+        return self._ranked.get(key, [])[:k]
+
+    def select(self, continent=None, codes=()):
+        """
+        大陸・国コードで絞り込んだ国の一覧
+
+        Args:
+            continent: 大陸名(大文字小文字は区別しない)
+            codes: ISO 3166-1 alpha-3 国コードのタプル
+
+        Returns:
+            list: 国ごとの危険度の辞書のリスト
+        """
+        continent = continent.casefold() if continent else None
+        return [
+            country for country in self.countries
+            if (continent is None or (country['continent'] or '').casefold() == continent)
+            and (not codes or country['code'] in codes)
+        ]
+
+    def render(self, app, continent=None, codes=()):
+        """
+        絞り込んだ一覧をJSONにシリアライズ(同じ条件では前回の結果を返す)
+
+        Args:
+            app: Flaskアプリケーション
+            continent: 大陸名
+            codes: ISO 3166-1 alpha-3 国コードのタプル
+
+        Returns:
+            tuple: (ボディ(bytes), ETag)
+        """
+        key = (continent.casefold() if continent else None, tuple(sorted(codes)))
+        with self._lock:
+            rendered = self._rendered.get(key)
+        if rendered is not None:
+            return rendered
+
+        countries = self.select(continent, codes)
+        # 作成日時はボディに含めない(内容が変わらなければETagも変わらない)
+        body = app.json.dumps({
+            'version': self.version,
+            'country_count': len(countries),
+            'countries': countries
+        }).encode('utf-8')
+        rendered = (body, hashlib.sha1(body).hexdigest())
+
+        with self._lock:
+            if len(self._rendered) < _MAX_RENDERED:
+                self._rendered[key] = rendered
+        return rendered
+
+
+def _score_entry(base_score, news_count):
+    """基本スコアとニュース件数(不明ならNone)から一覧の1件分を作る"""
+    danger_info = _combine_danger_score(base_score, news_count or 0)
+    return {
+        'danger_score': danger_info['score'],
+        'base_score': base_score,
+        'news_count': news_count,
+        'news_adjustment': danger_info['news_adjustment'],
+        'danger_level': get_danger_level_description(danger_info['score']),
+        'is_dangerous': danger_info['is_dangerous']
+    }
+
+
+def _load_country_catalog(index):
+    """国カタログから 危険度データの国名 -> (国コード, 大陸) を作る"""
+    from app.services.country_catalog import get_country_catalog
+
+    catalog = {}
+    try:
+        for entry in get_country_catalog().entries:
+            found = index.lookup(entry.name)
+            if found is not None:
+                catalog.setdefault(found[1], (entry.code, entry.continent))
+    except Exception as e:
+        logger.warning(f"国カタログ読み込みエラー(国コード・大陸なしで作成): {str(e)}")
+    return catalog
+
+
+def _load_news_counts():
+    """
+    ニュース件数の取得関数を返す
+    取り込みモードでは取り込み済みの記事数、次に危険度スナップショットの件数、
+    最後にキャッシュ済みの件数を使う
+    """
+    from app.extensions import db
+    from app.services.danger_snapshot import load_snapshot_news_counts
+    from app.services.news_ingester import _normalize_name, count_stored_danger_news
+    from app.services.news_service import DANGER_NEWS_LIMIT, peek_news_count
+
+    stored = None
+    if current_app.config['NEWS_INGEST_ENABLED']:
+        try:
+            stored = count_stored_danger_news(days=7)
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"取り込み済み記事の集計エラー: {str(e)}")
+
+    try:
+        snapshot = load_snapshot_news_counts()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"危険度スナップショット読み込みエラー: {str(e)}")
+        snapshot = {}
+
+    def news_count(country_name, city_name):
+        if stored is not None:
+            count = stored.get((_normalize_name(country_name), _normalize_name(city_name)))
+            if count is not None:
+                return min(count, DANGER_NEWS_LIMIT)
+        count = snapshot.get((country_name, city_name))
+        if count is not None:
+            return count
+        return peek_news_count(country_name, city_name or None)
+
+    return news_count
+
+
+def build_danger_board():
+    """
+    危険度データ・国テーブル・ニュース件数から一覧を作成
+
+    Returns:
+        DangerBoard: 新しい一覧
+    """
+    started = time.monotonic()
+    index = get_danger_index()
+    catalog = _load_country_catalog(index)
+    news_count = _load_news_counts()
+
+    countries = []
+    for country_name, score, cities in index.countries():
+        code, continent = catalog.get(country_name, (None, None))
+        entry = {'country': country_name, 'code': code, 'continent': continent}
+        entry.update(_score_entry(score, news_count(country_name, '')))
+        entry['cities'] = [
+            dict({'city': city_name}, **_score_entry(city_score, news_count(country_name, city_name)))
+            for city_name, city_score in cities
+        ]
+        countries.append(entry)
+
+    board = DangerBoard(countries, index.version, index)
+    logger.info(
+        f"危険度一覧作成: {len(countries)}か国 ({(time.monotonic() - started) * 1000:.1f}ms)")
+    return board
+
+
+_board = None
+_board_stale = False
+_board_lock = threading.Lock()
+_stats = {'builds': 0, 'build_errors': 0}
+
+
+def invalidate_danger_board():
+    """次回の取得時に一覧を作り直す(危険度スナップショットの更新後など)"""
+    global _board_stale
+    _board_stale = True
+
+
+def get_danger_board():
+    """
+    一覧を取得(未作成・期限切れ・危険度データ更新時は作り直す)
+
+    Returns:
+        DangerBoard: 危険度一覧
+    """
+    global _board, _board_stale
+
+    board = _board
+    if board is not None and not _board_stale:
+        age = time.monotonic() - board.built_at
+        if age < current_app.config['DANGER_BOARD_REFRESH_INTERVAL'] \
+                and board.index is get_danger_index():
+            return board
+
+    # 作り直しは1スレッドだけが行い、他は既存の一覧を使う
+    if not _board_lock.acquire(blocking=board is None):
+        return board
+    try:
+        if _board is not board:
+            return _board
+        try:
+            _board_stale = False
+            _board = build_danger_board()
+            _stats['builds'] += 1
+        except Exception as e:
+            _stats['build_errors'] += 1
+            logger.error(f"危険度一覧作成エラー: {str(e)}")
+            if board is None:
+                raise
+        return _board
+    finally:
+        _board_lock.release()
+
+
+def get_danger_board_stats():
+    """
+    危険度一覧の統計情報を取得
+
+    Returns:
+        dict: 作成回数・最終作成日時・国数
+    """
+    board = _board
+    return {
+        'builds': _stats['builds'],
+        'build_errors': _stats['build_errors'],
+        'generated_at': board.generated_at if board is not None else None,
+        'countries': len(board.countries) if board is not None else 0
+    }
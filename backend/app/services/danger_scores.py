@@ -0,0 +1,264 @@
+"""
+危険度スコアのインデックス - app/data/danger_scores.json を読み込み、正規化した名前で検索する
+
+国名・都市名は大文字小文字・アクセント記号・ハイフン・アポストロフィ・余分な空白を無視して照合し、
+データファイルの aliases / city_aliases に登録した別名でも検索できる。
+データファイルは初回検索時に読み込み、更新時刻が変わっていれば再読み込みする
+(ワーカーを再起動せずにファイルの差し替えだけで反映される)。
+"""
+import json
+import os
+import threading
+import time
+import unicodedata
+from flask import current_app
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 既定のデータファイル
+DEFAULT_DANGER_SCORES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'data', 'danger_scores.json')
+
+# NFKDで分解されない文字・区切り文字の置き換え
+_FOLD_TABLE = str.maketrans({
+    'ł': 'l', 'Ł': 'l', 'ø': 'o', 'Ø': 'o', 'đ': 'd', 'Đ': 'd', 'ı': 'i',
+    'æ': 'ae', 'Æ': 'ae', 'œ': 'oe', 'Œ': 'oe',
+    '-': ' ', '‐': ' ', '–': ' ', '_': ' ',
+    '’': None, '‘': None, "'": None, '`': None, '.': None
+})
+
+
+def normalize_place_name(name):
+    """
+    国名・都市名を照合用に正規化する
+    (例: "Côte d'Ivoire " -> "cote divoire", "Mazar-i-Sharif" -> "mazar i sharif")
+
+    Args:
+        name: 国名・都市名
+
+    Returns:
+        str: 正規化した名前(空・Noneの場合は空文字)
+    """
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKD', name.translate(_FOLD_TABLE))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.casefold().split())
+
+
+class DangerScoreIndex:
+    """
+    危険度スコアの検索用インデックス(構築後は変更しない)
+
+    正規化した国名・別名 -> (国名, スコア, {正規化した都市名・別名: (都市名, スコア)})
+    の辞書で、国・都市ともに1回の辞書参照で引ける。
+    """
+
+    def __init__(self, data):
+        """
+        Args:
+            data: danger_scores.json の内容
+        """
+        self.version = data.get('version')
+        self.updated = data.get('updated')
+        self._countries = {}
+        self._entries = []  # (国名, スコア, ((都市名, スコア), ...)) をデータファイルの順に保持
+
+        countries = data.get('countries', {})
+        aliases = []
+        for country_name, country_data in countries.items():
+            score = float(country_data['score'])
+            cities = {}
+            city_entries = []
+            for city_name, city_score in country_data.get('cities', {}).items():
+                cities[normalize_place_name(city_name)] = (city_name, float(city_score))
+                city_entries.append((city_name, float(city_score)))
+            for city_name, city_aliases in country_data.get('city_aliases', {}).items():
+                entry = cities.get(normalize_place_name(city_name))
+                if entry is None:
+                    logger.warning(f"危険度データ: 未登録の都市の別名 ({country_name} / {city_name})")
+                    continue
+                for alias in city_aliases:
+                    cities.setdefault(normalize_place_name(alias), entry)
+
+            record = (country_name, score, cities)
+            self._countries[normalize_place_name(country_name)] = record
+            self._entries.append((country_name, score, tuple(city_entries)))
+            aliases.extend((alias, record) for alias in country_data.get('aliases', []))
+
+        # 別名は正式名称の後に登録し、正式名称と衝突する場合は正式名称を優先する
+        for alias, record in aliases:
+            key = normalize_place_name(alias)
+            existing = self._countries.setdefault(key, record)
+            if existing is not record:
+                logger.warning(f"危険度データ: 別名が重複しています ({alias})")
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def city_count(self):
+        """登録されている都市数(別名を除く)"""
+        return sum(len(cities) for _, _, cities in self._entries)
+
+    def lookup(self, country_name, city_name=None):
+        """
+        国名・都市名からスコアを検索
+
+        Args:
+            country_name: 国名(別名・表記ゆれ可)
+            city_name: 都市名(オプション)
+
+        Returns:
+            tuple: (スコア, 正式な国名, 正式な都市名) 都市が見つからない場合は国のスコアで都市名はNone、
+                   国が見つからない場合はNone
+        """
+        record = self._countries.get(normalize_place_name(country_name))
+        if record is None:
+            return None
+
+        name, score, cities = record
+        if city_name:
+            city = cities.get(normalize_place_name(city_name))
+            if city is not None:
+                return city[1], name, city[0]
+        return score, name, None
+
+    def countries(self):
+        """
+        全ての国をデータファイルの順に返す
+
+        Returns:
+            list: (国名, スコア, ((都市名, スコア), ...)) のリスト
+        """
+        return list(self._entries)
+
+
+_index = None
+_index_mtime = None
+_index_checked_at = 0.0
+_index_lock = threading.Lock()
+_stats = {'lookups': 0, 'misses': 0, 'reloads': 0, 'reload_errors': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _data_path(path=None):
+    return path or current_app.config['DANGER_SCORES_PATH'] or DEFAULT_DANGER_SCORES_PATH
+
+
+def load_danger_index(path):
+    """
+    データファイルからインデックスを作成
+
+    Args:
+        path: danger_scores.json のパス
+
+    Returns:
+        DangerScoreIndex: 新しいインデックス
+    """
+    with open(path, encoding='utf-8') as f:
+        return DangerScoreIndex(json.load(f))
+
+
+def reload_danger_scores(path=None):
+    """
+    データファイルを読み込み直してインデックスを差し替える
+    読み込みに失敗した場合は例外を送出し、既存のインデックスをそのまま使う
+
+    Args:
+        path: データファイルのパス(省略時は DANGER_SCORES_PATH)
+
+    Returns:
+        DangerScoreIndex: 新しいインデックス
+    """
+    global _index, _index_mtime, _index_checked_at
+
+    path = _data_path(path)
+    with _index_lock:
+        try:
+            mtime = os.stat(path).st_mtime
+            index = load_danger_index(path)
+        except Exception:
+            _count('reload_errors')
+            _index_checked_at = time.monotonic()
+            raise
+        _index = index
+        _index_mtime = mtime
+        _index_checked_at = time.monotonic()
+        _count('reloads')
+
+    logger.info(
+        f"危険度データ読み込み: version={index.version}, {len(index)}か国, {index.city_count}都市")
+    return index
+
+
+def get_danger_index():
+    """
+    インデックスを取得(未読み込みの場合は読み込み、データファイルが更新されていれば再読み込み)
+
+    Returns:
+        DangerScoreIndex: 危険度スコアのインデックス
+    """
+    global _index_checked_at
+
+    index = _index
+    if index is None:
+        return reload_danger_scores()
+
+    interval = current_app.config['DANGER_SCORES_CHECK_INTERVAL']
+    if interval <= 0 or time.monotonic() - _index_checked_at < interval:
+        return index
+
+    path = _data_path()
+    try:
+        if os.stat(path).st_mtime == _index_mtime:
+            _index_checked_at = time.monotonic()
+            return index
+        return reload_danger_scores(path)
+    except Exception as e:
+        logger.error(f"危険度データ再読み込みエラー: {str(e)}")
+        return index
+
+
+def lookup_danger_score(country_name, city_name=None):
+    """
+    国名・都市名から危険度スコアを検索(統計を記録する)
+
+    Args:
+        country_name: 国名
+        city_name: 都市名(オプション)
+
+    Returns:
+        tuple: (スコア, 正式な国名, 正式な都市名)、国が見つからない場合はNone
+    """
+    result = get_danger_index().lookup(country_name, city_name)
+    _count('lookups')
+    if result is None:
+        _count('misses')
+        logger.info(f"危険度データに無い国: {country_name}")
+    return result
+
+
+def get_danger_score_stats():
+    """
+    危険度データの統計情報を取得
+
+    Returns:
+        dict: データのバージョン・件数・検索数・再読み込み回数
+    """
+    index = _index
+    with _stats_lock:
+        stats = dict(_stats)
+    stats.update({
+        'version': index.version if index is not None else None,
+        'updated': index.updated if index is not None else None,
+        'countries': len(index) if index is not None else 0,
+        'cities': index.city_count if index is not None else 0
+    })
+    return stats
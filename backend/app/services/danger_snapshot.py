@@ -0,0 +1,383 @@
+"""
+危険度スナップショットサービス - calculate_danger_level の結果を danger_score_snapshot テーブルに保存する
+
+DANGER_SNAPSHOT_ENABLED の場合のみ使う。バックグラウンドジョブがアクセスのあった場所と
+保存済みの場所をNewsAPIの利用枠の範囲で計算し直し(ニュースは件数のみを取得)、
+リクエスト時は主キーで1行読むだけで危険度を返す(NewsAPIの応答を待たない)。
+スナップショットが無い・古すぎる場合と fresh を指定した場合はその場で計算して保存する。
+無効な場合は毎回 calculate_danger_level で計算し、テーブルは読み書きしない。
+"""
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+import logging
+
+from app.extensions import db
+from app.services.concurrency import run_sync
+from app.services.danger_scores import get_danger_index
+from app.services.danger_service import (
+    calculate_danger_level, calculate_danger_level_async, calculate_danger_score
+)
+from app.services.rate_limiter import (
+    UpstreamUnavailable, background_priority, get_available_budget
+)
+
+logger = logging.getLogger(__name__)
+
+_stats = {
+    'runs': 0,
+    'refreshed': 0,
+    'errors': 0,
+    'hits': 0,
+    'misses': 0,
+    'forced': 0,
+    'skipped_budget': 0,
+    'last_run_at': None
+}
+_stats_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def _utcnow():
+    """タイムゾーンなしのUTC現在時刻"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _with_computed_at(danger_info, computed_at):
+    """危険度情報に計算日時(ISO 8601)を付ける"""
+    return dict(danger_info, computed_at=computed_at.strftime('%Y-%m-%dT%H:%M:%SZ'))
+
+
+def snapshot_key(country_name, city_name=None):
+    """
+    スナップショットの主キー (国名, 都市名) を求める
+    危険度データにある国・都市は正式な名前に揃え、それ以外は空白のみ正規化する
+
+    Args:
+        country_name: 国名
+        city_name: 都市名(オプション)
+
+    Returns:
+        tuple: (国名, 都市名) 都市名が無い場合は空文字
+    """
+    country = ' '.join((country_name or '').split())
+    city = ' '.join((city_name or '').split())
+
+    found = get_danger_index().lookup(country, city)
+    if found is not None:
+        country = found[1]
+        city = found[2] or city
+    return country, city
+
+
+def read_danger_snapshot(country_name, city_name=None, max_age=None):
+    """
+    保存済みの危険度を読み込む
+
+    Args:
+        country_name: 国名
+        city_name: 都市名(オプション)
+        max_age: これより古いスナップショットは使わない(秒)
+
+    Returns:
+        dict: calculate_danger_level と同じ形式の危険度情報(computed_at 付き)、無い場合はNone
+    """
+    from app.models import DangerScoreSnapshot
+
+    try:
+        row = db.session.get(DangerScoreSnapshot, snapshot_key(country_name, city_name))
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"危険度スナップショット読み込みエラー: {str(e)}")
+        return None
+
+    if row is None:
+        return None
+    if max_age is not None and row.ComputedAt < _utcnow() - timedelta(seconds=max_age):
+        return None
+    return row.to_danger_info()
+
+
+def write_danger_snapshot(country_name, city_name, danger_info):
+    """
+    計算した危険度を保存する(同じ場所の行は上書き)
+
+    Args:
+        country_name: 国名
+        city_name: 都市名(オプション)
+        danger_info: calculate_danger_level の結果(recent_news が無い場合は保存済みの記事を残す)
+
+    Returns:
+        dict: computed_at を付けた危険度情報
+    """
+    from app.models import DangerScoreSnapshot
+
+    country, city = snapshot_key(country_name, city_name)
+    now = _utcnow()
+    recent_news = danger_info.get('recent_news')
+    try:
+        if recent_news is None:
+            existing = db.session.get(DangerScoreSnapshot, (country, city))
+            recent_news = json.loads(existing.RecentNews) if existing is not None else []
+        db.session.merge(DangerScoreSnapshot(
+            CountryName=country,
+            CityName=city,
+            BaseScore=danger_info['base_score'],
+            NewsCount=danger_info['news_count'],
+            NewsAdjustment=danger_info['news_adjustment'],
+            Score=danger_info['score'],
+            IsDangerous=danger_info['is_dangerous'],
+            RecentNews=json.dumps(recent_news, ensure_ascii=False),
+            ComputedAt=now
+        ))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"危険度スナップショット保存エラー: {str(e)}")
+
+    return _with_computed_at(dict(danger_info, recent_news=recent_news or []), now)
+
+
+def get_danger_level_snapshot(country_name, city_name=None, fresh=False):
+    """
+    スナップショットから危険度を取得(無い・古すぎる場合はその場で計算して保存)
+    スナップショットが無効な場合は保存せずにその場で計算する
+
+    Args:
+        country_name: 国名
+        city_name: 都市名(オプション)
+        fresh: Trueの場合はスナップショットを使わずに計算し直す
+
+    Returns:
+        dict: calculate_danger_level と同じ形式の危険度情報(computed_at 付き)
+    """
+    if not current_app.config['DANGER_SNAPSHOT_ENABLED']:
+        return _with_computed_at(calculate_danger_level(country_name, city_name), _utcnow())
+
+    if fresh:
+        _count('forced')
+    else:
+        snapshot = read_danger_snapshot(
+            country_name, city_name, current_app.config['DANGER_SNAPSHOT_MAX_AGE'])
+        if snapshot is not None:
+            _count('hits')
+            return snapshot
+        _count('misses')
+
+    danger_info = calculate_danger_level(country_name, city_name)
+    return write_danger_snapshot(country_name, city_name, danger_info)
+
+
+async def get_danger_level_snapshot_async(country_name, city_name=None, fresh=False):
+    """
+    get_danger_level_snapshot の非同期版(ASGIエントリーポイント用)
+
+    Args:
+        country_name: 国名
+        city_name: 都市名(オプション)
+        fresh: Trueの場合はスナップショットを使わずに計算し直す
+
+    Returns:
+        dict: 危険度情報(computed_at 付き)
+    """
+    if not current_app.config['DANGER_SNAPSHOT_ENABLED']:
+        danger_info = await calculate_danger_level_async(country_name, city_name)
+        return _with_computed_at(danger_info, _utcnow())
+
+    if fresh:
+        _count('forced')
+    else:
+        snapshot = await run_sync(
+            read_danger_snapshot, country_name, city_name,
+            current_app.config['DANGER_SNAPSHOT_MAX_AGE'])
+        if snapshot is not None:
+            _count('hits')
+            return snapshot
+        _count('misses')
+
+    danger_info = await calculate_danger_level_async(country_name, city_name)
+    return await run_sync(write_danger_snapshot, country_name, city_name, danger_info)
+
+
+def load_snapshot_news_counts():
+    """
+    保存済みの全ての場所のニュース件数を1回のクエリで読み込む(一括評価用)
+
+    Returns:
+        dict: (国名, 都市名) -> ニュース件数
+    """
+    from app.models import DangerScoreSnapshot
+
+    return {
+        (country, city): count
+        for country, city, count in db.session.query(
+            DangerScoreSnapshot.CountryName,
+            DangerScoreSnapshot.CityName,
+            DangerScoreSnapshot.NewsCount
+        )
+    }
+
+
+def _due_locations(limit):
+    """
+    計算し直す場所を優先度順に選ぶ
+    対象はアクセスのあった場所(アクセス回数の多い順)と保存済みの場所のみで、
+    未保存のアクセス先、更新間隔を過ぎたアクセス先、更新間隔を過ぎたその他の保存済みの場所
+    (古い順)の順に並べる
+
+    Returns:
+        list: (国名, 都市名) のリスト
+    """
+    from app.models import DangerScoreSnapshot
+    from app.services.cache_warmer import get_accessed_destinations
+
+    config = current_app.config
+    computed = {
+        (country, city): computed_at
+        for country, city, computed_at in db.session.query(
+            DangerScoreSnapshot.CountryName,
+            DangerScoreSnapshot.CityName,
+            DangerScoreSnapshot.ComputedAt
+        )
+    }
+    due = _utcnow() - timedelta(seconds=config['DANGER_SNAPSHOT_INTERVAL'])
+
+    missing = []
+    accessed_stale = []
+    seen = set()
+    for country_name, city_name in get_accessed_destinations(config['DANGER_SNAPSHOT_TOP_N']):
+        if not country_name:
+            continue  # 国が分からないアクセス(天気のみなど)は対象外
+        key = snapshot_key(country_name, city_name)
+        if key in seen:
+            continue
+        seen.add(key)
+        computed_at = computed.get(key)
+        if computed_at is None:
+            missing.append(key)
+        elif computed_at <= due:
+            accessed_stale.append(key)
+
+    stale = sorted(
+        (computed_at, key) for key, computed_at in computed.items()
+        if computed_at <= due and key not in seen)
+    return (missing + accessed_stale + [key for _, key in stale])[:limit]
+
+
+def _refresh_location(country_name, city_name):
+    """
+    1か所の危険度を計算し直して保存する
+    NewsAPIには件数のみを問い合わせ、recent_news は保存済みの記事を残す
+    (取り込みモードではデータベースの記事から計算するためNewsAPIは呼ばない)
+
+    Returns:
+        bool: 保存した場合True(件数を取得できなかった場合はFalse)
+    """
+    from app.services.news_service import refresh_news_count
+
+    if current_app.config['NEWS_INGEST_ENABLED']:
+        danger_info = calculate_danger_level(country_name, city_name or None)
+    else:
+        # 先に件数を取得し、上流が使えない場合は件数0で上書きせずに中断する
+        # (取得した件数をそのまま使い、キャッシュに残る古い件数を優先させない)
+        news_count = refresh_news_count(country_name, city_name or None)
+        if news_count is None:
+            return False
+        danger_info = calculate_danger_score(
+            country_name, city_name or None, news_count=news_count)
+    write_danger_snapshot(country_name, city_name, danger_info)
+    return True
+
+
+def refresh_danger_snapshots():
+    """
+    更新間隔を過ぎた場所の危険度を計算し直して保存する
+    1回の件数は DANGER_SNAPSHOT_BATCH_SIZE とバックグラウンド処理が使えるNewsAPIの残り枠の小さい方
+    (アプリケーションコンテキスト内で呼ぶこと)
+
+    Returns:
+        int: 計算し直した場所の数
+    """
+    config = current_app.config
+    limit = config['DANGER_SNAPSHOT_BATCH_SIZE']
+    if not config['NEWS_INGEST_ENABLED']:
+        available = get_available_budget('newsapi', background=True)
+        if available is not None and available < limit:
+            limit = available
+    if limit > 0:
+        locations = _due_locations(limit)
+    else:
+        locations = []
+        _count('skipped_budget')
+        logger.info("NewsAPIの残り枠が無いため危険度の更新をスキップ")
+
+    refreshed = 0
+    errors = 0
+    with background_priority():
+        for country_name, city_name in locations:
+            try:
+                if _refresh_location(country_name, city_name):
+                    refreshed += 1
+                else:
+                    errors += 1
+            except UpstreamUnavailable:
+                db.session.rollback()
+                logger.warning("NewsAPIを呼べないため危険度の更新を中断")
+                break
+            except Exception as e:
+                db.session.rollback()
+                errors += 1
+                logger.error(
+                    f"危険度スナップショット更新エラー ({city_name}, {country_name}): {str(e)}")
+
+    if refreshed:
+        from app.services.danger_board import invalidate_danger_board
+        invalidate_danger_board()
+
+    _count('runs')
+    _count('refreshed', refreshed)
+    _count('errors', errors)
+    with _stats_lock:
+        _stats['last_run_at'] = _utcnow().isoformat()
+
+    logger.info(f"危険度スナップショット更新完了: {refreshed}か所")
+    return refreshed
+
+
+def init_danger_snapshots(app):
+    """
+    設定で有効な場合に危険度スナップショットの更新ジョブを起動する
+
+    Args:
+        app: Flaskアプリケーション
+    """
+    from app.services.scheduler import should_start_background_jobs, start_job
+
+    if not app.config['DANGER_SNAPSHOT_ENABLED']:
+        return
+    if not should_start_background_jobs(app):
+        return
+
+    start_job(
+        app,
+        'danger_snapshot',
+        app.config['DANGER_SNAPSHOT_POLL_INTERVAL'],
+        refresh_danger_snapshots,
+        initial_delay=15
+    )
+
+
+def get_danger_snapshot_stats():
+    """
+    危険度スナップショットの統計情報を取得
+
+    Returns:
+        dict: ヒット・ミス件数、更新回数など
+    """
+    with _stats_lock:
+        return dict(_stats)
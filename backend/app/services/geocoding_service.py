@@ -1,17 +1,77 @@
 """
 位置情報サービス - 緯度経度から都市・国を特定
 """
+import threading
+import time
 import requests
 from flask import current_app
 import logging
 
+from app.services.async_http_client import async_http_client
+from app.services.cache import TTLCache
+from app.services.concurrency import run_sync
+from app.services.http_client import http_client
+from app.services.rate_limiter import UpstreamUnavailable
+from app.services.spatial_index import CityIndex
+
 logger = logging.getLogger(__name__)
 
+# 逆ジオコーディングキャッシュ geohash -> 位置情報(座標を除く)
+_reverse_geocoding_cache = TTLCache('reverse_geocoding', max_size=4096)
+
+_GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode_geohash(latitude, longitude, precision=6):
+    """
+    緯度経度をgeohash文字列に変換
+
+    Args:
+        latitude: 緯度
+        longitude: 経度
+        precision: 文字数(6で約1.2km x 0.6kmのセル)
+
+    Returns:
+        str: geohash
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(geohash) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(geohash)
+
 
 def get_location_from_coordinates(latitude, longitude):
     """
     緯度経度から都市・国情報を取得（逆ジオコーディング）
-    OpenWeather Geocoding APIを使用
+    同じgeohashセル内の座標はキャッシュから返す
 
     Args:
         latitude: 緯度
@@ -25,9 +85,35 @@ def get_location_from_coordinates(latitude, longitude):
             'state': 州/地方名（オプション）
         }
     """
+    cell = encode_geohash(
+        latitude, longitude, current_app.config['GEOCODING_GEOHASH_PRECISION'])
+    try:
+        location = _reverse_geocoding_cache.get_or_load(
+            cell,
+            lambda: _fetch_location_from_coordinates(latitude, longitude),
+            ttl=current_app.config['GEOCODING_CACHE_TTL']
+        )
+    except UpstreamUnavailable:
+        # 利用枠切れ・サーキットオープンの場合は期限切れのキャッシュがあればそれを返す
+        location = _reverse_geocoding_cache.peek(cell)
+
+    if not location:
+        # 上流で特定できない場合は座標が登録済みの都市から最寄りを探す
+        location = _nearest_city_location(latitude, longitude)
+    if not location:
+        return None
+
+    result = dict(location)
+    result['latitude'] = latitude
+    result['longitude'] = longitude
+    return result
+
+
+def _fetch_location_from_coordinates(latitude, longitude):
+    """OpenWeather Geocoding APIで逆ジオコーディング(座標は結果に含めない)"""
     try:
         api_key = current_app.config['OPEN_WEATHER_API_KEY']
-        base_url = "http://api.openweathermap.org/geo/1.0/reverse"
+        base_url = f"{current_app.config['OPEN_WEATHER_GEO_URL']}/reverse"
 
         params = {
             'lat': latitude,
@@ -37,56 +123,134 @@ def get_location_from_coordinates(latitude, longitude):
         }
 
         logger.info(f"逆ジオコーディング: lat={latitude}, lon={longitude}")
-        response = requests.get(base_url, params=params, timeout=10)
+        response = http_client.get(base_url, params=params, upstream='openweather')
         response.raise_for_status()
 
-        data = response.json()
+        return _format_location(response.json())
 
-        if not data or len(data) == 0:
-            logger.warning("位置情報が見つかりませんでした")
-            return None
+    except UpstreamUnavailable:
+        raise
+    except requests.exceptions.RequestException as e:
+        logger.error(f"逆ジオコーディングエラー: {str(e)}")
+        return None
+    except Exception as e:
+        logger.error(f"位置情報取得エラー: {str(e)}")
+        return None
 
-        location = data[0]
 
-        result = {
-            'city': location.get('name', ''),
-            'country': location.get('country', ''),
-            'country_code': location.get('country', ''),
-            'state': location.get('state', ''),
-            'latitude': latitude,
-            'longitude': longitude
-        }
+def _nearest_city_location(latitude, longitude):
+    """空間インデックスの最寄り都市から位置情報を作る(逆ジオコーディングのフォールバック)"""
+    try:
+        city = find_nearest_city(
+            latitude, longitude, current_app.config['GEOCODING_FALLBACK_MAX_DISTANCE_KM'])
+    except Exception as e:
+        logger.error(f"最寄り都市検索エラー: {str(e)}")
+        return None
+    if not city:
+        return None
 
-        logger.info(f"位置特定成功: {result['city']}, {result['country']}")
-        return result
+    return {
+        'city': city['name'],
+        'country': get_country_name_from_code(city['country_code']) or '',
+        'country_code': city['country_code'],
+        'state': ''
+    }
 
-    except requests.exceptions.RequestException as e:
-        logger.error(f"逆ジオコーディングエラー: {str(e)}")
+
+def _format_location(data):
+    """逆ジオコーディングAPIの応答を位置情報に整形(見つからない場合はNone)"""
+    if not data or len(data) == 0:
+        logger.warning("位置情報が見つかりませんでした")
         return None
+
+    location = data[0]
+
+    result = {
+        'city': location.get('name', ''),
+        'country': location.get('country', ''),
+        'country_code': location.get('country', ''),
+        'state': location.get('state', '')
+    }
+
+    logger.info(f"位置特定成功: {result['city']}, {result['country']}")
+    return result
+
+
+async def get_location_from_coordinates_async(latitude, longitude):
+    """
+    get_location_from_coordinates の非同期版(ASGIエントリーポイント用)
+
+    Args:
+        latitude: 緯度
+        longitude: 経度
+
+    Returns:
+        dict: 都市・国情報と緯度経度、特定できない場合はNone
+    """
+    cell = encode_geohash(
+        latitude, longitude, current_app.config['GEOCODING_GEOHASH_PRECISION'])
+    try:
+        location = await _reverse_geocoding_cache.aget_or_load(
+            cell,
+            lambda: _fetch_location_from_coordinates_async(latitude, longitude),
+            ttl=current_app.config['GEOCODING_CACHE_TTL']
+        )
+    except UpstreamUnavailable:
+        # 利用枠切れ・サーキットオープンの場合は期限切れのキャッシュがあればそれを返す
+        location = _reverse_geocoding_cache.peek(cell)
+
+    if not location:
+        location = await run_sync(_nearest_city_location, latitude, longitude)
+    if not location:
+        return None
+
+    result = dict(location)
+    result['latitude'] = latitude
+    result['longitude'] = longitude
+    return result
+
+
+async def _fetch_location_from_coordinates_async(latitude, longitude):
+    """OpenWeather Geocoding APIで非同期に逆ジオコーディング(座標は結果に含めない)"""
+    try:
+        logger.info(f"逆ジオコーディング: lat={latitude}, lon={longitude}")
+        response = await async_http_client.get(
+            f"{current_app.config['OPEN_WEATHER_GEO_URL']}/reverse",
+            params={
+                'lat': latitude,
+                'lon': longitude,
+                'limit': 1,
+                'appid': current_app.config['OPEN_WEATHER_API_KEY']
+            },
+            upstream='openweather'
+        )
+        response.raise_for_status()
+        return _format_location(response.json())
+
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
-        logger.error(f"位置情報取得エラー: {str(e)}")
+        logger.error(f"逆ジオコーディングエラー: {str(e)}")
         return None
 
 
 def get_country_name_from_code(country_code):
     """
-    国コードから国名を取得（データベースから）
+    国コードから国名を取得（国カタログから）
 
     Args:
-        country_code: ISO 3166-1 alpha-2 国コード (例: 'JP', 'US')
+        country_code: ISO 3166-1 alpha-2 または alpha-3 国コード (例: 'JP', 'USA')
 
     Returns:
         str: 国名、見つからない場合はNone
     """
-    from app.models import Country
+    from app.services.country_catalog import get_country_catalog
 
     try:
-        # 2文字コードを3文字コードに変換するマッピング（必要に応じて）
-        # データベースが3文字コードを使用している場合
-        country = Country.query.filter_by(CODE=country_code).first()
+        country = get_country_catalog().by_code(country_code)
 
         if country:
-            return country.NAME
+            return country.name
 
         return None
 
@@ -97,57 +261,191 @@ def get_country_name_from_code(country_code):
 
 # 主要都市の緯度経度マッピング（フォールバック用）
 MAJOR_CITIES = {
-    'Tokyo': {'lat': 35.6762, 'lon': 139.6503, 'country': 'Japan'},
-    'New York': {'lat': 40.7128, 'lon': -74.0060, 'country': 'United States'},
-    'London': {'lat': 51.5074, 'lon': -0.1278, 'country': 'United Kingdom'},
-    'Paris': {'lat': 48.8566, 'lon': 2.3522, 'country': 'France'},
-    'Sydney': {'lat': -33.8688, 'lon': 151.2093, 'country': 'Australia'},
+    'Tokyo': {'lat': 35.6762, 'lon': 139.6503, 'country': 'Japan', 'code': 'JPN'},
+    'New York': {'lat': 40.7128, 'lon': -74.0060, 'country': 'United States', 'code': 'USA'},
+    'London': {'lat': 51.5074, 'lon': -0.1278, 'country': 'United Kingdom', 'code': 'GBR'},
+    'Paris': {'lat': 48.8566, 'lon': 2.3522, 'country': 'France', 'code': 'FRA'},
+    'Sydney': {'lat': -33.8688, 'lon': 151.2093, 'country': 'Australia', 'code': 'AUS'},
 }
 
+# 最寄り都市検索用の空間インデックス(Cityテーブル + MAJOR_CITIES)
+_city_index = None
+# 構築時刻(monotonic)、Noneは次回の検索時に作り直すことを表す
+_city_index_built_at = None
+_city_index_lock = threading.Lock()
+# 都市座標が追加されるたびに増える(構築中に追加された都市を取りこぼさないため)
+_city_index_version = 0
+_city_index_version_lock = threading.Lock()
+
+
+def _load_indexed_cities():
+    """座標が登録済みの都市一覧を取得(主要都市で補完)"""
+    from app.models import City
+
+    rows = City.query.with_entities(
+        City.Name, City.CountryCode, City.Latitude, City.Longitude
+    ).filter(
+        City.Latitude.isnot(None),
+        City.Longitude.isnot(None)
+    ).all()
+
+    cities = [
+        {'name': name, 'country_code': code, 'latitude': lat, 'longitude': lon}
+        for name, code, lat, lon in rows
+    ]
+
+    indexed = {(city['name'], city['country_code']) for city in cities}
+    for city_name, coords in MAJOR_CITIES.items():
+        if (city_name, coords['code']) not in indexed:
+            cities.append({
+                'name': city_name,
+                'country_code': coords['code'],
+                'latitude': coords['lat'],
+                'longitude': coords['lon']
+            })
+
+    return cities
 
-def find_nearest_city(latitude, longitude, max_distance_km=50):
+
+def rebuild_city_index():
+    """
+    Cityテーブルから空間インデックスを作り直す
+
+    Returns:
+        CityIndex: 新しいインデックス
+    """
+    global _city_index, _city_index_built_at
+
+    version = _city_index_version
+    started = time.monotonic()
+    index = CityIndex(_load_indexed_cities())
+    _city_index = index
+    # 読み込み後に都市が追加されていれば次回の検索で作り直す
+    _city_index_built_at = time.monotonic() if version == _city_index_version else None
+    logger.info(
+        f"都市インデックス構築: {len(index)}都市 ({(time.monotonic() - started) * 1000:.1f}ms)")
+    return index
+
+
+def invalidate_city_index():
+    """
+    都市座標の追加・更新後に呼ぶ
+    次回の検索時に空間インデックスを作り直す(構築済みのインデックスはそれまで使い続ける)
+    """
+    global _city_index_version, _city_index_built_at
+
+    with _city_index_version_lock:
+        _city_index_version += 1
+    _city_index_built_at = None
+
+
+def get_city_index():
+    """
+    空間インデックスを取得(未構築・期限切れの場合は再構築)
+
+    Returns:
+        CityIndex: 都市の空間インデックス
+    """
+    index = _city_index
+    built_at = _city_index_built_at
+    if (index is not None and built_at is not None and
+            time.monotonic() - built_at < current_app.config['CITY_INDEX_REBUILD_INTERVAL']):
+        return index
+
+    # 再構築は1スレッドだけが行い、他は既存のインデックスを使う
+    if not _city_index_lock.acquire(blocking=index is None):
+        return index
+    try:
+        if _city_index is not index:
+            return _city_index
+        try:
+            return rebuild_city_index()
+        except Exception as e:
+            logger.error(f"都市インデックス構築エラー: {str(e)}")
+            if index is not None:
+                return index
+            return CityIndex(_load_major_cities())
+    finally:
+        _city_index_lock.release()
+
+
+def _load_major_cities():
+    """主要都市のみの一覧(データベースが使えない場合のフォールバック)"""
+    return [
+        {
+            'name': city_name,
+            'country_code': coords['code'],
+            'latitude': coords['lat'],
+            'longitude': coords['lon']
+        }
+        for city_name, coords in MAJOR_CITIES.items()
+    ]
+
+
+def init_city_index(app):
+    """
+    起動時に空間インデックスを構築する(失敗した場合は初回検索時に再試行)
+
+    Args:
+        app: Flaskアプリケーション
+    """
+    if not app.config['CITY_INDEX_PRELOAD']:
+        return
+    with app.app_context():
+        try:
+            rebuild_city_index()
+        except Exception as e:
+            logger.warning(f"起動時の都市インデックス構築に失敗: {str(e)}")
+
+
+def find_nearest_cities(latitude, longitude, k=5, max_distance_km=None):
     """
-    緯度経度から最も近い主要都市を検索
+    緯度経度から近い順に k 件の都市を検索
 
     Args:
         latitude: 緯度
         longitude: 経度
-        max_distance_km: 最大検索距離（km）
+        k: 取得件数
+        max_distance_km: 最大検索距離（km）、省略時は無制限
 
     Returns:
-        str: 都市名、見つからない場合はNone
+        list: {'name', 'country_code', 'latitude', 'longitude', 'distance_km'} のリスト
     """
-    import math
+    return get_city_index().nearest(latitude, longitude, k, max_distance_km)
 
-    def calculate_distance(lat1, lon1, lat2, lon2):
-        """2点間の距離を計算（Haversine formula）"""
-        R = 6371  # 地球の半径（km）
 
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lon = math.radians(lon2 - lon1)
+def find_cities_within(latitude, longitude, radius_km):
+    """
+    緯度経度から指定半径内の都市を近い順に検索
 
-        a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * \
-            math.cos(lat2_rad) * math.sin(delta_lon/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    Args:
+        latitude: 緯度
+        longitude: 経度
+        radius_km: 検索半径（km）
 
-        return R * c
+    Returns:
+        list: {'name', 'country_code', 'latitude', 'longitude', 'distance_km'} のリスト
+    """
+    return get_city_index().within(latitude, longitude, radius_km)
 
-    nearest_city = None
-    min_distance = float('inf')
 
-    for city_name, coords in MAJOR_CITIES.items():
-        distance = calculate_distance(
-            latitude, longitude,
-            coords['lat'], coords['lon']
-        )
+def find_nearest_city(latitude, longitude, max_distance_km=50):
+    """
+    緯度経度から最も近い都市を検索
 
-        if distance < min_distance and distance <= max_distance_km:
-            min_distance = distance
-            nearest_city = city_name
+    Args:
+        latitude: 緯度
+        longitude: 経度
+        max_distance_km: 最大検索距離（km）
 
-    if nearest_city:
-        logger.info(f"最寄り都市: {nearest_city} (距離: {min_distance:.2f}km)")
+    Returns:
+        dict: {'name', 'country_code', 'latitude', 'longitude', 'distance_km'}、
+              見つからない場合はNone
+    """
+    nearest = find_nearest_cities(latitude, longitude, 1, max_distance_km)
+    if not nearest:
+        return None
 
-    return nearest_city
+    city = nearest[0]
+    logger.info(f"最寄り都市: {city['name']} (距離: {city['distance_km']:.2f}km)")
+    return city
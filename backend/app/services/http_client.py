@@ -0,0 +1,161 @@
+"""
+外部API呼び出し用の共有HTTPクライアント
+"""
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+import logging
+
+from app.services.circuit_breaker import get_breaker
+from app.services.rate_limiter import acquire_budget
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """
+    接続プール付きの共有HTTPクライアント
+
+    requests.Session を1つ共有し、上流ホストごとにkeep-alive接続を再利用する。
+    create_app() から init_app(app) で設定を読み込む。
+    """
+
+    def __init__(self):
+        self._session = None
+        self._lock = threading.Lock()
+        self.connect_timeout = 3.05
+        self.read_timeout = 10
+        self.pool_connections = 10
+        self.pool_maxsize = 20
+        self.pool_block = True
+
+    def init_app(self, app):
+        """アプリケーション設定からプールサイズ・タイムアウトを読み込む"""
+        self.connect_timeout = app.config['HTTP_CONNECT_TIMEOUT']
+        self.read_timeout = app.config['HTTP_READ_TIMEOUT']
+        self.pool_connections = app.config['HTTP_POOL_CONNECTIONS']
+        self.pool_maxsize = app.config['HTTP_POOL_MAXSIZE']
+        self.pool_block = app.config['HTTP_POOL_BLOCK']
+
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = self._create_session()
+
+        app.extensions['http_client'] = self
+
+    def _create_session(self):
+        """接続プールを設定したSessionを作成"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=0
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @property
+    def session(self):
+        """共有Session(未初期化の場合はデフォルト設定で作成)"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def get(self, url, params=None, timeout=None, upstream=None, **kwargs):
+        """
+        GETリクエストを送信
+        upstream を指定した場合はサーキットブレーカーと利用枠を確認してから送信し、
+        結果をサーキットブレーカーに記録する
+
+        Args:
+            url: リクエストURL
+            params: クエリパラメータ
+            timeout: (接続, 読み込み)タイムアウト。省略時は設定値
+            upstream: 上流名('newsapi' または 'openweather')
+
+        Returns:
+            requests.Response: レスポンス
+
+        Raises:
+            CircuitOpen: サーキットが開いている場合
+            BudgetExhausted: 利用枠が残っていない場合
+        """
+        if timeout is None:
+            timeout = (self.connect_timeout, self.read_timeout)
+        if upstream is None:
+            return self.session.get(url, params=params, timeout=timeout, **kwargs)
+
+        breaker = before_upstream_call(upstream)
+        try:
+            response = self.session.get(url, params=params, timeout=timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            record_upstream_failure(breaker)
+            raise
+        except BaseException:
+            release_upstream_call(breaker)
+            raise
+
+        record_upstream_response(breaker, response.status_code)
+        return response
+
+
+def before_upstream_call(upstream):
+    """
+    上流を呼ぶ前にサーキットブレーカーと利用枠を確認する
+    (同期・非同期クライアント共通)
+
+    Args:
+        upstream: 上流名
+
+    Returns:
+        CircuitBreaker: 上流のサーキットブレーカー(未設定の場合はNone)
+
+    Raises:
+        CircuitOpen: サーキットが開いている場合
+        BudgetExhausted: 利用枠が残っていない場合
+    """
+    breaker = get_breaker(upstream)
+    if breaker is not None:
+        breaker.before_call()
+    try:
+        acquire_budget(upstream)
+    except Exception:
+        if breaker is not None:
+            breaker.release()
+        raise
+    return breaker
+
+
+def release_upstream_call(breaker):
+    """
+    上流の障害ではない例外(想定外のエラー・キャンセルなど)で結果を記録できなかった場合に
+    ハーフオープンの試行枠を戻す(戻さないとサーキットが閉じられなくなる)
+    """
+    if breaker is not None:
+        breaker.release()
+
+
+def record_upstream_failure(breaker):
+    """接続エラー・タイムアウトをサーキットブレーカーに記録する"""
+    if breaker is not None:
+        breaker.record_failure()
+
+
+def record_upstream_response(breaker, status_code):
+    """レスポンスのステータスコードをサーキットブレーカーに記録する"""
+    if breaker is None:
+        return
+    # 5xxとレート制限(429)は上流の障害として数える
+    if status_code >= 500 or status_code == 429:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+
+# アプリケーション全体で共有するインスタンス
+http_client = HttpClient()
@@ -0,0 +1,93 @@
+"""
+キーワード照合 - カテゴリ付きキーワードを1つの正規表現にまとめて一括判定する
+"""
+import bisect
+import re
+from collections import Counter
+
+# キーワードの後ろに付いてよい語尾(複数形・過去形・進行形)
+DEFAULT_SUFFIXES = ('s', 'es', 'ed', 'ing')
+
+
+class KeywordMatcher:
+    """
+    カテゴリごとのキーワードを名前付きグループの選択で1つの正規表現にコンパイルし、
+    1回の走査でカテゴリ別のヒット数を数える
+
+    キーワードは単語単位で一致し、suffixes の語尾のみ許す
+    ('attack' は 'attacks', 'attacked' に一致し、'crime' は 'Crimea' に一致しない)。
+    大文字・小文字は区別しない。
+    """
+
+    def __init__(self, categories, suffixes=DEFAULT_SUFFIXES):
+        """
+        Args:
+            categories: カテゴリ名 -> キーワードのリスト
+                (カテゴリ名は正規表現のグループ名に使える識別子であること)
+            suffixes: キーワードの後ろに付いてよい語尾
+        """
+        self.categories = {name: list(keywords) for name, keywords in categories.items()}
+
+        alternatives = []
+        for name, keywords in self.categories.items():
+            if not keywords:
+                continue
+            # 長いキーワードを先に試して、短いキーワードの部分一致を避ける
+            words = sorted(set(k.lower() for k in keywords), key=len, reverse=True)
+            alternatives.append(
+                f"(?P<{name}>" + '|'.join(map(re.escape, words)) + ')')
+
+        suffix = '(?:' + '|'.join(map(re.escape, suffixes)) + ')?' if suffixes else ''
+        self._pattern = re.compile(
+            r'\b(?:' + '|'.join(alternatives) + ')' + suffix + r'\b', re.IGNORECASE
+        ) if alternatives else None
+
+    def count(self, text):
+        """
+        テキスト中のカテゴリ別ヒット数を数える
+
+        Args:
+            text: 対象テキスト
+
+        Returns:
+            Counter: カテゴリ名 -> ヒット数
+        """
+        if self._pattern is None or not text:
+            return Counter()
+        return Counter(match.lastgroup for match in self._pattern.finditer(text))
+
+    def search(self, text):
+        """テキストがいずれかのキーワードを含むか判定"""
+        return bool(text) and self._pattern is not None and self._pattern.search(text) is not None
+
+    def count_batch(self, texts):
+        """
+        複数のテキストを連結して1回で走査し、テキストごとのヒット数を数える
+
+        Args:
+            texts: テキストのリスト
+
+        Returns:
+            list: テキストごとの Counter(カテゴリ名 -> ヒット数)
+        """
+        results = [Counter() for _ in texts]
+        if self._pattern is None or not texts:
+            return results
+
+        # 各テキストの開始位置を記録し、ヒット位置からテキストを特定する
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+        joined = '\n'.join(texts)
+
+        for match in self._pattern.finditer(joined):
+            index = bisect.bisect_right(starts, match.start()) - 1
+            results[index][match.lastgroup] += 1
+        return results
+
+
+def article_text(article):
+    """記事の照合対象テキスト(タイトル・概要)"""
+    return f"{article.get('title') or ''} {article.get('description') or ''}"
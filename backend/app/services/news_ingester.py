@@ -0,0 +1,498 @@
+"""
+ニュース取り込みサービス - 追跡中の場所の新着記事をバックグラウンドで保存する
+"""
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+import logging
+
+from app.extensions import db
+from app.services.http_client import http_client
+from app.services.rate_limiter import UpstreamUnavailable, background_priority
+
+logger = logging.getLogger(__name__)
+
+_stats = {
+    'runs': 0,
+    'locations_polled': 0,
+    'articles_added': 0,
+    'pages_fetched': 0,
+    'truncated': 0,
+    'expired': 0,
+    'errors': 0,
+    'last_run_at': None
+}
+_stats_lock = threading.Lock()
+
+# 起動後に保存済み記事の危険判定を付け直したか
+_rescored = False
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def _utcnow():
+    """タイムゾーンなしのUTC現在時刻(publishedAtと揃える)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _normalize_name(name):
+    """保存用に国名・都市名の空白を正規化"""
+    return ' '.join((name or '').split())
+
+
+def _parse_published_at(value):
+    """NewsAPIのpublishedAt(ISO 8601)をUTCのdatetimeに変換"""
+    try:
+        published = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if published.tzinfo is not None:
+        published = published.astimezone(timezone.utc).replace(tzinfo=None)
+    return published
+
+
+def _resolve_location(country_name, city_name=None):
+    """
+    国名・都市名を国カタログ・危険度データの正式名称にする
+    リクエストの任意の文字列で取り込み対象が増えないよう、どちらでも引けない場所は対象外にする
+    (都市は危険度データに登録されている都市のみ)
+
+    Returns:
+        tuple: (国名, 都市名)、対象外の場合はNone
+    """
+    from app.services.country_catalog import get_country_catalog
+    from app.services.danger_scores import get_danger_index
+
+    country_name = _normalize_name(country_name)
+    city_name = _normalize_name(city_name)
+    if not country_name:
+        return None
+
+    country = get_country_catalog().by_name(country_name)
+    indexed = get_danger_index().lookup(country_name, city_name or None)
+    if country is None and indexed is None:
+        return None
+    if city_name:
+        if indexed is None or indexed[2] is None:
+            return None
+        city_name = indexed[2]
+    return (country.name if country else indexed[1]), city_name
+
+
+def track_location(country_name, city_name=None):
+    """
+    場所を取り込み対象に登録する(登録済み・対象外の場所なら何もしない)
+
+    Args:
+        country_name: 国名
+        city_name: 都市名(オプション)
+    """
+    from app.models import NewsIngestState
+
+    location = _resolve_location(country_name, city_name)
+    if location is None:
+        return
+    country, city = location
+
+    try:
+        if db.session.get(NewsIngestState, (country, city)) is None:
+            now = _utcnow()
+            db.session.add(NewsIngestState(
+                CountryName=country, CityName=city, CreatedAt=now, LastReadAt=now))
+            db.session.commit()
+            logger.info(f"ニュース取り込み対象に追加: {city or '-'}, {country}")
+    except IntegrityError:
+        # 他のワーカーが同時に登録した場合
+        db.session.rollback()
+
+
+def _mark_read(state):
+    """
+    最後に読まれた日時を記録する(読まれなくなった場所を取り込み対象から外す判定用)
+    書き込みを減らすため、前回の記録から NEWS_INGEST_INTERVAL 以上経った場合のみ更新する
+    """
+    now = _utcnow()
+    interval = timedelta(seconds=current_app.config['NEWS_INGEST_INTERVAL'])
+    if state.LastReadAt is not None and now - state.LastReadAt < interval:
+        return
+    try:
+        state.LastReadAt = now
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"ニュース取り込み対象の参照日時の保存エラー: {str(e)}")
+
+
+def read_stored_news(country_name, city_name=None, days=7, danger_only=False,
+                     limit=10):
+    """
+    取り込み済みの記事をデータベースから読み込む
+    未登録の場所は取り込み対象に登録し、Noneを返す(呼び出し側でNewsAPIにフォールバック)
+
+    Args:
+        country_name: 国名
+        city_name: 都市名(オプション)
+        days: 過去何日分の記事を返すか
+        danger_only: 危険関連の記事のみ返す場合True
+        limit: 最大件数
+
+    Returns:
+        list: 新しい順の記事リスト、まだ取り込まれていない・対象外の場所の場合はNone
+    """
+    from app.models import NewsArticle, NewsIngestState
+
+    location = _resolve_location(country_name, city_name)
+    if location is None:
+        return None
+    country, city = location
+
+    state = db.session.get(NewsIngestState, location)
+    if state is None:
+        track_location(country, city)
+        return None
+    _mark_read(state)
+    if state.LastPolledAt is None:
+        return None
+
+    query = NewsArticle.query.filter(
+        NewsArticle.CountryName == country,
+        NewsArticle.CityName == city,
+        NewsArticle.PublishedAt >= _utcnow() - timedelta(days=days)
+    )
+    if danger_only:
+        query = query.filter(NewsArticle.IsDanger.is_(True))
+
+    articles = query.order_by(NewsArticle.PublishedAt.desc()).limit(limit).all()
+    return [article.to_dict(include_image=not danger_only) for article in articles]
+
+
+def count_stored_danger_news(days=7):
+    """
+    取り込み済みの全ての場所について危険関連の記事数を1回のクエリで数える(一括評価用)
+
+    Args:
+        days: 過去何日分の記事を数えるか
+
+    Returns:
+        dict: (国名, 都市名) -> 記事数(取り込み済みで記事が無い場所は0)
+    """
+    from app.models import NewsArticle, NewsIngestState
+
+    counts = {
+        (country, city): 0
+        for country, city in db.session.query(
+            NewsIngestState.CountryName, NewsIngestState.CityName
+        ).filter(NewsIngestState.LastPolledAt.isnot(None))
+    }
+
+    rows = db.session.query(
+        NewsArticle.CountryName, NewsArticle.CityName, db.func.count(NewsArticle.ID)
+    ).filter(
+        NewsArticle.IsDanger.is_(True),
+        NewsArticle.PublishedAt >= _utcnow() - timedelta(days=days)
+    ).group_by(NewsArticle.CountryName, NewsArticle.CityName)
+
+    for country, city, count in rows:
+        if (country, city) in counts:
+            counts[(country, city)] = count
+    return counts
+
+
+def _fetch_articles_since(country_name, city_name, since, until=None):
+    """
+    NewsAPIから指定期間の記事を新しい順に1ページ取得(失敗時は例外を送出)
+
+    Returns:
+        tuple: (記事のリスト, 期間内の記事の総数 totalResults)
+    """
+    location_query = f'"{city_name}" AND "{country_name}"' if city_name else f'"{country_name}"'
+
+    params = {
+        'q': location_query,
+        'from': since.strftime('%Y-%m-%dT%H:%M:%S'),
+        'sortBy': 'publishedAt',
+        'language': 'en',
+        'pageSize': current_app.config['NEWS_INGEST_PAGE_SIZE'],
+        'apiKey': current_app.config['NEWS_API_KEY']
+    }
+    if until is not None:
+        params['to'] = until.strftime('%Y-%m-%dT%H:%M:%S')
+
+    response = http_client.get(
+        current_app.config['NEWS_API_URL'], params=params, upstream='newsapi')
+    response.raise_for_status()
+    data = response.json()
+    _count('pages_fetched')
+    return data.get('articles', []), data.get('totalResults') or 0
+
+
+def ingest_location(state):
+    """
+    1つの場所について前回以降の新着記事を取り込む
+
+    記事は新しい順に返るため、ページが埋まっている間は取得済みの最も古い記事の日時を
+    上限(to)にして前回の位置まで遡る(1回の最大ページ数は NEWS_INGEST_MAX_PAGES)。
+    前回の位置まで取り切れなかった場合は取り込み位置を進めず、次回も同じ位置から取り込む
+    (取り込み済みの記事はURLで重複を除く)。
+
+    Args:
+        state: NewsIngestState
+
+    Returns:
+        int: 追加した記事数
+    """
+    from app.models import NewsArticle
+    from app.services.news_service import classify_articles
+
+    config = current_app.config
+    now = _utcnow()
+    lookback = timedelta(days=config['NEWS_INGEST_LOOKBACK_DAYS'])
+    since = state.LastPublishedAt + timedelta(seconds=1) if state.LastPublishedAt else now - lookback
+
+    candidates = {}
+    complete = False
+    until = None
+    for _ in range(max(1, config['NEWS_INGEST_MAX_PAGES'])):
+        raw_articles, total = _fetch_articles_since(
+            state.CountryName, state.CityName, since, until)
+
+        oldest = None
+        for raw in raw_articles:
+            url = raw.get('url')
+            published_at = _parse_published_at(raw.get('publishedAt'))
+            if not url or published_at is None:
+                continue
+            url_hash = hashlib.sha1(url.encode('utf-8')).hexdigest()
+            article = {
+                'title': raw.get('title') or '',
+                'description': raw.get('description') or '',
+                'url': url,
+                'source': (raw.get('source') or {}).get('name', ''),
+                'urlToImage': raw.get('urlToImage') or ''
+            }
+            candidates[url_hash] = (article, published_at)
+            if oldest is None or published_at < oldest:
+                oldest = published_at
+
+        # ページが埋まっていない・期間内の記事を全て受け取った・前回の位置に達した場合は完了
+        if len(raw_articles) < config['NEWS_INGEST_PAGE_SIZE'] or len(raw_articles) >= total \
+                or oldest is None or oldest <= since:
+            complete = True
+            break
+        # 同じ日時の記事だけでページが埋まっている場合はそれ以上遡れない
+        if until is not None and oldest >= until:
+            break
+        until = oldest
+
+    existing = set()
+    if candidates:
+        existing = {
+            url_hash for (url_hash,) in NewsArticle.query.with_entities(
+                NewsArticle.UrlHash
+            ).filter(
+                NewsArticle.CountryName == state.CountryName,
+                NewsArticle.CityName == state.CityName,
+                NewsArticle.UrlHash.in_(list(candidates))
+            )
+        }
+
+    new_hashes = [h for h in candidates if h not in existing]
+    categories = classify_articles([candidates[h][0] for h in new_hashes])
+
+    added = 0
+    for url_hash, article_categories in zip(new_hashes, categories):
+        article, published_at = candidates[url_hash]
+        db.session.add(NewsArticle(
+            CountryName=state.CountryName,
+            CityName=state.CityName,
+            UrlHash=url_hash,
+            Url=article['url'],
+            Title=article['title'],
+            Description=article['description'],
+            Source=article['source'],
+            UrlToImage=article['urlToImage'],
+            PublishedAt=published_at,
+            IsDanger=bool(article_categories),
+            FetchedAt=now
+        ))
+        added += 1
+
+    if not complete:
+        _count('truncated')
+        logger.warning(
+            f"ニュース取り込みを{config['NEWS_INGEST_MAX_PAGES']}ページで打ち切り、"
+            f"次回も同じ位置から取り込みます ({state.CityName or '-'}, {state.CountryName})")
+    elif candidates:
+        latest = max(published_at for _, published_at in candidates.values())
+        if state.LastPublishedAt is None or latest > state.LastPublishedAt:
+            state.LastPublishedAt = latest
+    state.LastPolledAt = now
+    db.session.commit()
+    return added
+
+
+def rescore_stored_articles(batch_size=1000):
+    """
+    保存済みの全記事の危険判定(IsDanger)を現在のキーワードで付け直す
+    キーワードを変更した後に使う。記事はまとめて1回の走査で判定する
+
+    Args:
+        batch_size: 1回に読み込む記事数
+
+    Returns:
+        int: 判定が変わった記事数
+    """
+    from app.models import NewsArticle
+    from app.services.news_service import classify_articles
+
+    changed = 0
+    last_id = 0
+    while True:
+        articles = NewsArticle.query.filter(
+            NewsArticle.ID > last_id
+        ).order_by(NewsArticle.ID).limit(batch_size).all()
+        if not articles:
+            break
+
+        counts = classify_articles([
+            {'title': a.Title, 'description': a.Description} for a in articles
+        ])
+        for article, categories in zip(articles, counts):
+            is_danger = bool(categories)
+            if article.IsDanger != is_danger:
+                article.IsDanger = is_danger
+                changed += 1
+        db.session.commit()
+        last_id = articles[-1].ID
+
+    logger.info(f"保存済み記事の危険判定を更新: {changed}件")
+    return changed
+
+
+def expire_idle_locations(now=None):
+    """
+    NEWS_INGEST_IDLE_DAYS 以上読まれていない場所を取り込み対象から外し、保存済みの記事も削除する
+    (再び読まれた場合は read_stored_news で登録し直される)
+
+    Returns:
+        int: 取り込み対象から外した場所の数
+    """
+    from app.models import NewsArticle, NewsIngestState
+
+    now = now or _utcnow()
+    idle_since = now - timedelta(days=current_app.config['NEWS_INGEST_IDLE_DAYS'])
+    expired = NewsIngestState.query.filter(
+        db.func.coalesce(NewsIngestState.LastReadAt, NewsIngestState.CreatedAt) < idle_since
+    ).all()
+
+    for state in expired:
+        NewsArticle.query.filter(
+            NewsArticle.CountryName == state.CountryName,
+            NewsArticle.CityName == state.CityName
+        ).delete(synchronize_session=False)
+        db.session.delete(state)
+        logger.info(f"ニュース取り込み対象から除外: {state.CityName or '-'}, {state.CountryName}")
+    db.session.commit()
+
+    _count('expired', len(expired))
+    return len(expired)
+
+
+def run_ingestion():
+    """
+    ポーリング間隔を過ぎた場所から順に新着記事を取り込む
+    (アプリケーションコンテキスト内で呼ぶこと)
+    """
+    from app.models import NewsArticle, NewsIngestState
+
+    config = current_app.config
+    now = _utcnow()
+    due = now - timedelta(seconds=config['NEWS_INGEST_INTERVAL'])
+
+    # 読まれなくなった場所はポーリングしない
+    expire_idle_locations(now)
+
+    states = NewsIngestState.query.filter(
+        db.or_(NewsIngestState.LastPolledAt.is_(None),
+               NewsIngestState.LastPolledAt <= due)
+    ).order_by(
+        NewsIngestState.LastPolledAt.asc()
+    ).limit(config['NEWS_INGEST_BATCH_SIZE']).all()
+
+    # 起動後の初回はキーワードの変更を反映するため保存済み記事を判定し直す
+    global _rescored
+    if not _rescored:
+        rescore_stored_articles()
+        _rescored = True
+
+    polled = 0
+    added = 0
+    errors = 0
+    with background_priority():
+        for state in states:
+            try:
+                added += ingest_location(state)
+                polled += 1
+            except UpstreamUnavailable:
+                db.session.rollback()
+                logger.warning("NewsAPIを呼べないため取り込みを中断")
+                break
+            except Exception as e:
+                db.session.rollback()
+                errors += 1
+                logger.error(
+                    f"ニュース取り込みエラー ({state.CityName}, {state.CountryName}): {str(e)}")
+
+    # 保存期間を過ぎた記事を削除
+    retention = timedelta(days=config['NEWS_INGEST_RETENTION_DAYS'])
+    NewsArticle.query.filter(NewsArticle.PublishedAt < now - retention).delete(
+        synchronize_session=False)
+    db.session.commit()
+
+    with _stats_lock:
+        _stats['runs'] += 1
+        _stats['locations_polled'] += polled
+        _stats['articles_added'] += added
+        _stats['errors'] += errors
+        _stats['last_run_at'] = now.isoformat()
+
+    logger.info(f"ニュース取り込み完了: {polled}か所, 追加{added}件")
+
+
+def init_news_ingester(app):
+    """
+    設定で有効な場合にニュース取り込みジョブを起動する
+
+    Args:
+        app: Flaskアプリケーション
+    """
+    from app.services.scheduler import should_start_background_jobs, start_job
+
+    if not app.config['NEWS_INGEST_ENABLED']:
+        return
+    if not should_start_background_jobs(app):
+        return
+
+    start_job(
+        app,
+        'news_ingester',
+        app.config['NEWS_INGEST_POLL_INTERVAL'],
+        run_ingestion,
+        initial_delay=10
+    )
+
+
+def get_news_ingester_stats():
+    """
+    ニュース取り込みの統計情報を取得
+
+    Returns:
+        dict: 実行回数・取り込み件数など
+    """
+    with _stats_lock:
+        return dict(_stats)
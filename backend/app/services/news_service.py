@@ -1,18 +1,236 @@
 """
 ニュース取得サービス
 """
+import hashlib
+import json
+import threading
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from flask import current_app
 import logging
 
+from app.extensions import db
+from app.services.async_http_client import async_http_client
+from app.services.cache import Expiring, TTLCache
+from app.services.cache_warmer import record_access
+from app.services.concurrency import run_sync
+from app.services.http_client import http_client
+from app.services.keyword_matcher import KeywordMatcher, article_text
+from app.services.news_ingester import read_stored_news
+from app.services.rate_limiter import UpstreamUnavailable
+from app.services.singleflight import AsyncSingleFlight, SingleFlight
+
 logger = logging.getLogger(__name__)
 
+# ニュースキャッシュ(1段目: プロセス内LRU、2段目: news_cacheテーブル)
+# キー: (種別, 国名, 都市名, 日数, 日付バケット) -> 整形済み記事リスト
+_news_cache = TTLCache('news')
+
+# 危険関連ニュースの件数キャッシュ キー: _news_key('danger_count', ...) -> 件数
+_news_count_cache = TTLCache('news_count', max_size=2048)
+
+# 同じ場所への同時リクエストを1回のNewsAPI呼び出しにまとめる
+_news_flight = SingleFlight('news')
+
+# 危険関連ニュースのキーワード: 犯罪、テロ、危険関連
+# NewsAPIの検索とローカル分類の両方でこのカテゴリ分けを使う
+# (ローカル分類は語尾変化 attacks, murdered なども含む)
+DANGER_KEYWORD_CATEGORIES = {
+    'crime': ['crime', 'murder', 'assault'],
+    'terrorism': ['terrorism'],
+    'violence': ['violence', 'attack']
+}
+
+# NewsAPIの検索キーワード
+DANGER_KEYWORDS = [
+    keyword for keywords in DANGER_KEYWORD_CATEGORIES.values() for keyword in keywords
+]
+
+# 危険関連ニュースとして返す最大件数(件数のみの取得もこの値で打ち切る)
+DANGER_NEWS_LIMIT = 5
+
+_danger_matcher = KeywordMatcher(DANGER_KEYWORD_CATEGORIES)
+
+_store_stats = {'hits': 0, 'misses': 0, 'writes': 0, 'errors': 0}
+_store_stats_lock = threading.Lock()
+
+
+def _location_key(country_name, city_name):
+    """キャッシュ・シングルフライト用に国名・都市名を正規化"""
+    return (
+        ' '.join((country_name or '').split()).casefold(),
+        ' '.join((city_name or '').split()).casefold()
+    )
+
+
+def _news_key(kind, country_name, city_name, days):
+    """ニュースキャッシュのキー(日付が変わると別キーになる)"""
+    bucket = datetime.now().strftime('%Y-%m-%d')
+    return (kind,) + _location_key(country_name, city_name) + (days, bucket)
+
+
+def _store_key(key):
+    """
+    永続キャッシュの行キー(CacheKey列は255文字まで)
+    国名・都市名はリクエストの文字列そのままなので、長さによらず収まるようハッシュにする
+    """
+    raw = json.dumps(key, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _count_store(name):
+    with _store_stats_lock:
+        _store_stats[name] += 1
+
+
+def _read_store(key):
+    """
+    永続キャッシュから記事リストを読み込む
+
+    Returns:
+        Expiring: 記事リストと残り秒数、無い・期限切れの場合はNone
+    """
+    from app.models import NewsCacheEntry
+
+    try:
+        entry = db.session.get(NewsCacheEntry, _store_key(key))
+        if entry is None or entry.ExpiresAt <= datetime.now():
+            _count_store('misses')
+            return None
+        remaining = (entry.ExpiresAt - datetime.now()).total_seconds()
+        _count_store('hits')
+        return Expiring(json.loads(entry.Payload), remaining)
+    except Exception as e:
+        db.session.rollback()
+        _count_store('errors')
+        logger.warning(f"ニュースキャッシュ読み込みエラー: {str(e)}")
+        return None
+
+
+def _write_store(key, articles, ttl):
+    """記事リストを永続キャッシュに保存し、期限切れの行を削除する"""
+    from app.models import NewsCacheEntry
+
+    try:
+        now = datetime.now()
+        db.session.merge(NewsCacheEntry(
+            CacheKey=_store_key(key),
+            Payload=json.dumps(articles, ensure_ascii=False),
+            CreatedAt=now,
+            ExpiresAt=now + timedelta(seconds=ttl)
+        ))
+        NewsCacheEntry.query.filter(NewsCacheEntry.ExpiresAt <= now).delete(
+            synchronize_session=False)
+        db.session.commit()
+        _count_store('writes')
+    except Exception as e:
+        db.session.rollback()
+        _count_store('errors')
+        logger.warning(f"ニュースキャッシュ保存エラー: {str(e)}")
+
+
+def _news_loader(app, key, fetch, use_store=True):
+    """
+    メモリキャッシュのミス時にニュースを取得する関数を返す
+    永続キャッシュを確認し、無ければNewsAPIから取得して保存する
+    """
+    def load():
+        with app.app_context():
+            if use_store:
+                stored = _read_store(key)
+                if stored is not None:
+                    return stored
+            articles = _news_flight.do(key, fetch)
+            if articles is not None:
+                _write_store(key, articles, app.config['NEWS_CACHE_TTL'])
+            return articles
+
+    return load
+
+
+def _get_cached_news(key, fetch):
+    """キャッシュ経由でニュースを取得(取得失敗時は空リスト)"""
+    app = current_app._get_current_object()
+    try:
+        articles = _news_cache.get_or_load(
+            key,
+            _news_loader(app, key, fetch),
+            ttl=app.config['NEWS_CACHE_TTL'],
+            stale_ttl=app.config['NEWS_CACHE_STALE_TTL']
+        )
+    except UpstreamUnavailable:
+        # 利用枠切れ・サーキットオープンの場合は期限切れのキャッシュがあればそれを返す
+        articles = _news_cache.peek(key)
+    return articles if articles is not None else []
+
+
+def is_danger_article(article):
+    """
+    記事が危険関連キーワードを含むか判定(タイトル・概要を対象)
+
+    Args:
+        article: 整形済みの記事
+
+    Returns:
+        bool: 危険関連の記事ならTrue
+    """
+    return _danger_matcher.search(article_text(article))
+
+
+def classify_articles(articles):
+    """
+    複数の記事の危険関連キーワードを1回の走査でカテゴリ別に数える
+
+    Args:
+        articles: 整形済みの記事のリスト
+
+    Returns:
+        list: 記事ごとの {カテゴリ名: ヒット数}(ヒットが無いカテゴリは含まない)
+    """
+    counts = _danger_matcher.count_batch([article_text(a) for a in articles])
+    return [dict(c) for c in counts]
+
+
+def _unified_window(days):
+    """
+    統合取得で上流から取得する日数
+    危険関連ニュース(7日)と一般ニュース(days日)が同じキャッシュキーを共有するよう
+    NEWS_UNIFIED_DAYS 以下の期間は同じ広い期間で取得する
+    """
+    return max(days, current_app.config['NEWS_UNIFIED_DAYS'])
+
+
+def _filter_recent(articles, days, window):
+    """
+    広い期間で取得した記事を過去 days 日分(NewsAPIの from と同じ日付単位)に絞り込む
+    publishedAt はUTCなので、比較する日付もUTCで求める
+    """
+    if days >= window:
+        return articles
+    from_date = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d')
+    return [a for a in articles if (a.get('publishedAt') or '')[:10] >= from_date]
+
+
+def _get_unified_news(country_name, city_name, days):
+    """
+    場所の一般ニュースを1回の広いクエリで取得(統合取得モード用)
+    危険関連ニュースと一般ニュースの両方をこの結果から返す
+    """
+    page_size = current_app.config['NEWS_UNIFIED_PAGE_SIZE']
+    window = _unified_window(days)
+    articles = _get_cached_news(
+        _news_key('all', country_name, city_name, window),
+        lambda: _fetch_general_news(country_name, city_name, window, page_size)
+    )
+    return _filter_recent(articles, days, window)
+
 
 def get_news_by_location(country_name, city_name=None):
     """
     指定された場所(国・都市)の危険に関するニュースを取得
     過去1週間以内のニュースを検索
+    統合取得モード(NEWS_UNIFIED_FETCH)では一般ニュースから危険関連の記事を抽出する
+    取り込みモード(NEWS_INGEST_ENABLED)では取り込み済みの記事をデータベースから読む
 
     Args:
         country_name: 国名
@@ -21,60 +239,276 @@ def get_news_by_location(country_name, city_name=None):
     Returns:
         list: ニュース記事のリスト
     """
+    record_access(country_name, city_name)
+    if current_app.config['NEWS_INGEST_ENABLED']:
+        stored = read_stored_news(
+            country_name, city_name, days=7, danger_only=True, limit=DANGER_NEWS_LIMIT)
+        if stored is not None:
+            return stored
+
+    if current_app.config['NEWS_UNIFIED_FETCH']:
+        articles = _get_unified_news(country_name, city_name, 7)
+        return [
+            {k: v for k, v in article.items() if k != 'urlToImage'}
+            for article in articles if is_danger_article(article)
+        ][:DANGER_NEWS_LIMIT]
+
+    return _get_cached_news(
+        _news_key('danger', country_name, city_name, 7),
+        lambda: _fetch_news_by_location(country_name, city_name)
+    )
+
+
+def refresh_news_by_location(country_name, city_name=None, min_remaining=0):
+    """
+    危険関連ニュースを上流から取得し直してキャッシュを更新(キャッシュウォーマー用)
+
+    Args:
+        country_name: 国名
+        city_name: 都市名(オプション)
+        min_remaining: キャッシュの残りTTLがこの秒数以上なら取得しない
+
+    Returns:
+        bool: 上流から取得した場合True
+    """
+    if current_app.config['NEWS_UNIFIED_FETCH']:
+        window = _unified_window(7)
+        key = _news_key('all', country_name, city_name, window)
+        page_size = current_app.config['NEWS_UNIFIED_PAGE_SIZE']
+
+        def fetch():
+            return _fetch_general_news(country_name, city_name, window, page_size)
+    else:
+        key = _news_key('danger', country_name, city_name, 7)
+
+        def fetch():
+            return _fetch_news_by_location(country_name, city_name)
+
+    remaining = _news_cache.remaining_ttl(key)
+    if remaining is not None and remaining >= min_remaining:
+        return False
+
+    app = current_app._get_current_object()
+    articles = _news_loader(app, key, fetch, use_store=False)()
+    if articles is not None:
+        _news_cache.set(
+            key,
+            articles,
+            ttl=app.config['NEWS_CACHE_TTL'],
+            stale_ttl=app.config['NEWS_CACHE_STALE_TTL']
+        )
+    return True
+
+
+def get_news_store_stats():
+    """
+    永続ニュースキャッシュの統計情報を取得
+
+    Returns:
+        dict: ヒット・ミス・書き込み・エラー件数
+    """
+    with _store_stats_lock:
+        return dict(_store_stats)
+
+
+def _cached_danger_news_count(country_name, city_name):
+    """
+    キャッシュ済みの記事から危険関連ニュースの件数を求める(無い場合はNone)
+    記事を取得済みの場所では件数のための追加のNewsAPI呼び出しをしない
+    """
+    if current_app.config['NEWS_UNIFIED_FETCH']:
+        window = _unified_window(7)
+        articles = _news_cache.get(_news_key('all', country_name, city_name, window))
+        if articles is None:
+            return None
+        articles = _filter_recent(articles, 7, window)
+        return min(sum(1 for a in articles if is_danger_article(a)), DANGER_NEWS_LIMIT)
+
+    articles = _news_cache.get(_news_key('danger', country_name, city_name, 7))
+    if articles is None:
+        return None
+    return len(articles)
+
+
+def count_news_by_location(country_name, city_name=None):
+    """
+    指定された場所の危険関連ニュースの件数のみを取得
+    NewsAPIには pageSize=1 で問い合わせて totalResults だけを使い、記事の整形は行わない
+    件数は get_news_by_location と同じく DANGER_NEWS_LIMIT 件で打ち切る
+
+    Args:
+        country_name: 国名
+        city_name: 都市名(オプション)
+
+    Returns:
+        int: 危険関連ニュースの件数
+    """
+    if current_app.config['NEWS_INGEST_ENABLED']:
+        stored = read_stored_news(
+            country_name, city_name, days=7, danger_only=True, limit=DANGER_NEWS_LIMIT)
+        if stored is not None:
+            return len(stored)
+
+    cached = _cached_danger_news_count(country_name, city_name)
+    if cached is not None:
+        return cached
+
+    app = current_app._get_current_object()
+    key = _news_key('danger_count', country_name, city_name, 7)
+
+    def load():
+        with app.app_context():
+            return _news_flight.do(
+                key, lambda: _fetch_news_count(country_name, city_name))
+
+    try:
+        count = _news_count_cache.get_or_load(
+            key,
+            load,
+            ttl=app.config['NEWS_CACHE_TTL'],
+            stale_ttl=app.config['NEWS_CACHE_STALE_TTL']
+        )
+    except UpstreamUnavailable:
+        # 利用枠切れ・サーキットオープンの場合は期限切れのキャッシュがあればそれを返す
+        count = _news_count_cache.peek(key)
+    return count if count is not None else 0
+
+
+def refresh_news_count(country_name, city_name=None):
+    """
+    危険関連ニュースの件数だけを上流から取得し直してキャッシュを更新(危険度スナップショット用)
+    記事は取得しないため、NewsAPIへの問い合わせは1回(pageSize=1)で済む
+
+    Args:
+        country_name: 国名
+        city_name: 都市名(オプション)
+
+    Returns:
+        int: 危険関連ニュースの件数、取得に失敗した場合はNone
+
+    Raises:
+        UpstreamUnavailable: 利用枠切れ・サーキットオープンの場合
+    """
+    key = _news_key('danger_count', country_name, city_name, 7)
+    count = _news_flight.do(key, lambda: _fetch_news_count(country_name, city_name))
+    if count is not None:
+        _news_count_cache.set(
+            key,
+            count,
+            ttl=current_app.config['NEWS_CACHE_TTL'],
+            stale_ttl=current_app.config['NEWS_CACHE_STALE_TTL']
+        )
+    return count
+
+
+def peek_news_count(country_name, city_name=None):
+    """
+    キャッシュ済みの危険関連ニュースの件数を取得(NewsAPI・データベースには問い合わせない)
+    期限切れでも再取得前の値が残っていれば返す
+
+    Args:
+        country_name: 国名
+        city_name: 都市名(オプション)
+
+    Returns:
+        int: 危険関連ニュースの件数、キャッシュに無い場合はNone
+    """
+    cached = _cached_danger_news_count(country_name, city_name)
+    if cached is not None:
+        return cached
+    return _news_count_cache.get(
+        _news_key('danger_count', country_name, city_name, 7), allow_stale=True)
+
+
+def _fetch_news_count(country_name, city_name):
+    """NewsAPIから危険関連ニュースの件数(totalResults)のみを取得(失敗時はNone)"""
     try:
-        today = datetime.now()
-        one_week_ago = today - timedelta(days=7)
-        from_date = one_week_ago.strftime('%Y-%m-%d')
-
-        # 検索キーワード: 犯罪、テロ、危険関連
-        keywords = 'crime OR terrorism OR violence OR attack OR murder OR assault'
-
-        # 都市が指定されている場合は都市名を含める
-        location_query = f'"{city_name}" AND "{country_name}"' if city_name else f'"{country_name}"'
-
-        # NewsAPIのパラメータ
-        params = {
-            'q': f'({keywords}) AND {location_query}',
-            'from': from_date,
-            'sortBy': 'publishedAt',
-            'language': 'en',
-            'pageSize': 10,
-            'apiKey': current_app.config['NEWS_API_KEY']
+        response = http_client.get(
+            current_app.config['NEWS_API_URL'],
+            params=_danger_news_params(country_name, city_name, page_size=1),
+            upstream='newsapi'
+        )
+
+        if response.status_code == 200:
+            total = response.json().get('totalResults') or 0
+            return min(int(total), DANGER_NEWS_LIMIT)
+        else:
+            logger.warning(f"NewsAPI エラー: {response.status_code}")
+            return None
+
+    except UpstreamUnavailable:
+        raise
+    except requests.exceptions.RequestException as e:
+        logger.error(f"ニュース件数取得エラー: {str(e)}")
+        return None
+    except Exception as e:
+        logger.error(f"予期しないエラー: {str(e)}")
+        return None
+
+
+def _danger_news_params(country_name, city_name, page_size=10):
+    """危険関連ニュース検索のNewsAPIパラメータ"""
+    # NewsAPIの from はUTCの日付として扱われる
+    today = datetime.now(timezone.utc)
+    one_week_ago = today - timedelta(days=7)
+    from_date = one_week_ago.strftime('%Y-%m-%d')
+
+    keywords = ' OR '.join(DANGER_KEYWORDS)
+
+    # 都市が指定されている場合は都市名を含める
+    location_query = f'"{city_name}" AND "{country_name}"' if city_name else f'"{country_name}"'
+
+    logger.info(f"ニュース検索: {location_query}")
+    return {
+        'q': f'({keywords}) AND {location_query}',
+        'from': from_date,
+        'sortBy': 'publishedAt',
+        'language': 'en',
+        'pageSize': page_size,
+        'apiKey': current_app.config['NEWS_API_KEY']
+    }
+
+
+def _format_articles(data, limit, include_image):
+    """NewsAPIの応答を記事リストに整形"""
+    formatted_articles = []
+    for article in data.get('articles', [])[:limit]:
+        formatted = {
+            'title': article.get('title', ''),
+            'description': article.get('description', ''),
+            'url': article.get('url', ''),
+            'publishedAt': article.get('publishedAt', ''),
+            'source': article.get('source', {}).get('name', '')
         }
+        if include_image:
+            formatted['urlToImage'] = article.get('urlToImage', '')
+        formatted_articles.append(formatted)
+    return formatted_articles
 
-        logger.info(f"ニュース検索: {location_query}")
-        response = requests.get(
+
+def _fetch_news_by_location(country_name, city_name):
+    """NewsAPIから危険関連ニュースを取得して整形(失敗時はNone)"""
+    try:
+        response = http_client.get(
             current_app.config['NEWS_API_URL'],
-            params=params,
-            timeout=10
+            params=_danger_news_params(country_name, city_name),
+            upstream='newsapi'
         )
 
         if response.status_code == 200:
-            data = response.json()
-            articles = data.get('articles', [])
-
-            # 記事を整形して返す
-            formatted_articles = []
-            for article in articles[:5]:  # 最大5件
-                formatted_articles.append({
-                    'title': article.get('title', ''),
-                    'description': article.get('description', ''),
-                    'url': article.get('url', ''),
-                    'publishedAt': article.get('publishedAt', ''),
-                    'source': article.get('source', {}).get('name', '')
-                })
-
-            return formatted_articles
+            return _format_articles(response.json(), DANGER_NEWS_LIMIT, include_image=False)
         else:
             logger.warning(f"NewsAPI エラー: {response.status_code}")
-            return []
+            return None
 
+    except UpstreamUnavailable:
+        raise
     except requests.exceptions.RequestException as e:
         logger.error(f"ニュース取得エラー: {str(e)}")
-        return []
+        return None
     except Exception as e:
         logger.error(f"予期しないエラー: {str(e)}")
-        return []
+        return None
 
 
 def get_general_news(country_name, city_name=None, days=7):
@@ -89,49 +523,188 @@ def get_general_news(country_name, city_name=None, days=7):
     Returns:
         list: ニュース記事のリスト
     """
-    try:
-        today = datetime.now()
-        from_date = (today - timedelta(days=days)).strftime('%Y-%m-%d')
-
-        # 都市が指定されている場合は都市名を含める
-        location_query = f'"{city_name}" AND "{country_name}"' if city_name else f'"{country_name}"'
-
-        params = {
-            'q': location_query,
-            'from': from_date,
-            'sortBy': 'publishedAt',
-            'language': 'en',
-            'pageSize': 10,
-            'apiKey': current_app.config['NEWS_API_KEY']
-        }
+    if current_app.config['NEWS_INGEST_ENABLED']:
+        stored = read_stored_news(country_name, city_name, days=days, limit=10)
+        if stored is not None:
+            return stored
+
+    if current_app.config['NEWS_UNIFIED_FETCH']:
+        return _get_unified_news(country_name, city_name, days)[:10]
+
+    return _get_cached_news(
+        _news_key('general', country_name, city_name, days),
+        lambda: _fetch_general_news(country_name, city_name, days)
+    )
 
-        logger.info(f"一般ニュース検索: {location_query}")
-        response = requests.get(
+
+def _general_news_params(country_name, city_name, days, page_size):
+    """一般ニュース検索のNewsAPIパラメータ"""
+    # NewsAPIの from はUTCの日付として扱われる
+    today = datetime.now(timezone.utc)
+    from_date = (today - timedelta(days=days)).strftime('%Y-%m-%d')
+
+    # 都市が指定されている場合は都市名を含める
+    location_query = f'"{city_name}" AND "{country_name}"' if city_name else f'"{country_name}"'
+
+    logger.info(f"一般ニュース検索: {location_query}")
+    return {
+        'q': location_query,
+        'from': from_date,
+        'sortBy': 'publishedAt',
+        'language': 'en',
+        'pageSize': page_size,
+        'apiKey': current_app.config['NEWS_API_KEY']
+    }
+
+
+def _fetch_general_news(country_name, city_name, days, page_size=10):
+    """NewsAPIから一般ニュースを取得して整形(失敗時はNone)"""
+    try:
+        response = http_client.get(
             current_app.config['NEWS_API_URL'],
-            params=params,
-            timeout=10
+            params=_general_news_params(country_name, city_name, days, page_size),
+            upstream='newsapi'
         )
 
         if response.status_code == 200:
-            data = response.json()
-            articles = data.get('articles', [])
-
-            formatted_articles = []
-            for article in articles[:10]:
-                formatted_articles.append({
-                    'title': article.get('title', ''),
-                    'description': article.get('description', ''),
-                    'url': article.get('url', ''),
-                    'publishedAt': article.get('publishedAt', ''),
-                    'source': article.get('source', {}).get('name', ''),
-                    'urlToImage': article.get('urlToImage', '')
-                })
-
-            return formatted_articles
+            return _format_articles(response.json(), page_size, include_image=True)
         else:
             logger.warning(f"NewsAPI エラー: {response.status_code}")
-            return []
+            return None
 
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         logger.error(f"一般ニュース取得エラー: {str(e)}")
-        return []
+        return None
+
+
+# ---- 非同期版(ASGIエントリーポイント用) ----
+# メモリキャッシュ・永続キャッシュ・取り込み済み記事は同期版と共有する
+
+_async_news_flight = AsyncSingleFlight('news_async')
+
+
+def _news_loader_async(app, key, fetch):
+    """_news_loader の非同期版(fetch はコルーチン関数)"""
+    async def load():
+        with app.app_context():
+            stored = await run_sync(_read_store, key)
+            if stored is not None:
+                return stored
+            articles = await _async_news_flight.do(key, fetch)
+            if articles is not None:
+                await run_sync(_write_store, key, articles, app.config['NEWS_CACHE_TTL'])
+            return articles
+
+    return load
+
+
+async def _get_cached_news_async(key, fetch):
+    """キャッシュ経由でニュースを非同期で取得(取得失敗時は空リスト)"""
+    app = current_app._get_current_object()
+    try:
+        articles = await _news_cache.aget_or_load(
+            key,
+            _news_loader_async(app, key, fetch),
+            ttl=app.config['NEWS_CACHE_TTL'],
+            stale_ttl=app.config['NEWS_CACHE_STALE_TTL']
+        )
+    except UpstreamUnavailable:
+        # 利用枠切れ・サーキットオープンの場合は期限切れのキャッシュがあればそれを返す
+        articles = _news_cache.peek(key)
+    return articles if articles is not None else []
+
+
+async def _fetch_news_async(params, limit, include_image):
+    """NewsAPIから非同期で記事を取得して整形(失敗時はNone)"""
+    try:
+        response = await async_http_client.get(
+            current_app.config['NEWS_API_URL'], params=params, upstream='newsapi')
+
+        if response.status_code == 200:
+            return _format_articles(response.json(), limit, include_image)
+        logger.warning(f"NewsAPI エラー: {response.status_code}")
+        return None
+
+    except UpstreamUnavailable:
+        raise
+    except Exception as e:
+        logger.error(f"ニュース取得エラー: {str(e)}")
+        return None
+
+
+async def _get_unified_news_async(country_name, city_name, days):
+    """_get_unified_news の非同期版"""
+    page_size = current_app.config['NEWS_UNIFIED_PAGE_SIZE']
+    window = _unified_window(days)
+    articles = await _get_cached_news_async(
+        _news_key('all', country_name, city_name, window),
+        lambda: _fetch_news_async(
+            _general_news_params(country_name, city_name, window, page_size),
+            page_size, include_image=True)
+    )
+    return _filter_recent(articles, days, window)
+
+
+async def get_news_by_location_async(country_name, city_name=None):
+    """
+    get_news_by_location の非同期版
+
+    Args:
+        country_name: 国名
+        city_name: 都市名(オプション)
+
+    Returns:
+        list: ニュース記事のリスト
+    """
+    record_access(country_name, city_name)
+    if current_app.config['NEWS_INGEST_ENABLED']:
+        stored = await run_sync(
+            lambda: read_stored_news(
+                country_name, city_name, days=7, danger_only=True,
+                limit=DANGER_NEWS_LIMIT))
+        if stored is not None:
+            return stored
+
+    if current_app.config['NEWS_UNIFIED_FETCH']:
+        articles = await _get_unified_news_async(country_name, city_name, 7)
+        return [
+            {k: v for k, v in article.items() if k != 'urlToImage'}
+            for article in articles if is_danger_article(article)
+        ][:DANGER_NEWS_LIMIT]
+
+    return await _get_cached_news_async(
+        _news_key('danger', country_name, city_name, 7),
+        lambda: _fetch_news_async(
+            _danger_news_params(country_name, city_name), DANGER_NEWS_LIMIT,
+            include_image=False)
+    )
+
+
+async def get_general_news_async(country_name, city_name=None, days=7):
+    """
+    get_general_news の非同期版
+
+    Args:
+        country_name: 国名
+        city_name: 都市名(オプション)
+        days: 過去何日分のニュースを取得するか
+
+    Returns:
+        list: ニュース記事のリスト
+    """
+    if current_app.config['NEWS_INGEST_ENABLED']:
+        stored = await run_sync(
+            lambda: read_stored_news(country_name, city_name, days=days, limit=10))
+        if stored is not None:
+            return stored
+
+    if current_app.config['NEWS_UNIFIED_FETCH']:
+        return (await _get_unified_news_async(country_name, city_name, days))[:10]
+
+    return await _get_cached_news_async(
+        _news_key('general', country_name, city_name, days),
+        lambda: _fetch_news_async(
+            _general_news_params(country_name, city_name, days, 10), 10, include_image=True)
+    )
@@ -0,0 +1,242 @@
+"""
+外部APIの利用枠管理 - 上流ごとのトークンバケットと1日の上限
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 上流名 -> UpstreamBudget
+_budgets = {}
+
+# バックグラウンド処理(キャッシュウォーマーなど)かどうかをスレッドごとに保持
+# 別スレッドには伝わらないため、別スレッドに渡す関数は with_current_priority で包む
+_priority = threading.local()
+
+
+class UpstreamUnavailable(Exception):
+    """上流APIを今は呼べない(利用枠切れ・サーキットオープンなど)"""
+
+
+class BudgetExhausted(UpstreamUnavailable):
+    """上流APIの利用枠が残っていない"""
+
+    def __init__(self, upstream):
+        super().__init__(f"{upstream} の利用枠が残っていません")
+        self.upstream = upstream
+
+
+class UpstreamBudget:
+    """
+    1つの上流APIの利用枠
+
+    1分あたりの枠はトークンバケットで平滑化し、1日の枠は日付ごとに数える。
+    バックグラウンド処理は reserve_ratio 分の枠をユーザーリクエスト用に残して止まる。
+    上限が0の場合は無制限として扱う。
+    """
+
+    def __init__(self, name, per_minute, per_day, reserve_ratio=0.0):
+        self.name = name
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.reserve_ratio = reserve_ratio
+        self._tokens = float(per_minute)
+        self._updated = time.monotonic()
+        self._day = date.today()
+        self._used_today = 0
+        self._denied = {'user': 0, 'background': 0}
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.per_minute:
+            self._tokens = min(
+                float(self.per_minute),
+                self._tokens + (now - self._updated) * self.per_minute / 60
+            )
+        self._updated = now
+        today = date.today()
+        if today != self._day:
+            self._day = today
+            self._used_today = 0
+
+    def try_acquire(self, cost=1, background=False):
+        """
+        利用枠を消費する
+
+        Args:
+            cost: 消費するリクエスト数
+            background: バックグラウンド処理の場合True(予約分は使えない)
+
+        Returns:
+            bool: 消費できた場合True
+        """
+        with self._lock:
+            self._refill()
+            reserve = self.reserve_ratio if background else 0.0
+
+            minute_ok = (not self.per_minute or
+                         self._tokens - cost >= self.per_minute * reserve)
+            day_ok = (not self.per_day or
+                      self._used_today + cost <= self.per_day * (1 - reserve))
+
+            if not (minute_ok and day_ok):
+                self._denied['background' if background else 'user'] += 1
+                return False
+
+            if self.per_minute:
+                self._tokens -= cost
+            self._used_today += cost
+            return True
+
+    def available(self, background=False):
+        """
+        今すぐ消費できるリクエスト数(消費はしない)
+
+        Args:
+            background: バックグラウンド処理の場合True(予約分を除く)
+
+        Returns:
+            int: 消費できる数、無制限の場合はNone
+        """
+        with self._lock:
+            self._refill()
+            reserve = self.reserve_ratio if background else 0.0
+            limits = []
+            if self.per_minute:
+                limits.append(self._tokens - self.per_minute * reserve)
+            if self.per_day:
+                limits.append(self.per_day * (1 - reserve) - self._used_today)
+            if not limits:
+                return None
+            return max(0, int(min(limits)))
+
+    def stats(self):
+        """残りの利用枠などの統計情報を返す"""
+        with self._lock:
+            self._refill()
+            return {
+                'per_minute': self.per_minute,
+                'per_day': self.per_day,
+                'remaining_minute': int(self._tokens) if self.per_minute else None,
+                'remaining_day': (self.per_day - self._used_today) if self.per_day else None,
+                'used_today': self._used_today,
+                'denied_user': self._denied['user'],
+                'denied_background': self._denied['background']
+            }
+
+
+def init_rate_limits(app):
+    """
+    設定から上流ごとの利用枠を作成する
+
+    Args:
+        app: Flaskアプリケーション
+    """
+    reserve = app.config['BACKGROUND_BUDGET_RESERVE']
+    _budgets['newsapi'] = UpstreamBudget(
+        'newsapi',
+        app.config['NEWS_API_RATE_PER_MINUTE'],
+        app.config['NEWS_API_DAILY_QUOTA'],
+        reserve
+    )
+    _budgets['openweather'] = UpstreamBudget(
+        'openweather',
+        app.config['OPEN_WEATHER_RATE_PER_MINUTE'],
+        app.config['OPEN_WEATHER_DAILY_QUOTA'],
+        reserve
+    )
+
+
+@contextmanager
+def background_priority(background=True):
+    """
+    このブロック内の上流呼び出しをバックグラウンド優先度で行う
+
+    Args:
+        background: Falseの場合はユーザーリクエストの優先度で行う
+    """
+    previous = is_background_priority()
+    _priority.background = background
+    try:
+        yield
+    finally:
+        _priority.background = previous
+
+
+def is_background_priority():
+    """現在のスレッドがバックグラウンド優先度ならTrue"""
+    return getattr(_priority, 'background', False)
+
+
+def with_current_priority(fn):
+    """
+    呼び出し元スレッドの優先度で fn を実行するラッパーを返す
+    (ワーカースレッド・キャッシュの再取得スレッドなど別スレッドに渡す関数用)
+
+    Args:
+        fn: ラップする関数
+
+    Returns:
+        callable: 呼び出し元の優先度を設定してから fn を呼ぶ関数
+    """
+    background = is_background_priority()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with background_priority(background):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def acquire_budget(upstream, cost=1):
+    """
+    上流APIを呼ぶ前に利用枠を消費する(未設定の上流は無制限)
+
+    Args:
+        upstream: 上流名('newsapi' または 'openweather')
+        cost: 消費するリクエスト数
+
+    Raises:
+        BudgetExhausted: 利用枠が残っていない場合
+    """
+    budget = _budgets.get(upstream)
+    if budget is None:
+        return
+    background = is_background_priority()
+    if not budget.try_acquire(cost, background=background):
+        logger.warning(
+            f"利用枠超過: {upstream} ({'background' if background else 'user'})")
+        raise BudgetExhausted(upstream)
+
+
+def get_available_budget(upstream, background=True):
+    """
+    上流APIの残りの利用枠を取得(バッチ処理の件数を決める用、消費はしない)
+
+    Args:
+        upstream: 上流名
+        background: バックグラウンド処理の場合True(ユーザーリクエスト用の予約分を除く)
+
+    Returns:
+        int: 今すぐ呼べる回数、無制限・未設定の場合はNone
+    """
+    budget = _budgets.get(upstream)
+    if budget is None:
+        return None
+    return budget.available(background=background)
+
+
+def get_budget_stats():
+    """
+    上流ごとの残り利用枠を取得
+
+    Returns:
+        dict: 上流名 -> 統計情報
+    """
+    return {name: budget.stats() for name, budget in _budgets.items()}
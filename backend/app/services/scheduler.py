@@ -0,0 +1,103 @@
+"""
+バックグラウンドジョブ - アプリケーションプロセス内で定期実行する
+"""
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 名前 -> 実行中のPeriodicJob
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+class PeriodicJob:
+    """
+    一定間隔で関数を実行するデーモンスレッド
+    関数はアプリケーションコンテキスト内で呼ばれる
+    """
+
+    def __init__(self, app, name, interval, fn, initial_delay=0):
+        self.app = app
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.initial_delay = initial_delay
+        self.runs = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"job-{name}", daemon=True)
+
+    def start(self):
+        """ジョブを開始する"""
+        self._thread.start()
+
+    def stop(self):
+        """ジョブを停止する"""
+        self._stop.set()
+
+    def _run(self):
+        if self._stop.wait(self.initial_delay):
+            return
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    self.fn()
+                self.runs += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"バックグラウンドジョブエラー ({self.name}): {str(e)}")
+            if self._stop.wait(self.interval):
+                break
+
+    def stats(self):
+        """実行回数などの統計情報を返す"""
+        return {
+            'interval': self.interval,
+            'runs': self.runs,
+            'errors': self.errors,
+            'alive': self._thread.is_alive()
+        }
+
+
+def should_start_background_jobs(app):
+    """
+    このプロセスでバックグラウンドジョブを起動すべきか判定
+    (デバッグ時のリローダー親プロセスでは起動しない)
+    """
+    if app.testing:
+        return False
+    if app.debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return False
+    return True
+
+
+def start_job(app, name, interval, fn, initial_delay=0):
+    """
+    定期実行ジョブを登録して開始する(同名ジョブが動作中なら何もしない)
+
+    Returns:
+        PeriodicJob: 開始した(または既存の)ジョブ
+    """
+    with _jobs_lock:
+        job = _jobs.get(name)
+        if job is not None and job.stats()['alive']:
+            return job
+        job = PeriodicJob(app, name, interval, fn, initial_delay)
+        _jobs[name] = job
+    job.start()
+    logger.info(f"バックグラウンドジョブ開始: {name} (間隔: {interval}秒)")
+    return job
+
+
+def get_job_stats():
+    """
+    全ジョブの統計情報を取得
+
+    Returns:
+        dict: ジョブ名 -> 統計情報
+    """
+    with _jobs_lock:
+        return {name: job.stats() for name, job in _jobs.items()}
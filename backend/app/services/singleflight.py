@@ -0,0 +1,134 @@
+"""
+シングルフライト - 同一キーの同時呼び出しを1回の上流リクエストにまとめる
+"""
+import asyncio
+import threading
+
+# 名前 -> SingleFlightインスタンス(メトリクス出力用)
+_registry = {}
+
+
+class _Call:
+    """実行中の呼び出し"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    同じキーで同時に呼ばれた関数を1回だけ実行し、結果を全員で共有する
+
+    先に来た呼び出し(リーダー)が fn を実行し、
+    実行中に来た同じキーの呼び出しはその完了を待って同じ結果を受け取る。
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'executions': 0, 'coalesced': 0}
+        _registry[name] = self
+
+    def do(self, key, fn):
+        """
+        キーごとに fn を1回だけ実行して結果を返す
+
+        Args:
+            key: まとめる単位となるキー(ハッシュ可能な値)
+            fn: 引数なしの関数
+
+        Returns:
+            fn() の戻り値(リーダーが例外を送出した場合は同じ例外を送出)
+        """
+        with self._lock:
+            self._stats['calls'] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats['coalesced'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats['executions'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result
+
+    def stats(self):
+        """呼び出し数・実行数・まとめられた数を返す"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight の非同期版
+    同じイベントループ内で同じキーのコルーチンを1回だけ実行し、結果を共有する
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}  # (イベントループ, キー) -> asyncio.Task
+        self._stats = {'calls': 0, 'executions': 0, 'coalesced': 0}
+        _registry[name] = self
+
+    async def do(self, key, fn):
+        """
+        キーごとに fn() のコルーチンを1回だけ実行して結果を返す
+
+        Args:
+            key: まとめる単位となるキー(ハッシュ可能な値)
+            fn: 引数なしのコルーチン関数
+
+        Returns:
+            fn() の戻り値(リーダーが例外を送出した場合は同じ例外を送出)
+        """
+        call_key = (asyncio.get_running_loop(), key)
+        self._stats['calls'] += 1
+        task = self._calls.get(call_key)
+        if task is not None:
+            self._stats['coalesced'] += 1
+        else:
+            self._stats['executions'] += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[call_key] = task
+            task.add_done_callback(lambda _: self._calls.pop(call_key, None))
+        # 待っている側がキャンセルされても実行中の処理は止めない
+        return await asyncio.shield(task)
+
+    def stats(self):
+        """呼び出し数・実行数・まとめられた数を返す"""
+        stats = dict(self._stats)
+        stats['in_flight'] = len(self._calls)
+        return stats
+
+
+def get_singleflight_stats():
+    """
+    登録済みの全シングルフライトの統計情報を取得
+
+    Returns:
+        dict: 名前 -> 統計情報
+    """
+    return {name: flight.stats() for name, flight in _registry.items()}
@@ -0,0 +1,166 @@
+"""
+都市の空間インデックス - 最寄り都市検索用のKD木
+"""
+import heapq
+import math
+
+# 地球の半径(km)
+EARTH_RADIUS_KM = 6371
+
+
+def _to_unit_vector(latitude, longitude):
+    """緯度経度を単位球上の3次元ベクトルに変換"""
+    lat = math.radians(latitude)
+    lon = math.radians(longitude)
+    cos_lat = math.cos(lat)
+    return (cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat))
+
+
+def _chord_to_km(chord):
+    """単位球上の弦の長さを大円距離(km)に変換"""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def _km_to_chord(distance_km):
+    """大円距離(km)を単位球上の弦の長さに変換"""
+    angle = min(distance_km / EARTH_RADIUS_KM, math.pi)
+    return 2 * math.sin(angle / 2)
+
+
+class CityIndex:
+    """
+    都市座標のKD木
+
+    緯度経度を単位球上の3次元座標に変換して保持するため、
+    ユークリッド距離(弦の長さ)の大小が大円距離の大小と一致する。
+    木は配列上に暗黙的に構築する(区間 [lo, hi) の中央要素がノード)。
+    """
+
+    def __init__(self, cities):
+        """
+        Args:
+            cities: {'name', 'country_code', 'latitude', 'longitude'} を持つ辞書のリスト
+        """
+        self._cities = list(cities)
+        self._points = [
+            _to_unit_vector(city['latitude'], city['longitude'])
+            for city in self._cities
+        ]
+        self._order = list(range(len(self._cities)))
+        self._axes = [0] * len(self._cities)
+        self._build(0, len(self._order), 0)
+
+    def __len__(self):
+        return len(self._cities)
+
+    def _build(self, lo, hi, depth):
+        if hi - lo <= 0:
+            return
+        axis = depth % 3
+        points = self._points
+        self._order[lo:hi] = sorted(
+            self._order[lo:hi], key=lambda i: points[i][axis])
+        mid = (lo + hi) // 2
+        self._axes[mid] = axis
+        self._build(lo, mid, depth + 1)
+        self._build(mid + 1, hi, depth + 1)
+
+    def _result(self, index, chord):
+        city = dict(self._cities[index])
+        city['distance_km'] = round(_chord_to_km(chord), 3)
+        return city
+
+    def nearest(self, latitude, longitude, k=1, max_distance_km=None):
+        """
+        最も近い k 件の都市を取得
+
+        Args:
+            latitude: 緯度
+            longitude: 経度
+            k: 取得件数
+            max_distance_km: 最大距離(km)、省略時は無制限
+
+        Returns:
+            list: 近い順の都市辞書(distance_km付き)
+        """
+        if k <= 0 or not self._cities:
+            return []
+
+        target = _to_unit_vector(latitude, longitude)
+        limit = _km_to_chord(max_distance_km) ** 2 if max_distance_km is not None else math.inf
+        heap = []  # (-距離の2乗, インデックス) の最大ヒープ
+        points = self._points
+        order = self._order
+        axes = self._axes
+
+        def search(lo, hi):
+            if hi - lo <= 0:
+                return
+            mid = (lo + hi) // 2
+            index = order[mid]
+            point = points[index]
+            dist = ((point[0] - target[0]) ** 2 +
+                    (point[1] - target[1]) ** 2 +
+                    (point[2] - target[2]) ** 2)
+            if dist <= limit:
+                if len(heap) < k:
+                    heapq.heappush(heap, (-dist, index))
+                elif dist < -heap[0][0]:
+                    heapq.heapreplace(heap, (-dist, index))
+
+            diff = target[axes[mid]] - point[axes[mid]]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            search(*near)
+            bound = -heap[0][0] if len(heap) == k else limit
+            if diff * diff <= bound:
+                search(*far)
+
+        search(0, len(order))
+        return [
+            self._result(index, math.sqrt(-neg_dist))
+            for neg_dist, index in sorted(heap, reverse=True)
+        ]
+
+    def within(self, latitude, longitude, radius_km):
+        """
+        指定半径内の都市を取得
+
+        Args:
+            latitude: 緯度
+            longitude: 経度
+            radius_km: 半径(km)
+
+        Returns:
+            list: 近い順の都市辞書(distance_km付き)
+        """
+        if not self._cities:
+            return []
+
+        target = _to_unit_vector(latitude, longitude)
+        limit = _km_to_chord(radius_km) ** 2
+        found = []
+        points = self._points
+        order = self._order
+        axes = self._axes
+
+        def search(lo, hi):
+            if hi - lo <= 0:
+                return
+            mid = (lo + hi) // 2
+            index = order[mid]
+            point = points[index]
+            dist = ((point[0] - target[0]) ** 2 +
+                    (point[1] - target[1]) ** 2 +
+                    (point[2] - target[2]) ** 2)
+            if dist <= limit:
+                found.append((dist, index))
+
+            diff = target[axes[mid]] - point[axes[mid]]
+            if diff < 0 or diff * diff <= limit:
+                search(lo, mid)
+            if diff >= 0 or diff * diff <= limit:
+                search(mid + 1, hi)
+
+        search(0, len(order))
+        found.sort()
+        return [self._result(index, math.sqrt(dist)) for dist, index in found]
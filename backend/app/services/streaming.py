@@ -0,0 +1,80 @@
+"""
+ストリーミング応答 - 準備できた項目から順に NDJSON / Server-Sent Events で送る
+"""
+import json
+from flask import Response, request, stream_with_context
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 形式名 -> Content-Type
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream'
+}
+
+
+def get_stream_format(data=None):
+    """
+    リクエストが求めるストリーミング形式を判定する
+    クエリ・ボディの stream パラメータ、または Accept ヘッダーで指定する
+
+    Args:
+        data: リクエストボディ(JSON)
+
+    Returns:
+        str: 'ndjson' または 'sse'、ストリーミングしない場合はNone
+    """
+    requested = request.args.get('stream')
+    if requested is None and isinstance(data, dict):
+        requested = data.get('stream')
+
+    if isinstance(requested, str) and requested.lower() in STREAM_FORMATS:
+        return requested.lower()
+    if requested is True or (isinstance(requested, str) and requested.lower() in ('1', 'true')):
+        return 'ndjson'
+
+    accept = request.headers.get('Accept', '')
+    for fmt, mimetype in STREAM_FORMATS.items():
+        if mimetype in accept:
+            return fmt
+    return None
+
+
+def _encode(fmt, event, data):
+    """1件のイベントを指定形式の文字列にする"""
+    if fmt == 'sse':
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+        return f"event: {event}\ndata: {payload}\n\n"
+    return json.dumps({'event': event, 'data': data}, ensure_ascii=False, default=str) + '\n'
+
+
+def stream_events(events, fmt):
+    """
+    (イベント名, データ) を生成するイテレータをストリーミング応答にする
+    途中で例外が起きた場合は error イベントを送って終了する
+
+    Args:
+        events: (イベント名, データ) を順に返すイテレータ
+        fmt: 'ndjson' または 'sse'
+
+    Returns:
+        Response: ストリーミング応答
+    """
+    def generate():
+        try:
+            for event, data in events:
+                yield _encode(fmt, event, data)
+        except Exception as e:
+            logger.error(f"ストリーミング応答エラー: {str(e)}")
+            yield _encode(fmt, 'error', {'error': 'An error occurred', 'details': str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=STREAM_FORMATS[fmt],
+        headers={
+            'Cache-Control': 'no-cache',
+            # リバースプロキシのバッファリングを無効にして即座に送る
+            'X-Accel-Buffering': 'no'
+        }
+    )
@@ -1,42 +1,336 @@
 """
 天気予報サービス
 """
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from flask import current_app
 
+from app.extensions import db
+from app.services.async_http_client import async_http_client
+from app.services.cache import TTLCache
+from app.services.cache_warmer import record_access
+from app.services.concurrency import run_sync, with_app_context
+from app.services.geocoding_service import invalidate_city_index
+from app.services.http_client import http_client
+from app.services.rate_limiter import UpstreamUnavailable
+from app.services.singleflight import AsyncSingleFlight, SingleFlight
 
-def get_weather_forecast(city_name, days=7):
+# 天気予報キャッシュ (正規化した都市名, 日数, 言語, 単位) -> 整形済み予報
+_forecast_cache = TTLCache('weather_forecast')
+
+# 現在の天気キャッシュ 正規化した都市名 -> 整形済みデータ
+_current_weather_cache = TTLCache('current_weather')
+
+# 上流が「都市が見つからない」(404)と返した都市 正規化した都市名 -> True
+# 存在しない都市への繰り返しのリクエストで上流を呼ばないよう短時間だけ覚えておく
+_not_found_cache = TTLCache('weather_not_found', 2048)
+
+# 同じ都市への同時リクエストを1回の上流呼び出しにまとめる
+_weather_flight = SingleFlight('weather')
+
+# 都市名 -> (緯度, 経度) のメモリキャッシュ(Cityテーブルにも永続化)
+_city_coordinates = {}
+_city_coordinates_lock = threading.Lock()
+
+
+def _normalize_city_name(city_name):
+    """
+    キャッシュキー・Cityテーブルの照合用に都市名を正規化
+    (データベースの lower() と結果が一致するよう casefold ではなく lower を使う)
+    """
+    return ' '.join(city_name.split()).lower()
+
+
+def _remember_not_found(city_name):
+    """上流で見つからなかった都市を一定時間記録する"""
+    current_app.logger.info(f"都市が見つかりません: {city_name}")
+    _not_found_cache.set(
+        _normalize_city_name(city_name), True,
+        ttl=current_app.config['NOT_FOUND_CACHE_TTL'])
+
+
+def _is_known_not_found(city_name):
+    """最近上流で見つからなかった都市ならTrue"""
+    return _not_found_cache.get(_normalize_city_name(city_name)) is not None
+
+
+def get_city_coordinates(city_name):
+    """
+    保存済みの都市座標を取得(メモリ -> Cityテーブルの順に検索)
+
+    Args:
+        city_name: 都市名
+
+    Returns:
+        tuple: (緯度, 経度)、未登録の場合はNone
+    """
+    key = _normalize_city_name(city_name)
+    with _city_coordinates_lock:
+        coords = _city_coordinates.get(key)
+    if coords:
+        return coords
+
+    from app.models import City
+
+    try:
+        city = City.query.filter(
+            _city_name_matches(City, city_name),
+            City.Latitude.isnot(None),
+            City.Longitude.isnot(None)
+        ).first()
+    except Exception as e:
+        current_app.logger.warning(f"都市座標の読み込みに失敗: {str(e)}")
+        return None
+
+    if not city:
+        return None
+
+    coords = (city.Latitude, city.Longitude)
+    with _city_coordinates_lock:
+        _city_coordinates[key] = coords
+    return coords
+
+
+def _city_name_matches(City, *city_names):
+    """都市名を大文字小文字・連続する空白を無視して照合する条件(いずれかの名前に一致)"""
+    names = {_normalize_city_name(name) for name in city_names if name}
+    return db.func.lower(City.Name).in_(names)
+
+
+def _resolve_country_code(country_code):
+    """alpha-2 / alpha-3 の国コードをcountryテーブルのCode(alpha-3)に変換(不明ならNone)"""
+    if not country_code:
+        return None
+    from app.services.country_catalog import get_country_catalog
+    entry = get_country_catalog().by_code(country_code)
+    return entry.code if entry else None
+
+
+def save_city_coordinates(city_name, lat, lon, country_code=None, upstream_name=None):
+    """
+    都市座標をメモリに保存し、座標未登録のCity行があれば永続化
+    都市名は大文字小文字・空白を無視して照合する。行の追加はしない
+    (検索語や国名がCityテーブルに入らないよう、既存の都市のみを更新する)
+
+    Args:
+        city_name: 検索に使った都市名
+        lat: 緯度
+        lon: 経度
+        country_code: 国コード(OpenWeatherの sys.country など alpha-2 / alpha-3)
+        upstream_name: 上流が返した正式な都市名(OpenWeatherの name)
+    """
+    with _city_coordinates_lock:
+        _city_coordinates[_normalize_city_name(city_name)] = (lat, lon)
+
+    from app.models import City
+
+    try:
+        query = City.query.filter(
+            _city_name_matches(City, city_name, upstream_name),
+            City.Latitude.is_(None)
+        )
+        country = _resolve_country_code(country_code)
+        if country:
+            query = query.filter(City.CountryCode == country)
+        cities = query.all()
+        if country is None and len({city.CountryCode for city in cities}) > 1:
+            # 国が分からない同名の都市はどれの座標か決められない
+            cities = []
+        if not cities:
+            current_app.logger.info(
+                f"座標未登録の都市がありません(座標はメモリのみに保存): "
+                f"{city_name} ({upstream_name or '-'}, {country_code or '-'})")
+            return
+
+        for city in cities:
+            city.Latitude = lat
+            city.Longitude = lon
+        db.session.commit()
+        # 最寄り都市検索の空間インデックスにも反映する
+        invalidate_city_index()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f"都市座標の保存に失敗: {str(e)}")
+
+
+def _save_coordinates_from_response(city_name, data):
+    """OpenWeather /weather の応答に含まれる座標・国コード・都市名を保存"""
+    save_city_coordinates(
+        city_name, data['coord']['lat'], data['coord']['lon'],
+        (data.get('sys') or {}).get('country'), data.get('name'))
+
+
+def get_weather_forecast(city_name, days=7, lang='ja', units='metric'):
     """
     OpenWeather APIを使用して天気予報を取得
+    同じ都市の予報はキャッシュから返す(TTL切れ後はstale-while-revalidate)
 
     Args:
         city_name: 都市名
         days: 取得する日数(デフォルト7日)
+        lang: 言語(デフォルト'ja')
+        units: 単位(デフォルト'metric')
 
     Returns:
         list: 天気予報データのリスト
     """
+    record_access(None, city_name)
+    app = current_app._get_current_object()
+    key = _forecast_key(city_name, days, lang, units)
+    try:
+        return _forecast_cache.get_or_load(
+            key,
+            _forecast_loader(app, city_name, days, lang, units),
+            ttl=app.config['WEATHER_CACHE_TTL'],
+            stale_ttl=app.config['WEATHER_CACHE_STALE_TTL']
+        )
+    except UpstreamUnavailable:
+        # 利用枠切れ・サーキットオープンの場合は期限切れのキャッシュがあればそれを返す
+        return _forecast_cache.peek(key)
+
+
+def refresh_weather_forecast(city_name, days=7, lang='ja', units='metric',
+                             min_remaining=0):
+    """
+    天気予報を上流から取得し直してキャッシュを更新(キャッシュウォーマー用)
+
+    Args:
+        city_name: 都市名
+        days: 取得する日数
+        lang: 言語
+        units: 単位
+        min_remaining: キャッシュの残りTTLがこの秒数以上なら取得しない
+
+    Returns:
+        bool: 上流から取得した場合True
+    """
+    key = _forecast_key(city_name, days, lang, units)
+    remaining = _forecast_cache.remaining_ttl(key)
+    if remaining is not None and remaining >= min_remaining:
+        return False
+
+    app = current_app._get_current_object()
+    forecast_data = _forecast_loader(app, city_name, days, lang, units)()
+    if forecast_data is not None:
+        _forecast_cache.set(
+            key,
+            forecast_data,
+            ttl=app.config['WEATHER_CACHE_TTL'],
+            stale_ttl=app.config['WEATHER_CACHE_STALE_TTL']
+        )
+    return True
+
+
+def forecast_upstream_calls(city_name):
+    """
+    天気予報の取得で上流を呼ぶ回数(キャッシュウォーマーの利用枠の計算用)
+    座標が未登録の場合は座標を得るための現在の天気の取得も含めて2回
+
+    Returns:
+        int: 上流の呼び出し回数
+    """
+    return 1 if get_city_coordinates(city_name) else 2
+
+
+def _forecast_key(city_name, days, lang, units):
+    """天気予報キャッシュのキー"""
+    return (_normalize_city_name(city_name), days, lang, units)
+
+
+def _forecast_loader(app, city_name, days, lang, units):
+    """キャッシュミス時に天気予報を取得する関数を返す"""
+    key = _forecast_key(city_name, days, lang, units)
+
+    def load():
+        with app.app_context():
+            if _is_known_not_found(city_name):
+                return None
+            return _weather_flight.do(
+                ('forecast',) + key,
+                lambda: _fetch_weather_forecast(city_name, days, lang, units)
+            )
+
+    return load
+
+
+def get_weather_forecasts(city_names, days=7, lang='ja', units='metric',
+                          max_workers=8):
+    """
+    複数都市の天気予報をまとめて取得
+    キャッシュに無い都市だけを上限付きのワーカープールで並行取得する
+
+    Args:
+        city_names: 都市名のリスト
+        days: 取得する日数(デフォルト7日)
+        lang: 言語(デフォルト'ja')
+        units: 単位(デフォルト'metric')
+        max_workers: 同時に取得する最大数
+
+    Returns:
+        dict: 都市名 -> 天気予報データのリスト(取得失敗時はNone)
+    """
+    results = {}
+    missing = []
+    for city_name in city_names:
+        cached = _forecast_cache.get(
+            _forecast_key(city_name, days, lang, units))
+        if cached is not None:
+            record_access(None, city_name)
+            results[city_name] = cached
+        else:
+            missing.append(city_name)
+
+    if missing:
+        fetch = with_app_context(get_weather_forecast)
+        workers = max(1, min(max_workers, len(missing)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                city_name: executor.submit(fetch, city_name, days, lang, units)
+                for city_name in missing
+            }
+            for city_name, future in futures.items():
+                try:
+                    results[city_name] = future.result()
+                except Exception as e:
+                    current_app.logger.error(
+                        f"Weather batch error ({city_name}): {str(e)}")
+                    results[city_name] = None
+
+    return results
+
+
+def _fetch_weather_forecast(city_name, days, lang, units):
+    """OpenWeather APIから天気予報を取得して整形"""
     try:
         api_key = current_app.config['OPEN_WEATHER_API_KEY']
         base_url = current_app.config['OPEN_WEATHER_API_URL']
 
-        # 現在の天気を取得して座標を取得
-        current_weather_url = f"{base_url}/weather"
-        params = {
-            'q': city_name,
-            'appid': api_key,
-            'units': 'metric',
-            'lang': 'ja'
-        }
+        coords = get_city_coordinates(city_name)
+        if coords:
+            lat, lon = coords
+        else:
+            # 座標が未登録の場合のみ現在の天気を取得して座標を取得
+            current_weather_url = f"{base_url}/weather"
+            params = {
+                'q': city_name,
+                'appid': api_key,
+                'units': units,
+                'lang': lang
+            }
 
-        response = requests.get(current_weather_url, params=params, timeout=10)
-        response.raise_for_status()
-        current_data = response.json()
+            response = http_client.get(
+                current_weather_url, params=params, upstream='openweather')
+            if response.status_code == 404:
+                _remember_not_found(city_name)
+                return None
+            response.raise_for_status()
+            current_data = response.json()
 
-        # 座標を取得
-        lat = current_data['coord']['lat']
-        lon = current_data['coord']['lon']
+            lat = current_data['coord']['lat']
+            lon = current_data['coord']['lon']
+            _save_coordinates_from_response(city_name, current_data)
 
         # One Call APIで詳細な予報を取得
         forecast_url = f"{base_url}/onecall"
@@ -44,35 +338,20 @@ def get_weather_forecast(city_name, days=7):
             'lat': lat,
             'lon': lon,
             'appid': api_key,
-            'units': 'metric',
-            'lang': 'ja',
+            'units': units,
+            'lang': lang,
             'exclude': 'minutely,hourly,alerts'
         }
 
-        forecast_response = requests.get(
-            forecast_url, params=forecast_params, timeout=10)
+        forecast_response = http_client.get(
+            forecast_url, params=forecast_params, upstream='openweather')
         forecast_response.raise_for_status()
         forecast_data = forecast_response.json()
 
-        # データを整形
-        formatted_forecast = []
-        for i, day in enumerate(forecast_data.get('daily', [])[:days]):
-            date = datetime.fromtimestamp(day['dt'])
-            formatted_forecast.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'day_of_week': date.strftime('%A'),
-                'temperature': round(day['temp']['day'], 1),
-                'temp_min': round(day['temp']['min'], 1),
-                'temp_max': round(day['temp']['max'], 1),
-                'weather': day['weather'][0]['description'],
-                'weather_main': day['weather'][0]['main'],
-                'humidity': day['humidity'],
-                'wind_speed': day['wind_speed'],
-                'pop': day.get('pop', 0) * 100  # 降水確率(%)
-            })
-
-        return formatted_forecast
+        return _format_forecast(forecast_data, days)
 
+    except UpstreamUnavailable:
+        raise
     except requests.exceptions.RequestException as e:
         current_app.logger.error(f"Weather API error: {str(e)}")
         return None
@@ -81,9 +360,31 @@ def get_weather_forecast(city_name, days=7):
         return None
 
 
+def _format_forecast(forecast_data, days):
+    """One Call APIの応答を日別の予報リストに整形"""
+    formatted_forecast = []
+    for i, day in enumerate(forecast_data.get('daily', [])[:days]):
+        date = datetime.fromtimestamp(day['dt'])
+        formatted_forecast.append({
+            'date': date.strftime('%Y-%m-%d'),
+            'day_of_week': date.strftime('%A'),
+            'temperature': round(day['temp']['day'], 1),
+            'temp_min': round(day['temp']['min'], 1),
+            'temp_max': round(day['temp']['max'], 1),
+            'weather': day['weather'][0]['description'],
+            'weather_main': day['weather'][0]['main'],
+            'humidity': day['humidity'],
+            'wind_speed': day['wind_speed'],
+            'pop': day.get('pop', 0) * 100  # 降水確率(%)
+        })
+
+    return formatted_forecast
+
+
 def get_current_weather(city_name):
     """
     現在の天気を取得
+    短時間のキャッシュを使い、同じ都市への同時リクエストは1回の上流呼び出しにまとめる
 
     Args:
         city_name: 都市名
@@ -91,6 +392,65 @@ def get_current_weather(city_name):
     Returns:
         dict: 現在の天気データ
     """
+    record_access(None, city_name)
+    app = current_app._get_current_object()
+    key = _normalize_city_name(city_name)
+    try:
+        return _current_weather_cache.get_or_load(
+            key,
+            _current_weather_loader(app, city_name),
+            ttl=app.config['CURRENT_WEATHER_CACHE_TTL'],
+            stale_ttl=app.config['CURRENT_WEATHER_CACHE_STALE_TTL']
+        )
+    except UpstreamUnavailable:
+        # 利用枠切れ・サーキットオープンの場合は期限切れのキャッシュがあればそれを返す
+        return _current_weather_cache.peek(key)
+
+
+def refresh_current_weather(city_name, min_remaining=0):
+    """
+    現在の天気を上流から取得し直してキャッシュを更新(キャッシュウォーマー用)
+
+    Args:
+        city_name: 都市名
+        min_remaining: キャッシュの残りTTLがこの秒数以上なら取得しない
+
+    Returns:
+        bool: 上流から取得した場合True
+    """
+    key = _normalize_city_name(city_name)
+    remaining = _current_weather_cache.remaining_ttl(key)
+    if remaining is not None and remaining >= min_remaining:
+        return False
+
+    app = current_app._get_current_object()
+    weather_data = _current_weather_loader(app, city_name)()
+    if weather_data is not None:
+        _current_weather_cache.set(
+            key,
+            weather_data,
+            ttl=app.config['CURRENT_WEATHER_CACHE_TTL'],
+            stale_ttl=app.config['CURRENT_WEATHER_CACHE_STALE_TTL']
+        )
+    return True
+
+
+def _current_weather_loader(app, city_name):
+    """キャッシュミス時に現在の天気を取得する関数を返す"""
+    key = ('current', _normalize_city_name(city_name))
+
+    def load():
+        with app.app_context():
+            if _is_known_not_found(city_name):
+                return None
+            return _weather_flight.do(
+                key, lambda: _fetch_current_weather(city_name))
+
+    return load
+
+
+def _fetch_current_weather(city_name):
+    """OpenWeather APIから現在の天気を取得して整形"""
     try:
         api_key = current_app.config['OPEN_WEATHER_API_KEY']
         base_url = current_app.config['OPEN_WEATHER_API_URL']
@@ -103,22 +463,192 @@ def get_current_weather(city_name):
             'lang': 'ja'
         }
 
-        response = requests.get(url, params=params, timeout=10)
+        response = http_client.get(url, params=params, upstream='openweather')
+        if response.status_code == 404:
+            _remember_not_found(city_name)
+            return None
         response.raise_for_status()
         data = response.json()
 
-        return {
-            'temperature': round(data['main']['temp'], 1),
-            'feels_like': round(data['main']['feels_like'], 1),
-            'temp_min': round(data['main']['temp_min'], 1),
-            'temp_max': round(data['main']['temp_max'], 1),
-            'humidity': data['main']['humidity'],
-            'weather': data['weather'][0]['description'],
-            'weather_main': data['weather'][0]['main'],
-            'wind_speed': data['wind']['speed'],
-            'city_name': data['name']
-        }
+        # 予報で再利用できるよう座標を保存
+        if 'coord' in data:
+            _save_coordinates_from_response(city_name, data)
+
+        return _format_current_weather(data)
+
+    except UpstreamUnavailable:
+        raise
+    except Exception as e:
+        current_app.logger.error(f"Current weather error: {str(e)}")
+        return None
+
+
+def _format_current_weather(data):
+    """現在の天気APIの応答を整形"""
+    return {
+        'temperature': round(data['main']['temp'], 1),
+        'feels_like': round(data['main']['feels_like'], 1),
+        'temp_min': round(data['main']['temp_min'], 1),
+        'temp_max': round(data['main']['temp_max'], 1),
+        'humidity': data['main']['humidity'],
+        'weather': data['weather'][0]['description'],
+        'weather_main': data['weather'][0]['main'],
+        'wind_speed': data['wind']['speed'],
+        'city_name': data['name']
+    }
+
+
+# ---- 非同期版(ASGIエントリーポイント用) ----
+# キャッシュ・サーキットブレーカー・利用枠は同期版と共有する
+
+_async_weather_flight = AsyncSingleFlight('weather_async')
+
+
+async def get_weather_forecast_async(city_name, days=7, lang='ja', units='metric'):
+    """
+    get_weather_forecast の非同期版
+
+    Args:
+        city_name: 都市名
+        days: 取得する日数(デフォルト7日)
+        lang: 言語(デフォルト'ja')
+        units: 単位(デフォルト'metric')
+
+    Returns:
+        list: 天気予報データのリスト
+    """
+    record_access(None, city_name)
+    app = current_app._get_current_object()
+    key = _forecast_key(city_name, days, lang, units)
+
+    async def load():
+        with app.app_context():
+            if _is_known_not_found(city_name):
+                return None
+            return await _async_weather_flight.do(
+                ('forecast',) + key,
+                lambda: _fetch_weather_forecast_async(city_name, days, lang, units)
+            )
+
+    try:
+        return await _forecast_cache.aget_or_load(
+            key,
+            load,
+            ttl=app.config['WEATHER_CACHE_TTL'],
+            stale_ttl=app.config['WEATHER_CACHE_STALE_TTL']
+        )
+    except UpstreamUnavailable:
+        # 利用枠切れ・サーキットオープンの場合は期限切れのキャッシュがあればそれを返す
+        return _forecast_cache.peek(key)
+
+
+async def _fetch_weather_forecast_async(city_name, days, lang, units):
+    """OpenWeather APIから天気予報を非同期で取得して整形"""
+    try:
+        api_key = current_app.config['OPEN_WEATHER_API_KEY']
+        base_url = current_app.config['OPEN_WEATHER_API_URL']
+
+        coords = await run_sync(get_city_coordinates, city_name)
+        if coords:
+            lat, lon = coords
+        else:
+            response = await async_http_client.get(
+                f"{base_url}/weather",
+                params={'q': city_name, 'appid': api_key, 'units': units, 'lang': lang},
+                upstream='openweather'
+            )
+            if response.status_code == 404:
+                _remember_not_found(city_name)
+                return None
+            response.raise_for_status()
+            current_data = response.json()
+
+            lat = current_data['coord']['lat']
+            lon = current_data['coord']['lon']
+            await run_sync(_save_coordinates_from_response, city_name, current_data)
+
+        forecast_response = await async_http_client.get(
+            f"{base_url}/onecall",
+            params={
+                'lat': lat,
+                'lon': lon,
+                'appid': api_key,
+                'units': units,
+                'lang': lang,
+                'exclude': 'minutely,hourly,alerts'
+            },
+            upstream='openweather'
+        )
+        forecast_response.raise_for_status()
+        return _format_forecast(forecast_response.json(), days)
+
+    except UpstreamUnavailable:
+        raise
+    except Exception as e:
+        current_app.logger.error(f"Weather forecast error: {str(e)}")
+        return None
+
+
+async def get_current_weather_async(city_name):
+    """
+    get_current_weather の非同期版
+
+    Args:
+        city_name: 都市名
+
+    Returns:
+        dict: 現在の天気データ
+    """
+    record_access(None, city_name)
+    app = current_app._get_current_object()
+    key = _normalize_city_name(city_name)
+
+    async def load():
+        with app.app_context():
+            if _is_known_not_found(city_name):
+                return None
+            return await _async_weather_flight.do(
+                ('current', key), lambda: _fetch_current_weather_async(city_name))
+
+    try:
+        return await _current_weather_cache.aget_or_load(
+            key,
+            load,
+            ttl=app.config['CURRENT_WEATHER_CACHE_TTL'],
+            stale_ttl=app.config['CURRENT_WEATHER_CACHE_STALE_TTL']
+        )
+    except UpstreamUnavailable:
+        # 利用枠切れ・サーキットオープンの場合は期限切れのキャッシュがあればそれを返す
+        return _current_weather_cache.peek(key)
+
+
+async def _fetch_current_weather_async(city_name):
+    """OpenWeather APIから現在の天気を非同期で取得して整形"""
+    try:
+        response = await async_http_client.get(
+            f"{current_app.config['OPEN_WEATHER_API_URL']}/weather",
+            params={
+                'q': city_name,
+                'appid': current_app.config['OPEN_WEATHER_API_KEY'],
+                'units': 'metric',
+                'lang': 'ja'
+            },
+            upstream='openweather'
+        )
+        if response.status_code == 404:
+            _remember_not_found(city_name)
+            return None
+        response.raise_for_status()
+        data = response.json()
+
+        # 予報で再利用できるよう座標を保存
+        if 'coord' in data:
+            await run_sync(_save_coordinates_from_response, city_name, data)
+
+        return _format_current_weather(data)
 
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         current_app.logger.error(f"Current weather error: {str(e)}")
         return None
@@ -0,0 +1,23 @@
+"""
+JoyJaunt バックエンド ASGIエントリーポイント
+
+天気・ニュース・危険度の主要なAPIを非同期で処理する(app/asgi.py を参照)。
+それ以外のエンドポイントはFlaskアプリケーションがそのまま処理する。
+
+起動例:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+import os
+from dotenv import load_dotenv
+from app import create_app
+from app.asgi import create_asgi_app
+
+# 環境変数をロード
+load_dotenv()
+
+# 環境に応じてアプリケーションを作成
+# ASGIサーバーはWerkzeugのリローダーを使わないため、既定は本番設定にする
+# (開発設定はリローダー前提でバックグラウンドジョブを起動しない)
+config_name = os.getenv('FLASK_ENV', 'production')
+flask_app = create_app(config_name)
+application = create_asgi_app(flask_app)
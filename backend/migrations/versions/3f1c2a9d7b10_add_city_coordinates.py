@@ -0,0 +1,28 @@
+"""add city coordinates
+
+Revision ID: 3f1c2a9d7b10
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('city', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('Latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('Longitude', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('city', schema=None) as batch_op:
+        batch_op.drop_column('Longitude')
+        batch_op.drop_column('Latitude')
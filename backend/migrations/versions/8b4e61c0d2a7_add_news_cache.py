@@ -0,0 +1,37 @@
+"""add news cache
+
+Revision ID: 8b4e61c0d2a7
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e61c0d2a7'
+down_revision = '3f1c2a9d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'news_cache',
+        sa.Column('CacheKey', sa.String(length=255), nullable=False),
+        sa.Column('Payload', sa.Text(), nullable=False),
+        sa.Column('CreatedAt', sa.DateTime(), nullable=False),
+        sa.Column('ExpiresAt', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('CacheKey')
+    )
+    with op.batch_alter_table('news_cache', schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_news_cache_ExpiresAt'), ['ExpiresAt'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('news_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_news_cache_ExpiresAt'))
+
+    op.drop_table('news_cache')
@@ -0,0 +1,26 @@
+"""add news ingest last read
+
+Revision ID: a4c6e8d0f213
+Revises: e5a8f3b1c902
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c6e8d0f213'
+down_revision = 'e5a8f3b1c902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('news_ingest_state', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('LastReadAt', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('news_ingest_state', schema=None) as batch_op:
+        batch_op.drop_column('LastReadAt')
@@ -0,0 +1,67 @@
+"""add news article store
+
+Revision ID: c7d9e2f4a311
+Revises: 8b4e61c0d2a7
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d9e2f4a311'
+down_revision = '8b4e61c0d2a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'news_article',
+        sa.Column('ID', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('CountryName', sa.String(length=52), nullable=False),
+        sa.Column('CityName', sa.String(length=35), nullable=False),
+        sa.Column('UrlHash', sa.String(length=40), nullable=False),
+        sa.Column('Url', sa.Text(), nullable=False),
+        sa.Column('Title', sa.Text(), nullable=True),
+        sa.Column('Description', sa.Text(), nullable=True),
+        sa.Column('Source', sa.String(length=255), nullable=True),
+        sa.Column('UrlToImage', sa.Text(), nullable=True),
+        sa.Column('PublishedAt', sa.DateTime(), nullable=False),
+        sa.Column('IsDanger', sa.Boolean(), nullable=False),
+        sa.Column('FetchedAt', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('ID'),
+        sa.UniqueConstraint('CountryName', 'CityName', 'UrlHash',
+                            name='uq_news_article_location_url')
+    )
+    with op.batch_alter_table('news_article', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_news_article_location_published',
+            ['CountryName', 'CityName', 'PublishedAt'], unique=False)
+
+    op.create_table(
+        'news_ingest_state',
+        sa.Column('CountryName', sa.String(length=52), nullable=False),
+        sa.Column('CityName', sa.String(length=35), nullable=False),
+        sa.Column('LastPublishedAt', sa.DateTime(), nullable=True),
+        sa.Column('LastPolledAt', sa.DateTime(), nullable=True),
+        sa.Column('CreatedAt', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('CountryName', 'CityName')
+    )
+    with op.batch_alter_table('news_ingest_state', schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_news_ingest_state_LastPolledAt'),
+            ['LastPolledAt'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('news_ingest_state', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_news_ingest_state_LastPolledAt'))
+
+    op.drop_table('news_ingest_state')
+
+    with op.batch_alter_table('news_article', schema=None) as batch_op:
+        batch_op.drop_index('ix_news_article_location_published')
+
+    op.drop_table('news_article')
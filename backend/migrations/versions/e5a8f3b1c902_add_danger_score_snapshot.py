@@ -0,0 +1,43 @@
+"""add danger score snapshot
+
+Revision ID: e5a8f3b1c902
+Revises: c7d9e2f4a311
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a8f3b1c902'
+down_revision = 'c7d9e2f4a311'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'danger_score_snapshot',
+        sa.Column('CountryName', sa.String(length=52), nullable=False),
+        sa.Column('CityName', sa.String(length=35), nullable=False),
+        sa.Column('BaseScore', sa.Float(), nullable=False),
+        sa.Column('NewsCount', sa.Integer(), nullable=False),
+        sa.Column('NewsAdjustment', sa.Float(), nullable=False),
+        sa.Column('Score', sa.Float(), nullable=False),
+        sa.Column('IsDangerous', sa.Boolean(), nullable=False),
+        sa.Column('RecentNews', sa.Text(), nullable=False),
+        sa.Column('ComputedAt', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('CountryName', 'CityName')
+    )
+    with op.batch_alter_table('danger_score_snapshot', schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_danger_score_snapshot_ComputedAt'),
+            ['ComputedAt'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('danger_score_snapshot', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_danger_score_snapshot_ComputedAt'))
+
+    op.drop_table('danger_score_snapshot')
@@ -0,0 +1,313 @@
+"""
+JoyJaunt 外部APIモックサーバー
+NewsAPI・OpenWeatherの代わりにローカルで応答し、利用枠を消費せずに負荷試験を行うためのもの
+
+実装しているエンドポイント:
+- GET /data/2.5/weather      現在の天気(都市名で検索)
+- GET /data/2.5/onecall      日別の天気予報(緯度経度で検索)
+- GET /geo/1.0/reverse       逆ジオコーディング
+- GET /v2/everything         NewsAPIの記事検索(from / to / pageSize に対応)
+
+応答の内容・遅延・エラーはリクエストの内容とシード値から決まるため、
+同じ設定・同じリクエストなら毎回同じ結果になる。
+
+使い方:
+    python mock_upstream.py --latency-ms 80 --error-rate 0.05
+
+    # バックエンド側(.env など)
+    NEWS_API_URL=http://localhost:5055/v2/everything
+    OPEN_WEATHER_API_URL=http://localhost:5055/data/2.5
+    OPEN_WEATHER_GEO_URL=http://localhost:5055/geo/1.0
+"""
+import argparse
+import hashlib
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from flask import Flask, jsonify, request
+
+app = Flask(__name__)
+
+# 実行時の設定(コマンドライン引数・環境変数で上書き)
+settings = {
+    'latency_ms': 50,
+    'jitter_ms': 0,
+    'error_rate': 0.0,
+    'articles': 20,
+    'payload_bytes': 200,
+    'seed': 42,
+    'not_found': {'nowhere'}
+}
+
+# 逆ジオコーディング用の都市 (都市名, 国コード, 緯度, 経度)
+CITIES = [
+    ('Tokyo', 'JP', 35.6762, 139.6503),
+    ('Osaka', 'JP', 34.6937, 135.5023),
+    ('Seoul', 'KR', 37.5665, 126.9780),
+    ('Bangkok', 'TH', 13.7563, 100.5018),
+    ('Paris', 'FR', 48.8566, 2.3522),
+    ('London', 'GB', 51.5074, -0.1278),
+    ('Berlin', 'DE', 52.5200, 13.4050),
+    ('New York', 'US', 40.7128, -74.0060),
+    ('Los Angeles', 'US', 34.0522, -118.2437),
+    ('Sydney', 'AU', -33.8688, 151.2093),
+    ('Cairo', 'EG', 30.0444, 31.2357),
+    ('São Paulo', 'BR', -23.5505, -46.6333)
+]
+
+WEATHER_TYPES = [
+    ('Clear', '晴天'),
+    ('Clouds', '曇り'),
+    ('Rain', '雨'),
+    ('Snow', '雪'),
+    ('Thunderstorm', '雷雨')
+]
+
+HEADLINES = [
+    'Local festival draws record crowds in {place}',
+    'New rail line opens in {place}',
+    'Police investigate assault near {place} station',
+    'Tourism board reports busy season for {place}',
+    'Officials warn of violence after protests in {place}',
+    'Museum in {place} unveils new exhibition',
+    'Murder suspect arrested in {place}',
+    'Heavy traffic expected in {place} this weekend'
+]
+
+
+def _rng(*parts):
+    """リクエストの内容とシード値から決まる乱数生成器"""
+    key = '|'.join(str(p) for p in (settings['seed'],) + parts)
+    digest = hashlib.sha256(key.encode('utf-8')).digest()
+    return random.Random(int.from_bytes(digest[:8], 'big'))
+
+
+def _request_key():
+    """パスとクエリパラメータ(apiKey除く)からリクエストを識別する文字列"""
+    params = sorted(
+        (k, v) for k, v in request.args.items(multi=True)
+        if k not in ('apiKey', 'appid')
+    )
+    return f"{request.path}?{params}"
+
+
+@app.before_request
+def simulate_upstream():
+    """設定に従って遅延を入れ、一定割合のリクエストをエラーにする"""
+    rng = _rng('upstream', _request_key())
+    delay = settings['latency_ms']
+    if settings['jitter_ms']:
+        delay += rng.uniform(0, settings['jitter_ms'])
+    if delay > 0:
+        time.sleep(delay / 1000)
+
+    if rng.random() < settings['error_rate']:
+        return jsonify({'status': 'error', 'message': 'Simulated upstream error'}), 500
+
+
+def _padding(rng):
+    """記事の概要を指定サイズまで埋める文字列"""
+    size = settings['payload_bytes']
+    words = ['travel', 'city', 'report', 'update', 'local', 'news', 'visitors']
+    text = []
+    length = 0
+    while length <= size:
+        word = rng.choice(words)
+        text.append(word)
+        length += len(word) + 1
+    return ' '.join(text)[:size]
+
+
+def _city_for(city_name):
+    """都市名から (正式な都市名, 国コード, 緯度, 経度) を決める(既知の都市は実際の値)"""
+    for city in CITIES:
+        if city[0].casefold() == city_name.casefold():
+            return city
+    rng = _rng('coord', city_name.casefold())
+    return city_name, None, round(rng.uniform(-60, 70), 4), round(rng.uniform(-180, 180), 4)
+
+
+@app.route('/data/2.5/weather', methods=['GET'])
+def current_weather():
+    city_name = ' '.join(request.args.get('q', '').split())
+    if not city_name or city_name.casefold() in settings['not_found']:
+        return jsonify({'cod': '404', 'message': 'city not found'}), 404
+
+    name, country, lat, lon = _city_for(city_name)
+    rng = _rng('weather', city_name.casefold(), datetime.now(timezone.utc).strftime('%Y%m%d%H'))
+    main, description = rng.choice(WEATHER_TYPES)
+    temp = round(rng.uniform(-5, 35), 1)
+    return jsonify({
+        'coord': {'lat': lat, 'lon': lon},
+        'weather': [{'main': main, 'description': description}],
+        'main': {
+            'temp': temp,
+            'feels_like': round(temp + rng.uniform(-3, 3), 1),
+            'temp_min': round(temp - rng.uniform(0, 5), 1),
+            'temp_max': round(temp + rng.uniform(0, 5), 1),
+            'humidity': rng.randint(20, 100)
+        },
+        'wind': {'speed': round(rng.uniform(0, 15), 1)},
+        'sys': {'country': country} if country else {},
+        'name': name
+    })
+
+
+@app.route('/data/2.5/onecall', methods=['GET'])
+def onecall():
+    try:
+        lat = float(request.args['lat'])
+        lon = float(request.args['lon'])
+    except (KeyError, ValueError):
+        return jsonify({'cod': '400', 'message': 'wrong latitude or longitude'}), 400
+
+    today = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0)
+    daily = []
+    for i in range(8):
+        day = today + timedelta(days=i)
+        rng = _rng('onecall', round(lat, 2), round(lon, 2), day.strftime('%Y%m%d'))
+        main, description = rng.choice(WEATHER_TYPES)
+        temp = round(rng.uniform(-5, 35), 1)
+        daily.append({
+            'dt': int(day.timestamp()),
+            'temp': {
+                'day': temp,
+                'min': round(temp - rng.uniform(0, 6), 1),
+                'max': round(temp + rng.uniform(0, 6), 1)
+            },
+            'weather': [{'main': main, 'description': description}],
+            'humidity': rng.randint(20, 100),
+            'wind_speed': round(rng.uniform(0, 15), 1),
+            'pop': round(rng.random(), 2)
+        })
+
+    return jsonify({'lat': lat, 'lon': lon, 'daily': daily})
+
+
+@app.route('/geo/1.0/reverse', methods=['GET'])
+def reverse_geocoding():
+    try:
+        lat = float(request.args['lat'])
+        lon = float(request.args['lon'])
+    except (KeyError, ValueError):
+        return jsonify({'cod': '400', 'message': 'wrong latitude or longitude'}), 400
+
+    name, country, city_lat, city_lon = min(
+        CITIES, key=lambda c: (c[2] - lat) ** 2 + (c[3] - lon) ** 2)
+    return jsonify([{
+        'name': name,
+        'local_names': {'ja': name},
+        'lat': city_lat,
+        'lon': city_lon,
+        'country': country,
+        'state': ''
+    }])
+
+
+def _parse_time(value):
+    """from / to の日時(ISO 8601、タイムゾーンなしはUTC)をdatetimeに変換(不正な値はNone)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+@app.route('/v2/everything', methods=['GET'])
+def everything():
+    query = request.args.get('q', '')
+    if not query:
+        return jsonify({'status': 'error', 'code': 'parametersMissing'}), 400
+
+    try:
+        page_size = min(int(request.args.get('pageSize', 100)), 100)
+    except ValueError:
+        page_size = 100
+
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    since = _parse_time(request.args.get('from'))
+    until = _parse_time(request.args.get('to'))
+
+    # 場所名はクエリ中の最初の "..." を使う
+    place = query.split('"')[1] if '"' in query else query
+    # (a OR b ...) があればキーワードを含む見出しだけを使う
+    headlines = HEADLINES
+    if '(' in query and ')' in query:
+        terms = [t.strip().lower() for t in query[query.index('(') + 1:query.index(')')].split(' OR ')]
+        headlines = [h for h in HEADLINES if any(t in h.lower() for t in terms)] or HEADLINES
+    rng = _rng('news', query)
+    total = settings['articles'] + rng.randint(0, settings['articles'])
+
+    articles = []
+    for i in range(total):
+        article_rng = _rng('article', query, i)
+        # 約3時間ごとに新しい記事が出る想定で公開日時を決める
+        published = now.replace(minute=0, second=0) - timedelta(hours=i * 3 + article_rng.randint(0, 2))
+        if since and published < since:
+            break
+        # to より新しい記事は飛ばす(取り込みの遡り取得用、NewsAPIと同じく to の日時を含む)
+        if until and published > until:
+            continue
+        articles.append({
+            'source': {'id': None, 'name': article_rng.choice(['Mock Times', 'Daily Mock', 'Mock Wire'])},
+            'title': article_rng.choice(headlines).format(place=place),
+            'description': _padding(article_rng),
+            'url': f"https://mock.example/{hashlib.sha1(f'{query}|{i}'.encode()).hexdigest()[:16]}",
+            'urlToImage': f"https://mock.example/img/{i}.jpg",
+            'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'content': None
+        })
+
+    return jsonify({
+        'status': 'ok',
+        'totalResults': len(articles),
+        'articles': articles[:page_size]
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JoyJaunt 外部APIモックサーバー')
+    parser.add_argument('--host', default=os.getenv('MOCK_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('MOCK_PORT', 5055)))
+    parser.add_argument('--latency-ms', type=float,
+                        default=float(os.getenv('MOCK_LATENCY_MS', settings['latency_ms'])),
+                        help='全リクエストに入れる遅延(ミリ秒)')
+    parser.add_argument('--jitter-ms', type=float,
+                        default=float(os.getenv('MOCK_JITTER_MS', settings['jitter_ms'])),
+                        help='遅延に加える揺らぎの最大値(ミリ秒)')
+    parser.add_argument('--error-rate', type=float,
+                        default=float(os.getenv('MOCK_ERROR_RATE', settings['error_rate'])),
+                        help='500を返すリクエストの割合(0〜1)')
+    parser.add_argument('--articles', type=int,
+                        default=int(os.getenv('MOCK_ARTICLES', settings['articles'])),
+                        help='1クエリあたりの記事数の目安')
+    parser.add_argument('--payload-bytes', type=int,
+                        default=int(os.getenv('MOCK_PAYLOAD_BYTES', settings['payload_bytes'])),
+                        help='記事の概要の長さ(バイト)')
+    parser.add_argument('--seed', type=int,
+                        default=int(os.getenv('MOCK_SEED', settings['seed'])))
+    parser.add_argument('--not-found',
+                        default=os.getenv('MOCK_NOT_FOUND', 'Nowhere'),
+                        help='404を返す都市名(カンマ区切り)')
+    args = parser.parse_args()
+
+    settings.update({
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'error_rate': args.error_rate,
+        'articles': args.articles,
+        'payload_bytes': args.payload_bytes,
+        'seed': args.seed,
+        'not_found': {name.strip().casefold() for name in args.not_found.split(',') if name.strip()}
+    })
+
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+テスト共通のフィクスチャ
+
+データベースはインメモリのSQLite、外部APIは requests.Session.get を差し替えた
+FakeUpstream で代用する(サーキットブレーカーと利用枠はそのまま通る)。
+"""
+import os
+
+# 設定はインポート時に環境変数から読み込まれるため、アプリケーションより先に設定する
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['CITY_INDEX_PRELOAD'] = 'false'
+os.environ['NEWS_API_KEY'] = 'test-news-key'
+os.environ['OPEN_WEATHER_API_KEY'] = 'test-weather-key'
+
+import pytest  # noqa: E402
+import requests  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db as _db  # noqa: E402
+
+
+class FakeResponse:
+    """requests.Response の代わり"""
+
+    def __init__(self, payload=None, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error", response=self)
+
+
+class FakeUpstream:
+    """
+    外部APIの代わり
+    URLに含まれる文字列ごとに応答(辞書・FakeResponse・params を受け取る関数)を登録する
+    """
+
+    def __init__(self):
+        self.calls = []
+        self._routes = []
+
+    def route(self, fragment, handler):
+        """後から登録した応答を優先する"""
+        self._routes.insert(0, (fragment, handler))
+
+    def calls_to(self, fragment):
+        return [params for url, params in self.calls if fragment in url]
+
+    def __call__(self, url, params=None, **kwargs):
+        params = dict(params or {})
+        self.calls.append((url, params))
+        for fragment, handler in self._routes:
+            if fragment in url:
+                response = handler(params) if callable(handler) else handler
+                if isinstance(response, FakeResponse):
+                    return response
+                return FakeResponse(response)
+        raise AssertionError(f"想定外の上流呼び出し: {url}")
+
+
+class FakeAsyncClient:
+    """httpx.AsyncClient の代わり(FakeUpstream に応答を任せる)"""
+
+    is_closed = False
+
+    def __init__(self, upstream):
+        self._upstream = upstream
+
+    async def get(self, url, params=None, **kwargs):
+        return self._upstream(url, params=params)
+
+    async def aclose(self):
+        pass
+
+
+def weather_payload(lat=35.68, lon=139.69, name='Tokyo', country='JP'):
+    """OpenWeather /weather の応答"""
+    return {
+        'coord': {'lat': lat, 'lon': lon},
+        'main': {'temp': 20.0, 'feels_like': 19.0, 'temp_min': 18.0,
+                 'temp_max': 22.0, 'humidity': 50},
+        'weather': [{'description': '晴れ', 'main': 'Clear'}],
+        'wind': {'speed': 3.0},
+        'sys': {'country': country},
+        'name': name
+    }
+
+
+def onecall_payload(days=8):
+    """OpenWeather /onecall の応答"""
+    return {
+        'daily': [
+            {
+                'dt': 1700000000 + i * 86400,
+                'temp': {'day': 20.0, 'min': 15.0, 'max': 25.0},
+                'weather': [{'description': '晴れ', 'main': 'Clear'}],
+                'humidity': 50,
+                'wind_speed': 3.0
+            }
+            for i in range(days)
+        ]
+    }
+
+
+def news_payload(titles=(), total=None):
+    """NewsAPI /everything の応答"""
+    articles = [
+        {
+            'title': title,
+            'description': '',
+            'url': f"https://example.com/{i}",
+            'publishedAt': f"2026-10-{17 - i % 10:02d}T00:00:00Z",
+            'source': {'name': 'Example'}
+        }
+        for i, title in enumerate(titles)
+    ]
+    return {
+        'status': 'ok',
+        'totalResults': len(articles) if total is None else total,
+        'articles': articles
+    }
+
+
+def _reset_module_state():
+    """プロセス内に保持している状態を初期化する(テスト間で持ち越さない)"""
+    from app.services import cache, cache_warmer, danger_board, geocoding_service, weather_service
+    from app.services.country_catalog import invalidate_country_catalog
+
+    for instance in cache._registry.values():
+        instance.clear()
+    with weather_service._city_coordinates_lock:
+        weather_service._city_coordinates.clear()
+    with cache_warmer._access_lock:
+        cache_warmer._access_counts.clear()
+        cache_warmer._city_countries.clear()
+    danger_board._board = None
+    geocoding_service._city_index = None
+    geocoding_service._city_index_built_at = None
+    invalidate_country_catalog()
+
+
+@pytest.fixture
+def app():
+    """テスト用のアプリケーション(テーブル作成済み)"""
+    app = create_app('development')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        _db.create_all()
+        _reset_module_state()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def countries(db):
+    """countryテーブルに数か国を登録する"""
+    from app.models import Country
+
+    rows = [
+        Country(Code='JPN', Name='Japan', Continent='Asia'),
+        Country(Code='AFG', Name='Afghanistan', Continent='Asia'),
+        Country(Code='FRA', Name='France', Continent='Europe'),
+        Country(Code='USA', Name='United States', Continent='North America')
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """外部APIの代わり(呼び出しは upstream.calls に記録される)"""
+    from app.services.async_http_client import async_http_client
+
+    fake = FakeUpstream()
+    monkeypatch.setattr(
+        requests.Session, 'get', lambda session, url, **kwargs: fake(url, **kwargs))
+    monkeypatch.setattr(async_http_client, '_get_client', lambda: FakeAsyncClient(fake))
+    return fake
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """time.monotonic の代わり(advance で進める)"""
+    class Clock:
+        def __init__(self):
+            self.now = 1000.0
+
+        def monotonic(self):
+            return self.now
+
+        def advance(self, seconds):
+            self.now += seconds
+
+    return Clock()
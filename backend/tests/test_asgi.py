@@ -0,0 +1,149 @@
+"""
+ASGIアプリケーション(app/asgi.py・非同期ルート)のテスト
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from conftest import FakeResponse, news_payload, onecall_payload, weather_payload
+from app.asgi import create_asgi_app
+from app.models import City
+
+
+@pytest.fixture
+def asgi(app):
+    asgi_app = create_asgi_app(app)
+
+    def request(method, url, **kwargs):
+        async def send():
+            transport = httpx.ASGITransport(app=asgi_app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                return await client.request(method, url, **kwargs)
+        return asyncio.run(send())
+
+    return request
+
+
+def test_current_weather_is_cached_across_requests(asgi, upstream):
+    upstream.route('/weather', weather_payload())
+
+    first = asgi('GET', '/api/weather/current_weather?city=Tokyo')
+    second = asgi('GET', '/api/weather/current_weather?city=%20tokyo')
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert len(upstream.calls_to('/weather')) == 1
+
+
+def test_forecast_saves_coordinates(asgi, db, countries, upstream):
+    db.session.add(City(Name='Kyoto', CountryCode='JPN'))
+    db.session.commit()
+    upstream.route('/weather', weather_payload(name='Kyoto'))
+    upstream.route('/onecall', onecall_payload())
+
+    response = asgi('GET', '/api/weather/weather_forecast?city=Kyoto')
+
+    assert response.status_code == 200
+    assert len(response.json()['forecast']) == 7
+    city = db.session.query(City).one()
+    assert (city.Latitude, city.Longitude) == (35.68, 139.69)
+
+
+def test_location_news_and_validation(asgi, upstream):
+    upstream.route('newsapi', news_payload(['Attack reported', 'Crime rises']))
+
+    response = asgi('POST', '/api/news/location_news', json={'country': 'Japan'})
+    missing = asgi('POST', '/api/news/location_news', json={'country': ' '})
+
+    assert response.status_code == 200
+    assert response.json()['news_count'] == 2
+    assert missing.status_code == 400
+
+
+def test_unified_news_shares_one_fetch(asgi, app, upstream):
+    app.config['NEWS_UNIFIED_FETCH'] = True
+    recent = (datetime.now(timezone.utc) - timedelta(days=1)).strftime('%Y-%m-%dT00:00:00Z')
+    older = (datetime.now(timezone.utc) - timedelta(days=5)).strftime('%Y-%m-%dT00:00:00Z')
+    upstream.route('newsapi', {'status': 'ok', 'totalResults': 2, 'articles': [
+        {'title': 'Festival opens', 'publishedAt': recent, 'source': {}},
+        {'title': 'Attack reported', 'publishedAt': older, 'source': {}},
+    ]})
+
+    danger = asgi('POST', '/api/news/location_news', json={'country': 'Japan'}).json()
+    general = asgi('POST', '/api/news/general_news', json={'country': 'Japan', 'days': 3}).json()
+
+    assert [a['title'] for a in danger['articles']] == ['Attack reported']
+    assert [a['title'] for a in general['articles']] == ['Festival opens']
+    assert len(upstream.calls_to('newsapi')) == 1
+
+
+def test_general_news_rejects_invalid_days(asgi, upstream):
+    response = asgi('POST', '/api/news/general_news', json={'country': 'Japan', 'days': 365})
+
+    assert response.status_code == 400
+    assert upstream.calls_to('newsapi') == []
+
+
+def test_realtime_danger(asgi, countries, upstream):
+    upstream.route('newsapi', news_payload(['Attack reported']))
+
+    response = asgi('POST', '/api/danger/check_realtime_danger', json={'country': 'japan'})
+    unknown = asgi('POST', '/api/danger/check_realtime_danger', json={'country': 'Atlantis'})
+
+    assert response.status_code == 200
+    assert response.json()['news_count'] == 1
+    assert unknown.status_code == 404
+
+
+def test_danger_by_location_falls_back_to_nearest_city(asgi, countries, upstream):
+    upstream.route('/reverse', FakeResponse({'message': 'error'}, 500))
+    upstream.route('newsapi', news_payload())
+    upstream.route('/weather', weather_payload(48.86, 2.35, 'Paris', 'FR'))
+    upstream.route('/onecall', onecall_payload())
+
+    response = asgi('POST', '/api/danger/check_danger_by_location',
+                    json={'latitude': 48.86, 'longitude': 2.35})
+
+    assert response.status_code == 200
+    location = response.json()['location']
+    assert (location['city'], location['country']) == ('Paris', 'France')
+
+
+@pytest.mark.parametrize('body', [
+    {'latitude': 48.86, 'longitude': 2.35, 'time_budget': 'soon'},
+    {'latitude': 48.86},
+    {'latitude': 91, 'longitude': 2.35}
+])
+def test_danger_by_location_validation_matches_flask(asgi, client, body):
+    async_response = asgi('POST', '/api/danger/check_danger_by_location', json=body)
+    flask_response = client.post('/api/danger/check_danger_by_location', json=body)
+
+    assert async_response.status_code == flask_response.status_code == 400
+    assert async_response.json() == flask_response.get_json()
+
+
+def test_other_routes_and_streams_are_handled_by_flask(asgi, countries, upstream):
+    upstream.route('newsapi', news_payload(['Attack reported']))
+
+    countries_response = asgi('GET', '/api/location/countries')
+    stream = asgi('POST', '/api/news/location_news',
+                  json={'country': 'Japan', 'stream': 'ndjson'})
+
+    assert countries_response.status_code == 200
+    assert len(countries_response.json()) == 4
+    assert stream.headers['content-type'].startswith('application/x-ndjson')
+    assert len(stream.text.strip().splitlines()) == 3
+
+
+def test_cors_headers_follow_allowed_origins(asgi, upstream):
+    upstream.route('/weather', weather_payload())
+
+    allowed = asgi('GET', '/api/weather/current_weather',
+                   headers={'Origin': 'http://localhost:3000'})
+    denied = asgi('GET', '/api/weather/current_weather',
+                  headers={'Origin': 'http://evil.example'})
+
+    assert allowed.headers['access-control-allow-origin'] == 'http://localhost:3000'
+    assert 'access-control-allow-origin' not in denied.headers
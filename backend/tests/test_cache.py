@@ -0,0 +1,159 @@
+"""
+TTLCache(TTL・LRU・stale-while-revalidate)のテスト
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.services import cache as cache_module
+from app.services.cache import Expiring, TTLCache
+
+
+@pytest.fixture
+def ttl_cache(monkeypatch, clock):
+    monkeypatch.setattr(cache_module, 'time', clock)
+    return TTLCache('test_cache', max_size=3)
+
+
+def test_get_or_load_caches_until_ttl(ttl_cache, clock):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return len(calls)
+
+    assert ttl_cache.get_or_load('k', loader, ttl=10) == 1
+    clock.advance(9)
+    assert ttl_cache.get_or_load('k', loader, ttl=10) == 1
+    clock.advance(2)
+    assert ttl_cache.get_or_load('k', loader, ttl=10) == 2
+    assert len(calls) == 2
+
+
+def test_none_is_not_cached(ttl_cache):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return None
+
+    assert ttl_cache.get_or_load('k', loader, ttl=10) is None
+    assert ttl_cache.get_or_load('k', loader, ttl=10) is None
+    assert len(calls) == 2
+
+
+def test_expiring_shortens_ttl(ttl_cache, clock):
+    ttl_cache.get_or_load('k', lambda: Expiring('v', 5), ttl=60)
+    clock.advance(4)
+    assert ttl_cache.get('k') == 'v'
+    clock.advance(2)
+    assert ttl_cache.get('k') is None
+
+
+def test_lru_evicts_least_recently_used(ttl_cache):
+    for key in ('a', 'b', 'c'):
+        ttl_cache.set(key, key, ttl=60)
+    assert ttl_cache.get('a') == 'a'
+
+    ttl_cache.set('d', 'd', ttl=60)
+
+    assert ttl_cache.get('b') is None
+    assert [ttl_cache.get(key) for key in ('a', 'c', 'd')] == ['a', 'c', 'd']
+    assert ttl_cache.stats()['evictions'] == 1
+
+
+def test_resize_drops_oldest(ttl_cache):
+    for key in ('a', 'b', 'c'):
+        ttl_cache.set(key, key, ttl=60)
+    ttl_cache.resize(1)
+    assert ttl_cache.get('a') is None
+    assert ttl_cache.get('c') == 'c'
+
+
+def test_stale_value_is_served_while_refreshing(ttl_cache, clock):
+    ttl_cache.set('k', 'old', ttl=10, stale_ttl=100)
+    clock.advance(11)
+
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'new'
+
+    # 古い値を即座に返し、再取得はキーごとに1本だけ
+    assert ttl_cache.get_or_load('k', loader, ttl=10, stale_ttl=100) == 'old'
+    assert started.wait(5)
+    assert ttl_cache.get_or_load('k', loader, ttl=10, stale_ttl=100) == 'old'
+    release.set()
+
+    for _ in range(100):
+        if ttl_cache.get('k') == 'new':
+            break
+        threading.Event().wait(0.01)
+    assert ttl_cache.get('k') == 'new'
+    assert len(calls) == 1
+    assert ttl_cache.stats()['stale_hits'] == 2
+
+
+def test_refresh_error_keeps_stale_value(ttl_cache, clock):
+    ttl_cache.set('k', 'old', ttl=10, stale_ttl=100)
+    clock.advance(11)
+
+    def loader():
+        raise RuntimeError('upstream down')
+
+    assert ttl_cache.get_or_load('k', loader, ttl=10, stale_ttl=100) == 'old'
+    for _ in range(100):
+        if ttl_cache.stats()['refresh_errors']:
+            break
+        threading.Event().wait(0.01)
+    assert ttl_cache.stats()['refresh_errors'] == 1
+    assert ttl_cache.peek('k') == 'old'
+
+
+def test_past_stale_window_loads_synchronously(ttl_cache, clock):
+    ttl_cache.set('k', 'old', ttl=10, stale_ttl=5)
+    clock.advance(20)
+    assert ttl_cache.get_or_load('k', lambda: 'new', ttl=10, stale_ttl=5) == 'new'
+    assert ttl_cache.stats()['misses'] == 1
+
+
+def test_aget_or_load(ttl_cache, clock):
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return f"v{len(calls)}"
+
+    async def scenario():
+        first = await ttl_cache.aget_or_load('k', loader, ttl=10, stale_ttl=100)
+        clock.advance(11)
+        stale = await ttl_cache.aget_or_load('k', loader, ttl=10, stale_ttl=100)
+        # 裏の再取得タスクを完了させる
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return first, stale
+
+    first, stale = asyncio.run(scenario())
+    assert (first, stale) == ('v1', 'v1')
+    assert ttl_cache.get('k') == 'v2'
+
+
+def test_weather_forecast_is_cached(client, upstream):
+    from conftest import onecall_payload, weather_payload
+
+    upstream.route('/weather', weather_payload())
+    upstream.route('/onecall', onecall_payload())
+
+    first = client.get('/api/weather/weather_forecast?city=Tokyo')
+    second = client.get('/api/weather/weather_forecast?city=%20tokyo%20')
+
+    assert first.status_code == 200
+    assert len(first.get_json()['forecast']) == 7
+    assert second.get_json() == first.get_json()
+    assert len(upstream.calls_to('/onecall')) == 1
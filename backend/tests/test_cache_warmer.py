@@ -0,0 +1,112 @@
+"""
+キャッシュウォーマー(cache_warmer)のテスト
+"""
+import pytest
+
+from conftest import news_payload, onecall_payload, weather_payload
+from app.services import cache_warmer
+from app.services.cache_warmer import (
+    MinuteBudget, get_accessed_destinations, record_access, warm_caches
+)
+from app.services.weather_service import (
+    get_current_weather, get_weather_forecast, save_city_coordinates
+)
+
+
+@pytest.fixture
+def weather(upstream):
+    upstream.route('/weather', weather_payload())
+    upstream.route('/onecall', onecall_payload())
+    upstream.route('newsapi', news_payload(['Attack reported']))
+    return upstream
+
+
+@pytest.fixture
+def destinations(monkeypatch):
+    """ウォーム対象の目的地を固定する"""
+    def use(*places):
+        monkeypatch.setattr(cache_warmer, 'get_top_destinations', lambda limit: list(places))
+    return use
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    """統計をテストごとに数え直す"""
+    monkeypatch.setattr(cache_warmer, '_stats', dict(
+        cache_warmer._stats, **dict.fromkeys(
+            ('runs', 'refreshed', 'skipped_fresh', 'skipped_budget',
+             'skipped_circuit', 'errors'), 0)))
+
+
+def _stats():
+    return cache_warmer.get_cache_warmer_stats()
+
+
+def test_weather_and_news_accesses_count_as_one_destination(app):
+    record_access(None, 'Tokyo')
+    record_access('Japan', ' Tokyo ')
+    record_access(None, 'Tokyo')
+    record_access('France', 'Paris')
+
+    assert get_accessed_destinations(10) == [('Japan', 'Tokyo'), ('France', 'Paris')]
+    assert cache_warmer._access_counts[('Japan', 'Tokyo')] == 3
+
+
+def test_warm_caches_refreshes_missing_entries(app, weather, destinations):
+    destinations(('Japan', 'Tokyo'))
+    budget = MinuteBudget(10)
+
+    warm_caches(app, budget)
+
+    assert _stats()['refreshed'] == 3
+    # 座標が未登録の天気予報は座標取得の分も含めて2回、現在の天気とニュースで各1回
+    assert len(weather.calls) == 4
+    assert budget.remaining() == 6
+
+
+def test_forecast_is_charged_for_both_upstream_calls(app, weather, destinations):
+    destinations(('', 'Tokyo'))
+    budget = MinuteBudget(2)
+
+    warm_caches(app, budget)
+
+    # 予報に2回分を使い、現在の天気は枠が足りずに飛ばす
+    assert (_stats()['refreshed'], _stats()['skipped_budget']) == (1, 1)
+    assert len(weather.calls) == 2
+    assert budget.remaining() == 0
+
+
+def test_known_coordinates_charge_one_call(app, db, weather, destinations):
+    save_city_coordinates('Tokyo', 35.68, 139.69)
+    destinations(('', 'Tokyo'))
+    budget = MinuteBudget(2)
+
+    warm_caches(app, budget)
+
+    assert _stats()['refreshed'] == 2
+    assert budget.remaining() == 0
+
+
+def test_freshly_cached_entries_are_not_refetched(app, weather, destinations):
+    # 現在の天気のTTL(300秒)は実行間隔 + 先読み(360秒)より短い
+    app.config['CURRENT_WEATHER_CACHE_TTL'] = 300
+    get_current_weather('Tokyo')
+    get_weather_forecast('Tokyo')
+    calls = len(weather.calls)
+    destinations(('', 'Tokyo'))
+    budget = MinuteBudget(10)
+
+    warm_caches(app, budget)
+
+    assert _stats()['skipped_fresh'] == 2
+    assert len(weather.calls) == calls
+    assert budget.remaining() == 10
+
+
+def test_min_remaining_stays_below_each_ttl(app):
+    app.config['CACHE_WARMER_INTERVAL'] = 300
+    app.config['CACHE_WARMER_REFRESH_AHEAD'] = 60
+
+    assert cache_warmer._min_remaining(app, 1800) == 360
+    assert cache_warmer._min_remaining(app, 300) == 240
+    assert cache_warmer._min_remaining(app, 100) == 50
@@ -0,0 +1,193 @@
+"""
+サーキットブレーカー(circuit_breaker)と404の記録のテスト
+"""
+import pytest
+import requests
+
+from conftest import FakeResponse, weather_payload
+from app.services import circuit_breaker as breaker_module
+from app.services import rate_limiter
+from app.services.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen, get_breaker
+)
+from app.services.http_client import http_client
+from app.services.rate_limiter import BudgetExhausted, UpstreamBudget
+
+
+@pytest.fixture
+def breaker(monkeypatch, clock):
+    monkeypatch.setattr(breaker_module, 'time', clock)
+    return CircuitBreaker('test', failure_threshold=3, recovery_timeout=30,
+                          half_open_max_calls=1)
+
+
+def _fail(breaker, times):
+    for _ in range(times):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(breaker, clock):
+    _fail(breaker, 2)
+    breaker.record_success()
+    _fail(breaker, 2)
+    assert breaker.stats()['state'] == CLOSED
+
+    _fail(breaker, 1)
+    clock.advance(10)
+
+    with pytest.raises(CircuitOpen) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after == pytest.approx(20)
+    stats = breaker.stats()
+    assert (stats['state'], stats['opened'], stats['rejected']) == (OPEN, 1, 1)
+
+
+def test_half_open_allows_limited_probes(breaker, clock):
+    _fail(breaker, 3)
+    clock.advance(30)
+
+    assert breaker.stats()['state'] == HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+    # 上流を呼ばなかった試行は枠を戻す
+    breaker.release()
+    breaker.before_call()
+
+
+def test_successful_probe_closes(breaker, clock):
+    _fail(breaker, 3)
+    clock.advance(30)
+
+    breaker.before_call()
+    breaker.record_success()
+
+    assert breaker.stats()['state'] == CLOSED
+    breaker.before_call()
+    breaker.before_call()
+
+
+def test_failed_probe_reopens(breaker, clock):
+    _fail(breaker, 3)
+    clock.advance(30)
+
+    _fail(breaker, 1)
+
+    assert breaker.stats()['state'] == OPEN
+    assert breaker.stats()['opened'] == 2
+    clock.advance(29)
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+
+def test_server_errors_open_circuit_and_skip_upstream(app, upstream):
+    app_breaker = get_breaker('openweather')
+    upstream.route('/weather', FakeResponse({'message': 'error'}, 503))
+
+    for _ in range(app.config['CIRCUIT_BREAKER_FAILURE_THRESHOLD']):
+        http_client.get('https://api.example.com/weather', upstream='openweather')
+    with pytest.raises(CircuitOpen):
+        http_client.get('https://api.example.com/weather', upstream='openweather')
+
+    assert len(upstream.calls) == app.config['CIRCUIT_BREAKER_FAILURE_THRESHOLD']
+    assert app_breaker.stats()['state'] == OPEN
+
+
+def test_client_errors_and_connection_errors(app, upstream):
+    app_breaker = get_breaker('openweather')
+
+    def refuse(params):
+        raise requests.exceptions.ConnectionError('refused')
+
+    upstream.route('/weather', FakeResponse({'message': 'city not found'}, 404))
+    upstream.route('/broken', refuse)
+
+    # 404は上流の障害として数えない
+    http_client.get('https://api.example.com/weather', upstream='openweather')
+    assert app_breaker.stats()['consecutive_failures'] == 0
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        http_client.get('https://api.example.com/broken', upstream='openweather')
+    assert app_breaker.stats()['consecutive_failures'] == 1
+
+
+def test_budget_exhaustion_releases_half_open_probe(app, upstream, monkeypatch, clock):
+    monkeypatch.setattr(breaker_module, 'time', clock)
+    monkeypatch.setitem(rate_limiter._budgets, 'test', UpstreamBudget('test', 0, 1))
+    test_breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=30)
+    monkeypatch.setitem(breaker_module._breakers, 'test', test_breaker)
+    upstream.route('/weather', weather_payload())
+
+    _fail(test_breaker, 1)
+    clock.advance(30)
+    rate_limiter._budgets['test']._used_today = 1
+
+    with pytest.raises(BudgetExhausted):
+        http_client.get('https://api.example.com/weather', upstream='test')
+    rate_limiter._budgets['test']._used_today = 0
+    http_client.get('https://api.example.com/weather', upstream='test')
+
+    assert test_breaker.stats()['state'] == CLOSED
+
+
+@pytest.fixture
+def half_open(monkeypatch, clock):
+    """ハーフオープン状態の上流 'test'(試行枠は1つ)"""
+    monkeypatch.setattr(breaker_module, 'time', clock)
+    test_breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=30)
+    monkeypatch.setitem(breaker_module._breakers, 'test', test_breaker)
+    _fail(test_breaker, 1)
+    clock.advance(30)
+    return test_breaker
+
+
+def test_unexpected_error_releases_half_open_probe(app, upstream, half_open):
+    def explode(params):
+        raise KeyError('coord')
+
+    upstream.route('/broken', explode)
+    upstream.route('/weather', weather_payload())
+
+    with pytest.raises(KeyError):
+        http_client.get('https://api.example.com/broken', upstream='test')
+    # 上流の障害ではないのでオープンには戻さず、次の試行を通す
+    assert half_open.stats()['state'] == HALF_OPEN
+    http_client.get('https://api.example.com/weather', upstream='test')
+
+    assert half_open.stats()['state'] == CLOSED
+
+
+def test_cancelled_async_probe_is_released(app, half_open, monkeypatch):
+    import asyncio
+
+    from app.services.async_http_client import async_http_client
+
+    class HangingClient:
+        async def get(self, url, params=None):
+            await asyncio.sleep(10)
+
+    monkeypatch.setattr(async_http_client, '_get_client', lambda: HangingClient())
+
+    async def probe():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                async_http_client.get('https://api.example.com/weather', upstream='test'), 0.05)
+
+    asyncio.run(probe())
+
+    # 締め切りで中断した試行の枠は戻っている
+    half_open.before_call()
+
+
+def test_not_found_city_is_remembered(app, upstream):
+    from app.services.weather_service import get_current_weather
+
+    upstream.route('/weather', FakeResponse({'message': 'city not found'}, 404))
+
+    with app.test_request_context():
+        assert get_current_weather('Atlantis') is None
+        assert get_current_weather(' atlantis ') is None
+
+    assert len(upstream.calls_to('/weather')) == 1
@@ -0,0 +1,86 @@
+"""
+都市座標の保存(save_city_coordinates)のテスト
+"""
+from conftest import onecall_payload, weather_payload
+from app.models import City
+from app.services import weather_service
+from app.services.weather_service import get_city_coordinates, save_city_coordinates
+
+
+def _add_city(db, name, country, lat=None, lon=None):
+    db.session.add(City(Name=name, CountryCode=country, Latitude=lat, Longitude=lon))
+    db.session.commit()
+
+
+def _cities(db):
+    return [(c.Name, c.CountryCode, c.Latitude, c.Longitude)
+            for c in db.session.query(City).order_by(City.ID)]
+
+
+def test_existing_row_is_matched_ignoring_case_and_spaces(app, db, countries):
+    _add_city(db, 'New York', 'USA')
+
+    save_city_coordinates('new  york', 40.71, -74.0, 'US')
+
+    assert _cities(db) == [('New York', 'USA', 40.71, -74.0)]
+
+
+def test_upstream_name_matches_when_query_differs(app, db, countries):
+    _add_city(db, 'Tokyo', 'JPN')
+
+    save_city_coordinates('Tokio', 35.68, 139.69, 'JP', upstream_name='Tokyo')
+
+    assert _cities(db) == [('Tokyo', 'JPN', 35.68, 139.69)]
+
+
+def test_unknown_names_are_never_inserted(app, db, countries, caplog):
+    # 検索語・国名はCityテーブルに追加しない
+    save_city_coordinates('London,uk', 51.5, -0.12, 'GB', upstream_name='London')
+    save_city_coordinates('Japan', 35.0, 135.0, 'JP', upstream_name='Japan')
+
+    assert _cities(db) == []
+    assert '座標未登録の都市がありません' in caplog.text
+    # メモリには残るため同じプロセスでは再利用できる
+    assert get_city_coordinates('japan') == (35.0, 135.0)
+
+
+def test_country_disambiguates_same_name(app, db, countries):
+    _add_city(db, 'Paris', 'USA')
+    _add_city(db, 'Paris', 'FRA')
+
+    # 国が分からない場合はどちらも更新しない
+    save_city_coordinates('Paris', 48.85, 2.35)
+    save_city_coordinates('Paris', 48.85, 2.35, 'FRA')
+
+    assert _cities(db) == [('Paris', 'USA', None, None), ('Paris', 'FRA', 48.85, 2.35)]
+
+
+def test_saved_coordinates_are_not_overwritten(app, db, countries):
+    _add_city(db, 'Kyoto', 'JPN', 35.01, 135.77)
+
+    save_city_coordinates('Kyoto', 0.0, 0.0, 'JP')
+
+    assert _cities(db) == [('Kyoto', 'JPN', 35.01, 135.77)]
+
+
+def test_stored_coordinates_are_read_back_after_restart(app, db, countries):
+    _add_city(db, 'Kyoto', 'JPN')
+    save_city_coordinates('Kyoto', 35.01, 135.77, 'JP')
+    weather_service._city_coordinates.clear()
+
+    assert get_city_coordinates(' KYOTO ') == (35.01, 135.77)
+
+
+def test_forecast_persists_coordinates_and_skips_lookup(client, db, countries, upstream):
+    _add_city(db, 'Kyoto', 'JPN')
+    upstream.route('/weather', weather_payload(name='Kyoto'))
+    upstream.route('/onecall', onecall_payload())
+
+    assert client.get('/api/weather/weather_forecast?city=Kyoto').status_code == 200
+    weather_service._city_coordinates.clear()
+    weather_service._forecast_cache.clear()
+    assert client.get('/api/weather/weather_forecast?city=kyoto').status_code == 200
+
+    assert _cities(db) == [('Kyoto', 'JPN', 35.68, 139.69)]
+    assert len(upstream.calls_to('/weather')) == 1
+    assert len(upstream.calls_to('/onecall')) == 2
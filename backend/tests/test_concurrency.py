@@ -0,0 +1,141 @@
+"""
+並行実行ユーティリティと旅行情報のストリーミング応答のテスト
+"""
+import json
+import threading
+
+import pytest
+
+from app.routes import danger as danger_routes
+from app.services.concurrency import iter_concurrently, run_concurrently
+
+
+@pytest.fixture
+def blocker():
+    """テスト終了時に必ず解放するイベント(ワーカースレッドを残さない)"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_run_concurrently_collects_results_errors_and_timeouts(app, blocker):
+    def fail():
+        raise ValueError('boom')
+
+    results, timed_out, errors = run_concurrently({
+        'ok': (lambda x: x * 2, (21,)),
+        'error': (fail, ()),
+        'slow': (blocker.wait, (5,))
+    }, timeout=0.2)
+
+    assert results == {'ok': 42}
+    assert timed_out == ['slow']
+    assert isinstance(errors['error'], ValueError)
+
+
+def test_run_concurrently_waits_for_required(app):
+    release = threading.Timer(0.3, lambda: None)
+    release.start()
+
+    results, timed_out, _ = run_concurrently(
+        {'required': (lambda: release.join() or 'done', ())},
+        timeout=0.05, required=('required',))
+
+    assert results == {'required': 'done'}
+    assert timed_out == []
+
+
+def test_slow_tasks_of_earlier_requests_do_not_hold_workers(app, blocker):
+    app.config['REQUEST_FANOUT_MAX_WORKERS'] = 2
+    # 締め切りを過ぎても終わらない処理でワーカー数の上限まで埋める
+    _, timed_out, _ = run_concurrently({
+        'slow_a': (blocker.wait, (5,)),
+        'slow_b': (blocker.wait, (5,))
+    }, timeout=0.05)
+    assert timed_out == ['slow_a', 'slow_b']
+
+    # 次のリクエストの処理は前のリクエストの処理を待たずに実行される
+    results, timed_out, _ = run_concurrently(
+        {'cached': (lambda: 'hit', ())}, timeout=1)
+
+    assert results == {'cached': 'hit'}
+    assert timed_out == []
+
+
+def test_iter_concurrently_reports_pending_tasks_as_timed_out(app, blocker):
+    def fail():
+        raise ValueError('boom')
+
+    events = list(iter_concurrently({
+        'fast': (lambda: 'ok', ()),
+        'error': (fail, ()),
+        'slow_b': (blocker.wait, (5,)),
+        'slow_a': (blocker.wait, (5,))
+    }, timeout=0.2))
+
+    statuses = {name: status for name, status, _ in events}
+    assert statuses == {
+        'fast': 'ok', 'error': 'error', 'slow_a': 'timed_out', 'slow_b': 'timed_out'}
+    # 時間切れの項目は名前順で最後に返す
+    assert [name for name, _, _ in events[-2:]] == ['slow_a', 'slow_b']
+
+
+def _read_ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_travel_info_drops_items_past_deadline(client, app, monkeypatch, blocker):
+    app.config['TRAVEL_INFO_DEADLINE'] = 0.2
+    monkeypatch.setattr(danger_routes, 'calculate_danger_level', lambda *args: {
+        'is_dangerous': False, 'score': 1.0, 'base_score': 1.0, 'news_count': 1,
+        'recent_news': [{'title': 'a'}]
+    })
+    monkeypatch.setattr(
+        danger_routes, 'get_weather_forecast', lambda *args: blocker.wait(5))
+
+    response = client.post(
+        '/api/danger/travel_info', json={'country': 'Japan', 'city': 'Tokyo'})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['timed_out'] == ['weather']
+    assert body['weather'] is None
+    assert body['danger']['score'] == 1.0
+    assert body['recent_news'] == [{'title': 'a'}]
+
+
+def test_travel_info_stream_marks_deadline_overrun(client, app, monkeypatch, blocker):
+    app.config['TRAVEL_INFO_DEADLINE'] = 0.2
+    monkeypatch.setattr(
+        danger_routes, 'calculate_danger_level', lambda *args: blocker.wait(5))
+
+    response = client.post(
+        '/api/danger/travel_info?stream=ndjson', json={'country': 'Japan'})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    events = _read_ndjson(response)
+    assert [event['event'] for event in events] == ['base_score', 'done']
+    assert events[0]['data']['country'] == 'Japan'
+    assert events[-1]['data'] == {'timed_out': ['danger']}
+
+
+def test_travel_info_stream_sse(client, monkeypatch):
+    monkeypatch.setattr(danger_routes, 'calculate_danger_level', lambda *args: {
+        'is_dangerous': False, 'score': 1.0, 'base_score': 1.0, 'news_count': 1,
+        'recent_news': [{'title': 'a'}]
+    })
+
+    response = client.post(
+        '/api/danger/travel_info', json={'country': 'Japan'},
+        headers={'Accept': 'text/event-stream'})
+
+    body = response.get_data(as_text=True)
+    assert response.mimetype == 'text/event-stream'
+    assert [line[len('event: '):] for line in body.splitlines()
+            if line.startswith('event: ')] == ['base_score', 'danger', 'article', 'done']
+
+
+def test_travel_info_requires_country(client):
+    response = client.post('/api/danger/travel_info?stream=ndjson', json={})
+    assert response.status_code == 400
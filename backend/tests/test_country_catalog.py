@@ -0,0 +1,82 @@
+"""
+国カタログ(country_catalog)と管理用の無効化エンドポイントのテスト
+"""
+import pytest
+
+from app.models import Country
+from app.services import country_catalog, danger_board
+from app.services.country_catalog import get_country_catalog, get_country_catalog_stats
+
+ADMIN_URL = '/admin/country_catalog/invalidate'
+
+
+def _add_country(db, code, name, continent):
+    db.session.add(Country(Code=code, Name=name, Continent=continent))
+    db.session.commit()
+
+
+def test_lookup_by_name_and_code(app, countries):
+    catalog = get_country_catalog()
+
+    assert catalog.by_name(' united  STATES ').code == 'USA'
+    assert catalog.by_code('jpn').name == 'Japan'
+    assert catalog.by_code(' fr ').code == 'FRA'
+    assert catalog.by_code('') is None
+    assert catalog.by_name('Atlantis') is None
+    assert [c['code'] for c in catalog.to_list()] == ['AFG', 'FRA', 'JPN', 'USA']
+
+
+def test_catalog_is_cached_until_invalidated(client, db, countries):
+    assert len(client.get('/api/location/countries').get_json()) == 4
+    _add_country(db, 'DEU', 'Germany', 'Europe')
+
+    assert len(client.get('/api/location/countries').get_json()) == 4
+    country_catalog.invalidate_country_catalog()
+    assert len(client.get('/api/location/countries').get_json()) == 5
+
+
+def test_applied_migration_reloads_catalog(app, db, countries, monkeypatch):
+    app.config['COUNTRY_CATALOG_CHECK_INTERVAL'] = 300
+    catalog = get_country_catalog()
+    db.session.execute(db.text('CREATE TABLE alembic_version (version_num VARCHAR(32))'))
+    db.session.execute(db.text("INSERT INTO alembic_version VALUES ('abc123')"))
+    db.session.commit()
+
+    # 確認間隔が過ぎるまではバージョンを確認しない
+    assert get_country_catalog() is catalog
+    monkeypatch.setattr(country_catalog, '_catalog_checked_at', 0.0)
+    reloaded = get_country_catalog()
+
+    assert reloaded is not catalog
+    assert reloaded.migration_version == 'abc123'
+    monkeypatch.setattr(country_catalog, '_catalog_checked_at', 0.0)
+    assert get_country_catalog() is reloaded
+    db.session.execute(db.text('DROP TABLE alembic_version'))
+    db.session.commit()
+
+
+def test_admin_endpoint_is_disabled_without_token(client, app):
+    app.config['ADMIN_API_TOKEN'] = ''
+    assert client.post(ADMIN_URL).status_code == 404
+
+
+@pytest.mark.parametrize('headers', [{}, {'X-Admin-Token': 'wrong'}])
+def test_admin_endpoint_rejects_bad_token(client, app, headers):
+    app.config['ADMIN_API_TOKEN'] = 'secret'
+    assert client.post(ADMIN_URL, headers=headers).status_code == 401
+
+
+def test_admin_endpoint_invalidates_catalog_and_board(client, app, db, countries):
+    app.config['ADMIN_API_TOKEN'] = 'secret'
+    client.get('/api/danger/scores')
+    _add_country(db, 'DEU', 'Germany', 'Europe')
+    invalidations = get_country_catalog_stats()['invalidations']
+
+    response = client.post(ADMIN_URL, headers={'X-Admin-Token': 'secret'})
+
+    assert response.status_code == 200
+    assert get_country_catalog_stats()['invalidations'] == invalidations + 1
+    assert danger_board._board_stale
+    germany = next(c for c in client.get('/api/danger/scores').get_json()['countries']
+                   if c['country'] == 'Germany')
+    assert germany['code'] == 'DEU'
@@ -0,0 +1,103 @@
+"""
+危険度一覧(/api/danger/scores)のテスト
+"""
+import pytest
+
+from app.services import danger_board
+from app.services.danger_snapshot import write_danger_snapshot
+
+URL = '/api/danger/scores'
+
+
+def _by_name(body):
+    return {country['country']: country for country in body['countries']}
+
+
+def test_scores_cover_all_countries_without_calling_upstream(client, countries, upstream):
+    response = client.get(URL)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['country_count'] == len(body['countries']) > 100
+    japan = _by_name(body)['Japan']
+    assert (japan['code'], japan['continent']) == ('JPN', 'Asia')
+    assert japan['news_count'] is None
+    assert japan['danger_score'] == japan['base_score']
+    assert {'city', 'danger_score', 'danger_level'} <= set(japan['cities'][0])
+    assert response.headers['ETag']
+    assert 'max-age' in response.headers['Cache-Control']
+    assert upstream.calls == []
+
+
+def test_matching_etag_returns_304(client, countries):
+    etag = client.get(URL).headers['ETag']
+
+    response = client.get(URL, headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_filters_by_continent_and_code(client, countries):
+    asia = client.get(URL + '?continent=asia').get_json()
+    codes = client.get(URL + '?code=fra, jpn').get_json()
+
+    assert set(_by_name(asia)) == {'Japan', 'Afghanistan'}
+    assert set(_by_name(codes)) == {'France', 'Japan'}
+    assert client.get(URL + '?continent=Atlantis').status_code == 400
+
+
+def test_filtered_responses_have_their_own_etag(client, countries):
+    everything = client.get(URL).headers['ETag']
+    asia = client.get(URL + '?continent=Asia').headers['ETag']
+
+    assert everything != asia
+    response = client.get(URL + '?continent=Asia', headers={'If-None-Match': everything})
+    assert response.status_code == 200
+
+
+def test_board_and_rendered_body_are_reused(app, countries):
+    with app.app_context():
+        board = danger_board.get_danger_board()
+        first = board.render(app, 'Asia')
+
+        assert danger_board.get_danger_board() is board
+        assert board.render(app, 'ASIA') is first
+    assert danger_board.get_danger_board_stats()['builds'] >= 1
+
+
+def test_snapshot_update_changes_scores_and_etag(client, app, countries):
+    app.config['DANGER_SNAPSHOT_ENABLED'] = True
+    before = client.get(URL)
+
+    with app.app_context():
+        write_danger_snapshot('Japan', '', {
+            'score': 2.0, 'base_score': 1.2, 'news_count': 4,
+            'news_adjustment': 0.8, 'is_dangerous': False, 'recent_news': []
+        })
+        danger_board.invalidate_danger_board()
+    after = client.get(URL, headers={'If-None-Match': before.headers['ETag']})
+
+    assert after.status_code == 200
+    assert after.headers['ETag'] != before.headers['ETag']
+    japan = _by_name(after.get_json())['Japan']
+    assert japan['news_count'] == 4
+    assert japan['danger_score'] > japan['base_score']
+
+
+def test_expired_board_is_rebuilt(client, app, countries, monkeypatch):
+    with app.app_context():
+        board = danger_board.get_danger_board()
+    monkeypatch.setattr(board, 'built_at', board.built_at - 3600)
+
+    client.get(URL)
+
+    assert danger_board._board is not board
+
+
+@pytest.mark.parametrize('news_count', [None, 0])
+def test_missing_news_count_uses_base_score(news_count):
+    entry = danger_board._score_entry(2.0, news_count)
+
+    assert entry['danger_score'] == entry['base_score'] == 2.0
+    assert entry['news_count'] == news_count
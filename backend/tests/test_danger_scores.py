@@ -0,0 +1,126 @@
+"""
+危険度スコアのインデックス(danger_scores)のテスト
+"""
+import json
+import os
+
+import pytest
+
+from app.services import danger_scores
+from app.services.danger_scores import (
+    DangerScoreIndex, get_danger_index, lookup_danger_score, normalize_place_name,
+    reload_danger_scores
+)
+
+DATA = {
+    'version': 1,
+    'updated': '2026-10-01',
+    'countries': {
+        'Côte d\'Ivoire': {'score': 3.1, 'aliases': ['Ivory Coast'],
+                           'cities': {'Abidjan': 3.3}},
+        'Czech Republic': {'score': 1.7, 'aliases': ['Czechia'],
+                           'cities': {'Prague': 1.9}, 'city_aliases': {'Prague': ['Praha']}},
+        'Poland': {'score': 2.0, 'cities': {'Łódź': 2.0, 'Kraków': 1.9},
+                   'city_aliases': {'Gdansk': ['Danzig']}},
+        'Georgia': {'score': 2.2, 'aliases': ['Poland']},
+    }
+}
+
+
+@pytest.mark.parametrize('name, expected', [
+    ("Côte d'Ivoire ", 'cote divoire'),
+    ('Mazar-i-Sharif', 'mazar i sharif'),
+    ('  ŁÓDŹ ', 'lodz'),
+    ('St. Petersburg', 'st petersburg'),
+    ('', ''),
+    (None, ''),
+])
+def test_normalize_place_name(name, expected):
+    assert normalize_place_name(name) == expected
+
+
+def test_lookup_by_name_alias_and_variant_spelling():
+    index = DangerScoreIndex(DATA)
+
+    assert index.lookup('cote d’ivoire') == (3.1, "Côte d'Ivoire", None)
+    assert index.lookup('IVORY  COAST', 'abidjan') == (3.3, "Côte d'Ivoire", 'Abidjan')
+    assert index.lookup('Czechia', 'Praha') == (1.9, 'Czech Republic', 'Prague')
+    assert index.lookup('poland', 'Lodz') == (2.0, 'Poland', 'Łódź')
+    assert index.lookup('Poland', 'krakow') == (1.9, 'Poland', 'Kraków')
+
+
+def test_unknown_city_falls_back_to_country_and_unknown_country_is_none():
+    index = DangerScoreIndex(DATA)
+
+    assert index.lookup('Poland', 'Atlantis') == (2.0, 'Poland', None)
+    assert index.lookup('Atlantis') is None
+    assert index.lookup('') is None
+
+
+def test_alias_never_shadows_official_name():
+    index = DangerScoreIndex(DATA)
+
+    # Georgia の別名 "Poland" は正式名称の Poland より優先されない
+    assert index.lookup('Poland')[1] == 'Poland'
+    # 未登録の都市の別名は無視する
+    assert index.lookup('Poland', 'Danzig') == (2.0, 'Poland', None)
+
+
+def test_countries_keep_file_order_and_counts():
+    index = DangerScoreIndex(DATA)
+
+    assert [name for name, _, _ in index.countries()] == list(DATA['countries'])
+    assert (len(index), index.city_count) == (4, 4)
+
+
+def test_bundled_data_file_loads(app):
+    with app.app_context():
+        index = get_danger_index()
+
+    assert len(index) > 100
+    assert index.lookup('Japan', 'tokyo')[1:] == ('Japan', 'Tokyo')
+
+
+@pytest.fixture
+def data_file(app, tmp_path, monkeypatch):
+    path = tmp_path / 'danger_scores.json'
+    path.write_text(json.dumps(DATA), encoding='utf-8')
+    app.config['DANGER_SCORES_PATH'] = str(path)
+    monkeypatch.setattr(danger_scores, '_index', None)
+    monkeypatch.setattr(danger_scores, '_index_mtime', None)
+    monkeypatch.setattr(danger_scores, '_index_checked_at', 0.0)
+    return path
+
+
+def _rewrite(path, data):
+    stat = path.stat()
+    path.write_text(json.dumps(data), encoding='utf-8')
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+
+def test_changed_file_is_reloaded_after_check_interval(app, data_file, monkeypatch):
+    app.config['DANGER_SCORES_CHECK_INTERVAL'] = 30
+    with app.app_context():
+        assert lookup_danger_score('Poland')[0] == 2.0
+
+        changed = json.loads(json.dumps(DATA))
+        changed['countries']['Poland']['score'] = 2.5
+        _rewrite(data_file, changed)
+        # 確認間隔が過ぎるまでは読み直さない
+        assert lookup_danger_score('Poland')[0] == 2.0
+
+        monkeypatch.setattr(danger_scores, '_index_checked_at', 0.0)
+        assert lookup_danger_score('Poland')[0] == 2.5
+
+
+def test_broken_file_keeps_previous_index(app, data_file, monkeypatch):
+    with app.app_context():
+        index = get_danger_index()
+        data_file.write_text('{broken', encoding='utf-8')
+        os.utime(data_file, (0, data_file.stat().st_mtime + 10))
+
+        with pytest.raises(ValueError):
+            reload_danger_scores()
+        monkeypatch.setattr(danger_scores, '_index_checked_at', 0.0)
+        assert get_danger_index() is index
+        assert danger_scores.get_danger_score_stats()['reload_errors'] >= 1
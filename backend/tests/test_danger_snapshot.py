@@ -0,0 +1,139 @@
+"""
+危険度スナップショット(danger_score_snapshot)のテスト
+"""
+from datetime import timedelta
+
+import pytest
+
+from conftest import news_payload
+from app.models import DangerScoreSnapshot
+from app.services import danger_snapshot
+from app.services.cache_warmer import record_access
+from app.services.danger_snapshot import (
+    _due_locations, refresh_danger_snapshots, write_danger_snapshot
+)
+from app.services.rate_limiter import _budgets
+
+
+def _danger_info(news_count=0, recent_news=None):
+    info = {
+        'score': 1.2 + news_count * 0.2,
+        'base_score': 1.2,
+        'news_count': news_count,
+        'news_adjustment': news_count * 0.2,
+        'is_dangerous': False
+    }
+    if recent_news is not None:
+        info['recent_news'] = recent_news
+    return info
+
+
+def _age_row(db, country, city, seconds):
+    row = db.session.get(DangerScoreSnapshot, (country, city))
+    row.ComputedAt = row.ComputedAt - timedelta(seconds=seconds)
+    db.session.commit()
+
+
+def test_disabled_snapshot_calculates_without_touching_table(client, db, countries, upstream):
+    upstream.route('newsapi', news_payload(['Attack reported']))
+
+    response = client.post('/api/danger/check_realtime_danger', json={'country': 'Japan'})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['news_count'] == 1
+    assert body['recent_news'][0]['title'] == 'Attack reported'
+    assert body['computed_at']
+    assert db.session.query(DangerScoreSnapshot).count() == 0
+
+
+def test_enabled_snapshot_is_served_from_table(client, app, db, countries, upstream):
+    app.config['DANGER_SNAPSHOT_ENABLED'] = True
+    upstream.route('newsapi', news_payload(['Attack reported']))
+
+    first = client.post('/api/danger/check_realtime_danger', json={'country': ' japan '})
+    # 行を書き換えて、2回目がテーブルから読んでいることを確かめる
+    row = db.session.get(DangerScoreSnapshot, ('Japan', ''))
+    row.NewsCount = 3
+    db.session.commit()
+    second = client.post('/api/danger/check_realtime_danger', json={'country': 'Japan'})
+    forced = client.post(
+        '/api/danger/check_realtime_danger?fresh=1', json={'country': 'Japan'})
+
+    assert first.get_json()['news_count'] == 1
+    assert second.get_json()['news_count'] == 3
+    assert forced.get_json()['news_count'] == 1
+
+
+def test_due_locations_only_include_accessed_and_stored(app, db):
+    app.config['DANGER_SNAPSHOT_ENABLED'] = True
+    record_access('japan', 'tokyo')
+    record_access('', 'Paris')  # 国が分からないアクセスは対象外
+    write_danger_snapshot('France', '', _danger_info(recent_news=[]))
+    write_danger_snapshot('Afghanistan', '', _danger_info(recent_news=[]))
+    _age_row(db, 'Afghanistan', '', app.config['DANGER_SNAPSHOT_INTERVAL'] + 1)
+
+    # 危険度データの全ての国・都市ではなく、アクセス先と古くなった保存済みの場所のみ
+    assert _due_locations(100) == [('Japan', 'Tokyo'), ('Afghanistan', '')]
+    assert _due_locations(1) == [('Japan', 'Tokyo')]
+
+
+def test_refresh_uses_count_only_query_and_keeps_recent_news(app, db, upstream):
+    app.config['DANGER_SNAPSHOT_ENABLED'] = True
+    write_danger_snapshot('Japan', '', _danger_info(recent_news=[{'title': 'old'}]))
+    _age_row(db, 'Japan', '', app.config['DANGER_SNAPSHOT_INTERVAL'] + 1)
+    upstream.route('newsapi', news_payload([], total=4))
+
+    assert refresh_danger_snapshots() == 1
+
+    assert [params['pageSize'] for _, params in upstream.calls] == [1]
+    info = db.session.get(DangerScoreSnapshot, ('Japan', '')).to_danger_info()
+    assert info['news_count'] == 4
+    assert info['recent_news'] == [{'title': 'old'}]
+
+
+@pytest.mark.parametrize('used_today, expected', [(70, 0), (69, 1)])
+def test_refresh_is_limited_by_background_budget(app, db, upstream, used_today, expected):
+    app.config['DANGER_SNAPSHOT_ENABLED'] = True
+    record_access('Japan', 'Tokyo')
+    record_access('France', 'Paris')
+    upstream.route('newsapi', news_payload([], total=1))
+    # 1日100件のうち30%はユーザーリクエスト用に残す
+    _budgets['newsapi']._used_today = used_today
+
+    assert refresh_danger_snapshots() == expected
+    assert len(upstream.calls) == expected
+    if expected == 0:
+        assert danger_snapshot.get_danger_snapshot_stats()['skipped_budget'] >= 1
+
+
+def test_refresh_stops_when_upstream_unavailable(app, db, upstream, monkeypatch):
+    from app.services import news_service
+    from app.services.rate_limiter import BudgetExhausted
+
+    app.config['DANGER_SNAPSHOT_ENABLED'] = True
+    record_access('Japan', 'Tokyo')
+    record_access('France', 'Paris')
+
+    def exhausted(*args):
+        raise BudgetExhausted('newsapi')
+
+    monkeypatch.setattr(news_service, '_fetch_news_count', exhausted)
+
+    assert refresh_danger_snapshots() == 0
+    assert db.session.query(DangerScoreSnapshot).count() == 0
+
+
+def test_refresh_uses_the_fetched_count(app, db, countries, upstream):
+    from app.services.news_service import get_news_by_location
+
+    # 記事キャッシュには1件だけの古い結果が残っている
+    upstream.route('newsapi', news_payload(['Attack reported']))
+    get_news_by_location('Japan')
+    upstream.route('newsapi', lambda params: news_payload(
+        ['Attack reported'] * int(params['pageSize']), total=4))
+
+    assert danger_snapshot._refresh_location('Japan', '') is True
+
+    row = db.session.get(DangerScoreSnapshot, ('Japan', ''))
+    assert row.NewsCount == 4
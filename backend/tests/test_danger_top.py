@@ -0,0 +1,72 @@
+"""
+危険度ランキング(/api/danger/top)のテスト
+"""
+import pytest
+
+from app.services.danger_board import DangerBoard
+
+URL = '/api/danger/top'
+
+
+def _country(name, code, continent, score, cities=()):
+    return {
+        'country': name, 'code': code, 'continent': continent, 'danger_score': score,
+        'cities': [{'city': city, 'danger_score': city_score} for city, city_score in cities]
+    }
+
+
+@pytest.fixture
+def board():
+    return DangerBoard([
+        _country('Japan', 'JPN', 'Asia', 1.2, [('Tokyo', 1.4), ('Osaka', 1.3)]),
+        _country('Afghanistan', 'AFG', 'Asia', 4.8, [('Kabul', 4.9)]),
+        _country('France', 'FRA', 'Europe', 2.1, [('Paris', 2.5)]),
+        _country('Iceland', 'ISL', 'Europe', 1.2),
+        _country('Atlantis', None, None, 3.0),
+    ], version=1, index=None)
+
+
+def test_top_countries_in_each_order(board):
+    assert [c['country'] for c in board.top(k=3)] == ['Iceland', 'Japan', 'France']
+    assert [c['country'] for c in board.top(order='dangerous', k=2)] == ['Afghanistan', 'Atlantis']
+    assert 'cities' not in board.top(k=1)[0]
+
+
+def test_top_cities_carry_their_country(board):
+    top = board.top(kind='city', order='dangerous', k=2)
+
+    assert [(c['city'], c['country'], c['code']) for c in top] == [
+        ('Kabul', 'Afghanistan', 'AFG'), ('Paris', 'France', 'FRA')]
+
+
+def test_top_by_continent(board):
+    assert [c['country'] for c in board.top(continent='europe')] == ['Iceland', 'France']
+    assert [c['city'] for c in board.top(kind='city', continent='Asia', k=2)] == ['Osaka', 'Tokyo']
+    assert board.top(continent='Oceania') == []
+
+
+def test_top_endpoint(client, countries, upstream):
+    response = client.get(URL + '?order=dangerous&kind=city&k=3&continent=Asia')
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['order'], body['kind'], body['continent'], body['count']) == (
+        'dangerous', 'city', 'Asia', 3)
+    scores = [r['danger_score'] for r in body['results']]
+    assert scores == sorted(scores, reverse=True)
+    assert {r['country'] for r in body['results']} <= {'Japan', 'Afghanistan'}
+    assert upstream.calls == []
+
+
+def test_top_endpoint_clamps_k(client, app, countries):
+    app.config['DANGER_TOP_MAX_K'] = 5
+
+    assert client.get(URL + '?k=100').get_json()['count'] == 5
+    assert client.get(URL + '?k=0').get_json()['count'] == 1
+
+
+@pytest.mark.parametrize('query', [
+    '?order=random', '?kind=region', '?k=ten', '?continent=Atlantis'
+])
+def test_top_endpoint_rejects_invalid_parameters(client, query):
+    assert client.get(URL + query).status_code == 400
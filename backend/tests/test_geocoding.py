@@ -0,0 +1,94 @@
+"""
+逆ジオコーディングと最寄り都市検索(geocoding_service)のテスト
+"""
+from conftest import FakeResponse, news_payload
+from app.services import geocoding_service
+from app.services.geocoding_service import (
+    find_nearest_city, get_city_index, get_location_from_coordinates, rebuild_city_index
+)
+from app.services.weather_service import save_city_coordinates
+
+REVERSE = [{'name': 'Shinjuku', 'country': 'JP', 'state': 'Tokyo'}]
+
+
+def test_reverse_geocoding_is_cached_per_geohash_cell(app, upstream):
+    upstream.route('/reverse', REVERSE)
+
+    first = get_location_from_coordinates(35.6900, 139.7000)
+    second = get_location_from_coordinates(35.6901, 139.7001)
+
+    assert first['city'] == second['city'] == 'Shinjuku'
+    assert (second['latitude'], second['longitude']) == (35.6901, 139.7001)
+    assert len(upstream.calls_to('/reverse')) == 1
+
+
+def test_falls_back_to_nearest_city_when_upstream_fails(app, countries, upstream):
+    upstream.route('/reverse', FakeResponse({'message': 'error'}, 500))
+
+    location = get_location_from_coordinates(35.70, 139.70)
+
+    assert location['city'] == 'Tokyo'
+    assert location['country'] == 'Japan'
+    assert location['country_code'] == 'JPN'
+
+
+def test_falls_back_to_nearest_city_when_upstream_finds_nothing(app, countries, upstream):
+    upstream.route('/reverse', [])
+
+    assert get_location_from_coordinates(48.80, 2.30)['city'] == 'Paris'
+    # 近くに都市が無ければ特定できない
+    assert get_location_from_coordinates(0.0, -30.0) is None
+
+
+def test_location_danger_uses_fallback(client, countries, upstream, monkeypatch):
+    from app.routes import danger as danger_routes
+
+    upstream.route('/reverse', FakeResponse({'message': 'error'}, 500))
+    upstream.route('newsapi', news_payload())
+    monkeypatch.setattr(danger_routes, 'get_weather_forecast', lambda city: [])
+
+    response = client.post('/api/danger/check_danger_by_location',
+                           json={'latitude': 48.86, 'longitude': 2.35})
+
+    assert response.status_code == 200
+    location = response.get_json()['location']
+    assert (location['city'], location['country']) == ('Paris', 'France')
+
+
+def test_saved_coordinates_are_added_to_index(app, db, countries):
+    from app.models import City
+
+    db.session.add(City(Name='Kyoto', CountryCode='JPN'))
+    db.session.commit()
+    rebuild_city_index()
+    assert find_nearest_city(35.01, 135.77) is None
+
+    save_city_coordinates('Kyoto', 35.0116, 135.7681, 'JP')
+
+    nearest = find_nearest_city(35.01, 135.77)
+    assert (nearest['name'], nearest['country_code']) == ('Kyoto', 'JPN')
+    assert nearest['distance_km'] < 1
+
+
+def test_index_is_reused_until_invalidated(app, db, monkeypatch):
+    index = get_city_index()
+    assert get_city_index() is index
+
+    geocoding_service.invalidate_city_index()
+
+    assert get_city_index() is not index
+
+
+def test_city_added_during_rebuild_triggers_another_rebuild(app, db, monkeypatch):
+    load = geocoding_service._load_indexed_cities
+
+    def load_then_add():
+        cities = load()
+        geocoding_service.invalidate_city_index()
+        return cities
+
+    monkeypatch.setattr(geocoding_service, '_load_indexed_cities', load_then_add)
+    index = rebuild_city_index()
+    monkeypatch.setattr(geocoding_service, '_load_indexed_cities', load)
+
+    assert get_city_index() is not index
@@ -0,0 +1,42 @@
+"""
+共有HTTPクライアント(http_client)のテスト
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from app import create_app
+from app.config import DevelopmentConfig
+from app.services import http_client as http_client_module
+from app.services.http_client import http_client
+
+
+def test_session_is_built_once_with_configured_pool(monkeypatch):
+    created = []
+
+    class CountingSession(requests.Session):
+        def __init__(self):
+            super().__init__()
+            created.append(self)
+
+    monkeypatch.setattr(http_client_module.requests, 'Session', CountingSession)
+    monkeypatch.setattr(DevelopmentConfig, 'HTTP_POOL_CONNECTIONS', 4)
+    monkeypatch.setattr(DevelopmentConfig, 'HTTP_POOL_MAXSIZE', 8)
+    monkeypatch.setattr(DevelopmentConfig, 'HTTP_POOL_BLOCK', False)
+    monkeypatch.setattr(DevelopmentConfig, 'HTTP_READ_TIMEOUT', 7.0)
+
+    app = create_app('development')
+
+    assert app.extensions['http_client'] is http_client
+    assert len(created) == 1
+    # 複数スレッドから参照しても作り直さない
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        sessions = set(executor.map(lambda _: id(http_client.session), range(20)))
+    assert sessions == {id(created[0])}
+    assert len(created) == 1
+
+    adapter = http_client.session.get_adapter('https://api.example.com/')
+    assert adapter is http_client.session.get_adapter('http://api.example.com/')
+    assert (adapter._pool_connections, adapter._pool_maxsize, adapter._pool_block) == (4, 8, False)
+    assert adapter.max_retries.total == 0
+    assert http_client.read_timeout == 7.0
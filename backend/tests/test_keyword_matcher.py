@@ -0,0 +1,80 @@
+"""
+危険関連キーワードの照合(KeywordMatcher)のテスト
+"""
+import pytest
+
+from app.services.keyword_matcher import KeywordMatcher, article_text
+from app.services.news_service import (
+    DANGER_KEYWORD_CATEGORIES, DANGER_KEYWORDS, _danger_news_params, classify_articles,
+    is_danger_article
+)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Crime rises downtown', {'crime'}),
+    ('Two crimes reported', {'crime'}),
+    ('Tourist ATTACKED near station', {'violence'}),
+    ('Attacks on the border', {'violence'}),
+    ('Man murdered in park', {'crime'}),
+    ('Assaulting officers', {'crime'}),
+    ('Terrorism threat level raised', {'terrorism'}),
+    ('Murder and violence', {'crime', 'violence'}),
+])
+def test_true_positives(text, expected):
+    assert set(classify_articles([{'title': text}])[0]) == expected
+    assert is_danger_article({'title': text})
+
+
+@pytest.mark.parametrize('text', [
+    'Crimea peninsula tourism recovers',
+    "The attacker's lawyer spoke",
+    'Attackers fled the scene',
+    'Murderous heat wave',
+    'Nonviolence march draws crowd',
+    'Counterattack in the final minute',
+    'Criminal justice reform',
+    'Festival opens in the capital',
+    '',
+])
+def test_false_positives(text):
+    assert classify_articles([{'title': text}])[0] == {}
+    assert not is_danger_article({'title': text})
+
+
+def test_count_batch_attributes_hits_to_each_text():
+    matcher = KeywordMatcher({'crime': ['crime'], 'violence': ['attack']})
+
+    counts = matcher.count_batch(['crime and crimes', 'no match', 'attack', ''])
+
+    assert [dict(c) for c in counts] == [{'crime': 2}, {}, {'violence': 1}, {}]
+
+
+def test_longer_keyword_wins_over_shorter_prefix():
+    matcher = KeywordMatcher({'short': ['terror'], 'long': ['terrorism']})
+    assert dict(matcher.count('terrorism')) == {'long': 1}
+    assert dict(matcher.count('terrorists')) == {}
+
+
+def test_custom_suffixes():
+    matcher = KeywordMatcher({'violence': ['attack']}, suffixes=('er', 'ers'))
+    assert matcher.search('attackers')
+    assert not matcher.search('attacked')
+    assert KeywordMatcher({'violence': ['attack']}, suffixes=()).count('attacks') == {}
+
+
+def test_empty_categories_never_match():
+    matcher = KeywordMatcher({'crime': []})
+    assert not matcher.search('crime')
+    assert matcher.count_batch(['crime']) == [{}]
+
+
+def test_upstream_keywords_are_derived_from_categories(app):
+    flattened = [k for keywords in DANGER_KEYWORD_CATEGORIES.values() for k in keywords]
+    assert DANGER_KEYWORDS == flattened
+    query = _danger_news_params('Japan', None)['q']
+    assert query.startswith('(' + ' OR '.join(flattened) + ')')
+
+
+def test_article_text_uses_title_and_description():
+    assert article_text({'title': 'a', 'description': None}) == 'a '
+    assert article_text({'title': None, 'description': 'b'}) == ' b'
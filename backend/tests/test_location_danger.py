@@ -0,0 +1,85 @@
+"""
+位置情報ベースの危険度チェック(時間予算)のテスト
+"""
+import threading
+
+import pytest
+
+from app.routes import danger as danger_routes
+
+DANGER = {
+    'is_dangerous': False, 'score': 1.0, 'base_score': 1.0, 'news_count': 0,
+    'news_adjustment': 0.0, 'recent_news': []
+}
+
+
+@pytest.fixture
+def blocker():
+    """テスト終了時に必ず解放するイベント(ワーカースレッドを残さない)"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+@pytest.fixture
+def location(monkeypatch):
+    """逆ジオコーディングと危険度計算を固定値にする"""
+    monkeypatch.setattr(danger_routes, 'get_location_from_coordinates', lambda lat, lon: {
+        'city': 'Tokyo', 'country': 'Japan', 'country_code': 'JP', 'state': ''})
+    monkeypatch.setattr(danger_routes, 'calculate_danger_level', lambda *args: DANGER)
+
+
+@pytest.fixture
+def budgets(monkeypatch):
+    """run_concurrently に渡された締め切りを記録する"""
+    seen = []
+    original = danger_routes.run_concurrently
+
+    def recording(tasks, timeout, required=()):
+        seen.append(timeout)
+        return original(tasks, timeout, required)
+
+    monkeypatch.setattr(danger_routes, 'run_concurrently', recording)
+    return seen
+
+
+def _check(client, **body):
+    return client.post('/api/danger/check_danger_by_location',
+                       json={'latitude': 35.68, 'longitude': 139.65, **body})
+
+
+@pytest.mark.parametrize('requested, limit', [(100, 20), (-5, 0)])
+def test_time_budget_is_clamped(client, app, location, budgets, monkeypatch,
+                                requested, limit):
+    app.config['LOCATION_DANGER_MAX_TIME_BUDGET'] = 20
+    monkeypatch.setattr(danger_routes, 'get_weather_forecast', lambda city: [])
+
+    response = _check(client, time_budget=requested)
+
+    assert response.status_code == 200
+    assert len(budgets) == 1
+    # 逆ジオコーディングなどにかかった時間だけ差し引かれる
+    assert limit - 1 < budgets[0] <= limit
+
+
+def test_non_numeric_time_budget_is_rejected(client, location, budgets):
+    response = _check(client, time_budget='soon')
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid time_budget'
+    assert budgets == []
+
+
+def test_weather_is_dropped_when_budget_expires(client, location, monkeypatch, blocker):
+    monkeypatch.setattr(
+        danger_routes, 'get_weather_forecast', lambda city: blocker.wait(5))
+
+    response = _check(client, time_budget=0.2)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['timed_out'] == ['weather']
+    assert body['weather'] is None
+    # 危険度は必須項目なので時間予算を過ぎても返す
+    assert body['danger']['danger_score'] == 1.0
+    assert body['location']['city'] == 'Tokyo'
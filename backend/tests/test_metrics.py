@@ -0,0 +1,25 @@
+"""
+メトリクスエンドポイント(/metrics)のテスト
+"""
+import pytest
+
+
+def test_metrics_is_disabled_without_token(client, app):
+    app.config['ADMIN_API_TOKEN'] = ''
+    assert client.get('/metrics').status_code == 404
+
+
+@pytest.mark.parametrize('headers', [{}, {'X-Admin-Token': 'wrong'}])
+def test_metrics_rejects_bad_token(client, app, headers):
+    app.config['ADMIN_API_TOKEN'] = 'secret'
+    assert client.get('/metrics', headers=headers).status_code == 401
+
+
+def test_metrics_with_token(client, app):
+    app.config['ADMIN_API_TOKEN'] = 'secret'
+
+    response = client.get('/metrics', headers={'X-Admin-Token': 'secret'})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert {'upstream_budgets', 'circuit_breakers', 'caches', 'jobs'} <= set(body)
@@ -0,0 +1,126 @@
+"""
+外部APIモックサーバー(mock_upstream.py)のテスト
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import mock_upstream
+from app.models import NewsArticle, NewsIngestState
+from app.services.news_ingester import ingest_location, track_location
+
+
+class FakeTime:
+    """time.sleep の代わり(待たずに遅延を記録する)"""
+
+    def __init__(self):
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+@pytest.fixture
+def mock(monkeypatch):
+    """設定をテストごとに戻すモックサーバーのテストクライアント"""
+    for name, value in list(mock_upstream.settings.items()):
+        monkeypatch.setitem(mock_upstream.settings, name, value)
+    monkeypatch.setitem(mock_upstream.settings, 'latency_ms', 0)
+    fake_time = FakeTime()
+    monkeypatch.setattr(mock_upstream, 'time', fake_time)
+    client = mock_upstream.app.test_client()
+    client.time = fake_time
+    return client
+
+
+def _news(mock, **params):
+    return mock.get('/v2/everything', query_string={'q': '"Japan"', **params})
+
+
+def test_latency_and_jitter_are_applied(mock):
+    mock_upstream.settings.update({'latency_ms': 80, 'jitter_ms': 40})
+
+    _news(mock)
+    _news(mock)
+    _news(mock, pageSize=5)
+
+    first, repeated, other = mock.time.sleeps
+    assert 0.08 <= first <= 0.12
+    # 遅延は設定とリクエストの内容から決まる
+    assert repeated == first
+    assert other != first
+
+
+@pytest.mark.parametrize('rate, failures', [(0.0, 0), (1.0, 50)])
+def test_error_rate_bounds(mock, rate, failures):
+    mock_upstream.settings['error_rate'] = rate
+
+    statuses = [_news(mock, pageSize=i + 1).status_code for i in range(50)]
+
+    assert statuses.count(500) == failures
+
+
+def test_errors_are_deterministic_across_runs(mock):
+    mock_upstream.settings['error_rate'] = 0.3
+
+    def failing():
+        return {i for i in range(100) if _news(mock, pageSize=i + 1).status_code == 500}
+
+    first = failing()
+    assert 10 < len(first) < 50
+    assert failing() == first
+
+    # シード値を変えると別の結果になる
+    mock_upstream.settings['seed'] = 7
+    assert failing() != first
+
+
+def test_payload_size_is_configurable(mock):
+    mock_upstream.settings['payload_bytes'] = 500
+
+    articles = _news(mock).get_json()['articles']
+
+    assert articles
+    assert all(len(a['description']) == 500 for a in articles)
+
+
+def test_responses_are_deterministic(mock):
+    assert _news(mock).get_json() == _news(mock).get_json()
+    weather = mock.get('/data/2.5/weather', query_string={'q': 'Tokyo'}).get_json()
+    assert weather == mock.get('/data/2.5/weather', query_string={'q': ' tokyo '}).get_json()
+    assert (weather['name'], weather['sys']['country']) == ('Tokyo', 'JP')
+    assert mock.get('/data/2.5/weather', query_string={'q': 'Nowhere'}).status_code == 404
+
+
+def test_everything_filters_by_from_and_to(mock):
+    everything = _news(mock).get_json()['articles']
+    until = everything[5]['publishedAt']
+    since = everything[10]['publishedAt']
+
+    window = _news(mock, **{'from': since[:19], 'to': until[:19]}).get_json()
+
+    # from・to の日時の記事も含む
+    assert [a['publishedAt'] for a in window['articles']] == [
+        a['publishedAt'] for a in everything[5:11]]
+    assert window['totalResults'] == 6
+
+
+def test_ingester_pages_back_through_mock(app, db, upstream, mock):
+    app.config['NEWS_INGEST_PAGE_SIZE'] = 10
+    app.config['NEWS_INGEST_MAX_PAGES'] = 20
+    upstream.route('newsapi', lambda params: mock.get(
+        '/v2/everything', query_string=params).get_json())
+    track_location('Japan')
+    state = db.session.get(NewsIngestState, ('Japan', ''))
+
+    added = ingest_location(state)
+
+    since = datetime.now(timezone.utc) - timedelta(days=app.config['NEWS_INGEST_LOOKBACK_DAYS'])
+    expected = _news(mock, **{'from': since.strftime('%Y-%m-%dT%H:%M:%S')}).get_json()
+    calls = upstream.calls_to('newsapi')
+    assert expected['totalResults'] > 10
+    assert added == expected['totalResults']
+    assert db.session.query(NewsArticle).count() == added
+    assert len(calls) > 1
+    assert all('to' in call for call in calls[1:])
+    assert state.LastPublishedAt is not None
@@ -0,0 +1,48 @@
+"""
+危険関連ニュースの件数取得(count_news_by_location)のテスト
+"""
+import pytest
+
+from conftest import FakeResponse, news_payload
+from app.services.news_service import (
+    DANGER_NEWS_LIMIT, count_news_by_location, get_news_by_location
+)
+
+
+def test_count_uses_page_size_one_and_total_results(app, upstream):
+    upstream.route('newsapi', news_payload(['Attack reported'], total=3))
+
+    assert count_news_by_location('Japan', 'Tokyo') == 3
+
+    (params,) = upstream.calls_to('newsapi')
+    assert params['pageSize'] == 1
+    assert params['q'].endswith('AND "Tokyo" AND "Japan"')
+    assert 'murder' in params['q']
+
+
+def test_count_is_capped_and_cached(app, upstream):
+    upstream.route('newsapi', news_payload(['Attack reported'], total=40))
+
+    assert count_news_by_location('Japan') == DANGER_NEWS_LIMIT
+    assert count_news_by_location(' japan ') == DANGER_NEWS_LIMIT
+
+    assert len(upstream.calls_to('newsapi')) == 1
+
+
+def test_count_reuses_cached_articles(app, upstream):
+    upstream.route('newsapi', news_payload(['Attack reported', 'Crime rises']))
+    get_news_by_location('Japan')
+
+    assert count_news_by_location('Japan') == 2
+    # 記事を取得済みの場所では件数のための問い合わせをしない
+    assert len(upstream.calls_to('newsapi')) == 1
+
+
+@pytest.mark.parametrize('payload', [
+    FakeResponse({'status': 'error'}, 500),
+    {'status': 'ok', 'articles': []}
+])
+def test_count_without_total_results(app, upstream, payload):
+    upstream.route('newsapi', payload)
+
+    assert count_news_by_location('Japan') == 0
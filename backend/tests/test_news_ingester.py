@@ -0,0 +1,158 @@
+"""
+ニュース取り込み(news_ingester)のテスト
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import NewsArticle, NewsIngestState
+from app.services.news_ingester import (
+    expire_idle_locations, ingest_location, read_stored_news, track_location
+)
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None).replace(microsecond=0)
+
+
+class FakeNewsFeed:
+    """from / to で絞り込み、新しい順に pageSize 件を返すNewsAPIの代わり"""
+
+    def __init__(self, articles):
+        self.articles = sorted(articles, key=lambda a: a['publishedAt'], reverse=True)
+
+    def __call__(self, params):
+        since = params['from']
+        until = params.get('to')
+        matched = [
+            a for a in self.articles
+            if a['publishedAt'][:19] >= since and (until is None or a['publishedAt'][:19] <= until)
+        ]
+        return {
+            'status': 'ok',
+            'totalResults': len(matched),
+            'articles': matched[:params['pageSize']]
+        }
+
+
+def _articles(count, newest, title='Festival opens'):
+    return [
+        {
+            'title': f"{title} {i}",
+            'description': '',
+            'url': f"https://example.com/{newest:%H%M%S}/{i}",
+            'publishedAt': (newest - timedelta(minutes=i)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'source': {'name': 'Example'}
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def state(app, db):
+    track_location(' Japan ', 'Tokyo')
+    return db.session.get(NewsIngestState, ('Japan', 'Tokyo'))
+
+
+def test_ingest_pages_back_to_previous_position(app, db, upstream, state):
+    app.config['NEWS_INGEST_PAGE_SIZE'] = 100
+    newest = _utcnow() - timedelta(minutes=1)
+    upstream.route('newsapi', FakeNewsFeed(_articles(250, newest)))
+
+    assert ingest_location(state) == 250
+
+    # 2ページ目以降は取得済みの最も古い記事の日時を上限にして遡る
+    calls = upstream.calls_to('newsapi')
+    assert len(calls) == 3
+    assert 'to' not in calls[0]
+    assert calls[1]['to'] < newest.strftime('%Y-%m-%dT%H:%M:%S')
+    assert state.LastPublishedAt == newest
+    assert db.session.query(NewsArticle).count() == 250
+
+
+def test_truncated_ingest_keeps_position(app, db, upstream, state):
+    app.config['NEWS_INGEST_PAGE_SIZE'] = 100
+    app.config['NEWS_INGEST_MAX_PAGES'] = 2
+    newest = _utcnow() - timedelta(minutes=1)
+    feed = FakeNewsFeed(_articles(250, newest))
+    upstream.route('newsapi', feed)
+
+    # 2ページ目は上限(to)の日時の記事を含むため1件重なる
+    assert ingest_location(state) == 199
+    # 取り切れなかった古い記事を飛ばさないよう取り込み位置は進めない
+    assert state.LastPublishedAt is None
+
+    app.config['NEWS_INGEST_MAX_PAGES'] = 5
+    assert ingest_location(state) == 51
+    assert state.LastPublishedAt == newest
+    assert db.session.query(NewsArticle).count() == 250
+
+
+def test_incremental_ingest_fetches_only_new_articles(app, db, upstream, state):
+    app.config['NEWS_INGEST_PAGE_SIZE'] = 10
+    first = _utcnow() - timedelta(hours=2)
+    feed = FakeNewsFeed(_articles(3, first))
+    upstream.route('newsapi', feed)
+    assert ingest_location(state) == 3
+
+    second = _utcnow() - timedelta(minutes=1)
+    feed.articles = sorted(
+        feed.articles + _articles(2, second, title='Attack reported'),
+        key=lambda a: a['publishedAt'], reverse=True)
+    assert ingest_location(state) == 2
+
+    last = upstream.calls_to('newsapi')[-1]
+    assert last['from'] == (first + timedelta(seconds=1)).strftime('%Y-%m-%dT%H:%M:%S')
+    assert state.LastPublishedAt == second
+    danger = read_stored_news('Japan', 'Tokyo', danger_only=True)
+    assert [a['title'] for a in danger] == ['Attack reported 0', 'Attack reported 1']
+
+
+def test_ingest_stops_when_page_is_not_full(app, db, upstream, state):
+    app.config['NEWS_INGEST_PAGE_SIZE'] = 100
+    upstream.route('newsapi', FakeNewsFeed(_articles(5, _utcnow() - timedelta(minutes=1))))
+
+    assert ingest_location(state) == 5
+    assert len(upstream.calls) == 1
+
+
+@pytest.mark.parametrize('country, city', [
+    ('Atlantis', ''),
+    ('Japan', 'Not A Real City'),
+    ('x' * 200, 'y' * 200)
+])
+def test_unknown_locations_are_not_tracked(app, db, country, city):
+    assert read_stored_news(country, city) is None
+    assert db.session.query(NewsIngestState).count() == 0
+
+
+def test_tracked_names_are_canonical(app, db):
+    track_location('  jAPAN ', 'tokyo')
+    read_stored_news('Japan', 'TOKYO')
+
+    keys = db.session.query(NewsIngestState.CountryName, NewsIngestState.CityName).all()
+    assert keys == [('Japan', 'Tokyo')]
+
+
+def test_idle_locations_expire(app, db, upstream, state):
+    app.config['NEWS_INGEST_IDLE_DAYS'] = 3
+    upstream.route('newsapi', FakeNewsFeed(_articles(2, _utcnow() - timedelta(minutes=1))))
+    ingest_location(state)
+    track_location('Japan', 'Osaka')
+
+    # 東京だけ最近読まれている
+    osaka = db.session.get(NewsIngestState, ('Japan', 'Osaka'))
+    osaka.LastReadAt = osaka.CreatedAt = _utcnow() - timedelta(days=4)
+    state.LastReadAt = _utcnow() - timedelta(days=4)
+    db.session.commit()
+    assert read_stored_news('Japan', 'Tokyo') is not None
+
+    assert expire_idle_locations() == 1
+    assert db.session.get(NewsIngestState, ('Japan', 'Osaka')) is None
+    assert db.session.query(NewsArticle).count() == 2
+
+    state.LastReadAt = _utcnow() - timedelta(days=4)
+    db.session.commit()
+    assert expire_idle_locations() == 1
+    assert db.session.query(NewsIngestState).count() == 0
+    assert db.session.query(NewsArticle).count() == 0
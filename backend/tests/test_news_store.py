@@ -0,0 +1,93 @@
+"""
+ニュースの2段キャッシュ(プロセス内LRU + news_cacheテーブル)のテスト
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import cache, news_service
+from app.services.news_service import _news_key, _store_key, get_news_by_location
+from conftest import FakeResponse, news_payload
+
+
+@pytest.fixture
+def store_stats(monkeypatch):
+    """永続キャッシュの統計をテストごとに数え直す"""
+    stats = dict.fromkeys(news_service._store_stats, 0)
+    monkeypatch.setattr(news_service, '_store_stats', stats)
+    return stats
+
+
+def test_memory_miss_is_served_from_store(app, upstream, store_stats):
+    upstream.route('newsapi', news_payload(['Attack reported']))
+    first = get_news_by_location('Japan')
+
+    # プロセス内キャッシュからだけ追い出す
+    news_service._news_cache.delete(_news_key('danger', 'Japan', None, 7))
+    second = get_news_by_location('Japan')
+
+    assert second == first
+    assert len(upstream.calls_to('newsapi')) == 1
+    assert (store_stats['writes'], store_stats['hits']) == (1, 1)
+
+
+def test_store_entry_keeps_its_remaining_lifetime(app, db, upstream, store_stats):
+    from app.models import NewsCacheEntry
+
+    key = _news_key('danger', 'Japan', None, 7)
+    now = datetime.now()
+    db.session.add(NewsCacheEntry(
+        CacheKey=_store_key(key),
+        Payload=json.dumps([{'title': 'Stored'}]),
+        CreatedAt=now - timedelta(seconds=app.config['NEWS_CACHE_TTL'] - 120),
+        ExpiresAt=now + timedelta(seconds=120)
+    ))
+    db.session.commit()
+
+    assert get_news_by_location('Japan') == [{'title': 'Stored'}]
+    # メモリ上のTTLは NEWS_CACHE_TTL ではなく永続キャッシュの残り寿命になる
+    assert 100 < news_service._news_cache.remaining_ttl(key) <= 120
+    assert upstream.calls_to('newsapi') == []
+
+
+def test_expired_store_entry_is_refetched(app, db, upstream, store_stats):
+    from app.models import NewsCacheEntry
+
+    key = _news_key('danger', 'Japan', None, 7)
+    now = datetime.now()
+    db.session.add(NewsCacheEntry(
+        CacheKey=_store_key(key), Payload='[]',
+        CreatedAt=now - timedelta(hours=1), ExpiresAt=now - timedelta(seconds=1)
+    ))
+    db.session.commit()
+    upstream.route('newsapi', news_payload(['Attack reported']))
+
+    assert [a['title'] for a in get_news_by_location('Japan')] == ['Attack reported']
+    assert store_stats['misses'] == 1
+
+
+def test_store_survives_restart(app, db, upstream, store_stats):
+    upstream.route('newsapi', news_payload(['Attack reported']))
+    first = get_news_by_location('Japan')
+
+    # 再起動相当: プロセス内のキャッシュとセッションを捨て、上流も使えなくする
+    for instance in cache._registry.values():
+        instance.clear()
+    db.session.remove()
+    upstream.route('newsapi', FakeResponse({'status': 'error'}, 500))
+
+    assert get_news_by_location('Japan') == first
+    assert len(upstream.calls_to('newsapi')) == 1
+
+
+def test_long_location_names_fit_the_key_column(app, db, upstream, store_stats):
+    from app.models import NewsCacheEntry
+
+    upstream.route('newsapi', news_payload(['Attack reported']))
+    get_news_by_location('Japan', 'x' * 400)
+
+    keys = [entry.CacheKey for entry in NewsCacheEntry.query.all()]
+    assert len(keys) == 1
+    assert len(keys[0]) <= NewsCacheEntry.__table__.c.CacheKey.type.length
+    assert store_stats['errors'] == 0
@@ -0,0 +1,171 @@
+"""
+上流APIの利用枠(rate_limiter)とキャッシュウォーマーの1分枠のテスト
+"""
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from app.services import cache as cache_module
+from app.services import cache_warmer, rate_limiter
+from app.services.cache import TTLCache
+from app.services.cache_warmer import MinuteBudget, warm_caches
+from app.services.circuit_breaker import CircuitOpen
+from app.services.concurrency import run_concurrently
+from app.services.rate_limiter import (
+    BudgetExhausted, UpstreamBudget, acquire_budget, background_priority,
+    is_background_priority, with_current_priority
+)
+
+
+@pytest.fixture
+def timed(monkeypatch, clock):
+    monkeypatch.setattr(rate_limiter, 'time', clock)
+    monkeypatch.setattr(cache_warmer, 'time', clock)
+    return clock
+
+
+def _drain(budget, background=False):
+    count = 0
+    while budget.try_acquire(background=background):
+        count += 1
+    return count
+
+
+def test_token_bucket_refills_over_time(timed):
+    budget = UpstreamBudget('test', per_minute=6, per_day=0)
+
+    assert _drain(budget) == 6
+    timed.advance(10)  # 1分で6トークン -> 10秒で1トークン
+    assert _drain(budget) == 1
+    timed.advance(600)  # 上限を超えては貯まらない
+    assert budget.available() == 6
+
+
+def test_daily_quota_resets_on_new_day(timed):
+    budget = UpstreamBudget('test', per_minute=0, per_day=3)
+
+    assert _drain(budget) == 3
+    timed.advance(3600)
+    assert not budget.try_acquire()
+
+    budget._day = date.today() - timedelta(days=1)
+    assert budget.try_acquire()
+    assert budget.stats()['used_today'] == 1
+
+
+def test_background_work_leaves_reserve_for_users(timed):
+    budget = UpstreamBudget('test', per_minute=0, per_day=10, reserve_ratio=0.3)
+
+    assert budget.available(background=True) == 7
+    assert _drain(budget, background=True) == 7
+    assert budget.available(background=True) == 0
+    assert _drain(budget) == 3
+
+    stats = budget.stats()
+    assert (stats['denied_background'], stats['denied_user']) == (1, 1)
+
+
+def test_minute_reserve_applies_to_background(timed):
+    budget = UpstreamBudget('test', per_minute=10, per_day=0, reserve_ratio=0.5)
+
+    assert _drain(budget, background=True) == 5
+    assert _drain(budget) == 5
+
+
+def test_unlimited_budget():
+    budget = UpstreamBudget('test', per_minute=0, per_day=0)
+
+    assert budget.available() is None
+    assert all(budget.try_acquire() for _ in range(100))
+
+
+def test_acquire_budget_uses_thread_priority(app, monkeypatch):
+    monkeypatch.setitem(rate_limiter._budgets, 'test', UpstreamBudget(
+        'test', per_minute=0, per_day=10, reserve_ratio=0.5))
+
+    with background_priority():
+        for _ in range(5):
+            acquire_budget('test')
+        with pytest.raises(BudgetExhausted):
+            acquire_budget('test')
+    acquire_budget('test')
+    acquire_budget('unknown')  # 未設定の上流は無制限
+
+
+def test_priority_is_carried_into_other_threads(app):
+    seen = {}
+
+    def check(name):
+        seen[name] = is_background_priority()
+
+    with background_priority():
+        thread = threading.Thread(target=with_current_priority(check), args=('thread',))
+        thread.start()
+        thread.join()
+        with app.app_context():
+            run_concurrently({'task': (check, ('task',))}, timeout=5)
+    check('caller')
+    thread = threading.Thread(target=with_current_priority(check), args=('user',))
+    thread.start()
+    thread.join()
+
+    assert seen == {'thread': True, 'task': True, 'caller': False, 'user': False}
+
+
+def test_stale_refresh_runs_with_callers_priority(monkeypatch, clock):
+    monkeypatch.setattr(cache_module, 'time', clock)
+    cache = TTLCache('test_priority', 10)
+    cache.set('key', 'old', ttl=10, stale_ttl=60)
+    clock.advance(11)
+    done = threading.Event()
+    seen = []
+
+    def loader():
+        seen.append(is_background_priority())
+        done.set()
+        return 'new'
+
+    with background_priority():
+        assert cache.get_or_load('key', loader, ttl=10, stale_ttl=60) == 'old'
+    assert done.wait(5)
+
+    assert seen == [True]
+
+
+def test_minute_budget_window_and_refund(timed):
+    budget = MinuteBudget(2)
+
+    assert budget.try_acquire() and budget.try_acquire()
+    assert not budget.try_acquire()
+    budget.refund()
+    assert budget.remaining() == 1
+    timed.advance(60)
+    assert budget.remaining() == 2
+
+
+@pytest.mark.parametrize('error, skipped', [
+    (BudgetExhausted('newsapi'), 'skipped_budget'),
+    (CircuitOpen('newsapi', 30), 'skipped_circuit'),
+])
+def test_warm_caches_refunds_when_upstream_is_not_called(app, monkeypatch, error, skipped):
+    from app.services import news_service, weather_service
+
+    seen = []
+
+    def fail(*args, min_remaining):
+        seen.append(is_background_priority())
+        raise error
+
+    monkeypatch.setattr(weather_service, 'refresh_weather_forecast', fail)
+    monkeypatch.setattr(weather_service, 'refresh_current_weather', fail)
+    monkeypatch.setattr(news_service, 'refresh_news_by_location', fail)
+    monkeypatch.setattr(cache_warmer, 'get_top_destinations', lambda limit: [('Japan', 'Tokyo')])
+    budget = MinuteBudget(10)
+
+    with app.app_context():
+        warm_caches(app, budget)
+
+    assert seen == [True, True, True]
+    assert budget.remaining() == 10
+    assert cache_warmer.get_cache_warmer_stats()[skipped] >= 3
@@ -0,0 +1,166 @@
+"""
+シングルフライト(SingleFlight / AsyncSingleFlight)のテスト
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def _start_callers(flight, key, fn, count):
+    results = []
+    errors = []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight('test_shared')
+    release = threading.Event()
+    executions = []
+
+    def fn():
+        executions.append(1)
+        release.wait(5)
+        return 'value'
+
+    threads, results, errors = _start_callers(flight, 'key', fn, 5)
+    _wait_for(lambda: flight.stats()['calls'] == 5)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert executions == [1]
+    assert results == ['value'] * 5 and errors == []
+    assert flight.stats() == {'calls': 5, 'executions': 1, 'coalesced': 4, 'in_flight': 0}
+
+
+def test_leader_error_is_raised_to_waiters_and_key_is_released():
+    flight = SingleFlight('test_error')
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError('upstream failed')
+
+    threads, results, errors = _start_callers(flight, 'key', fail, 3)
+    _wait_for(lambda: flight.stats()['calls'] == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [] and len(errors) == 3
+    assert all(isinstance(e, ValueError) for e in errors)
+    # 失敗した呼び出しは残らず、次の呼び出しは再実行される
+    assert flight.do('key', lambda: 'retry') == 'retry'
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight('test_keys')
+
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+    assert flight.do('a', lambda: 3) == 3
+    assert flight.stats()['coalesced'] == 0
+
+
+def test_async_calls_share_one_execution():
+    flight = AsyncSingleFlight('test_async_shared')
+    executions = []
+
+    async def fn():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return 'value'
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do('key', fn) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ['value'] * 5
+    assert executions == [1]
+    assert flight.stats() == {'calls': 5, 'executions': 1, 'coalesced': 4, 'in_flight': 0}
+
+
+def test_async_error_is_shared():
+    flight = AsyncSingleFlight('test_async_error')
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError('upstream failed')
+
+    async def scenario():
+        return await asyncio.gather(
+            *(flight.do('key', fail) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(scenario())
+    assert [type(e) for e in errors] == [ValueError] * 3
+    assert flight.stats()['executions'] == 1
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = AsyncSingleFlight('test_async_cancel')
+
+    async def fn():
+        await asyncio.sleep(0.02)
+        return 'value'
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.do('key', fn))
+        second = asyncio.ensure_future(flight.do('key', fn))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == 'value'
+    assert flight.stats()['executions'] == 1
+
+
+def test_concurrent_weather_requests_call_upstream_once(app, upstream):
+    from conftest import weather_payload
+    from app.services.concurrency import with_app_context
+    from app.services.singleflight import _registry
+    from app.services.weather_service import get_current_weather
+
+    release = threading.Event()
+
+    def current(params):
+        release.wait(5)
+        return weather_payload()
+
+    upstream.route('/weather', current)
+    calls_before = _registry['weather'].stats()['calls']
+    with app.app_context():
+        fetch = with_app_context(get_current_weather)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetch('Tokyo')))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: _registry['weather'].stats()['calls'] - calls_before == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(upstream.calls_to('/weather')) == 1
+    assert len(results) == 3 and results[0] == results[1] == results[2]
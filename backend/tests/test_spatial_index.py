@@ -0,0 +1,89 @@
+"""
+都市の空間インデックス(CityIndex)とgeohashのテスト
+"""
+import math
+import random
+
+import pytest
+
+from app.services.geocoding_service import encode_geohash
+from app.services.spatial_index import EARTH_RADIUS_KM, CityIndex
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+@pytest.fixture(scope='module')
+def cities():
+    rng = random.Random(42)
+    return [
+        {'name': f"City {i}", 'country_code': 'XXX',
+         'latitude': rng.uniform(-90, 90), 'longitude': rng.uniform(-180, 180)}
+        for i in range(500)
+    ]
+
+
+def _brute_force(cities, lat, lon):
+    return sorted(
+        ((_haversine_km(lat, lon, c['latitude'], c['longitude']), c['name']) for c in cities))
+
+
+@pytest.mark.parametrize('lat, lon, precision, expected', [
+    (57.64911, 10.40744, 11, 'u4pruydqqvj'),
+    (35.6762, 139.6503, 6, 'xn76cy'),
+    (-33.8688, 151.2093, 5, 'r3gx2'),
+])
+def test_encode_geohash(lat, lon, precision, expected):
+    assert encode_geohash(lat, lon, precision) == expected
+
+
+def test_nearby_points_share_geohash_cell():
+    assert encode_geohash(35.6762, 139.6503) == encode_geohash(35.6765, 139.6505)
+    assert encode_geohash(35.6762, 139.6503) != encode_geohash(35.70, 139.70)
+
+
+def test_nearest_matches_brute_force(cities):
+    index = CityIndex(cities)
+    rng = random.Random(7)
+    for _ in range(50):
+        lat, lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        expected = _brute_force(cities, lat, lon)[:5]
+
+        found = index.nearest(lat, lon, k=5)
+
+        assert [c['name'] for c in found] == [name for _, name in expected]
+        assert [c['distance_km'] for c in found] == pytest.approx(
+            [d for d, _ in expected], abs=0.01)
+
+
+def test_within_matches_brute_force(cities):
+    index = CityIndex(cities)
+    rng = random.Random(8)
+    for _ in range(20):
+        lat, lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        expected = [name for d, name in _brute_force(cities, lat, lon) if d <= 1500]
+
+        assert [c['name'] for c in index.within(lat, lon, 1500)] == expected
+
+
+def test_nearest_crosses_antimeridian():
+    index = CityIndex([
+        {'name': 'East', 'country_code': 'FJI', 'latitude': -17.0, 'longitude': 179.9},
+        {'name': 'Far', 'country_code': 'XXX', 'latitude': -17.0, 'longitude': 170.0},
+    ])
+
+    assert index.nearest(-17.0, -179.9)[0]['name'] == 'East'
+
+
+def test_max_distance_and_empty_index():
+    index = CityIndex([
+        {'name': 'Tokyo', 'country_code': 'JPN', 'latitude': 35.6762, 'longitude': 139.6503}])
+
+    assert index.nearest(35.0, 135.0, max_distance_km=50) == []
+    assert index.nearest(35.68, 139.65, k=0) == []
+    assert CityIndex([]).nearest(0, 0) == []
+    assert CityIndex([]).within(0, 0, 100) == []
@@ -0,0 +1,105 @@
+"""
+ニュース統合取得モード(NEWS_UNIFIED_FETCH)のテスト
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.news_service import (
+    _filter_recent, count_news_by_location, refresh_news_by_location
+)
+
+
+def _article(title, days_ago):
+    published = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    return {
+        'title': title,
+        'description': '',
+        'url': f"https://example.com/{title}",
+        'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'source': {'name': 'Example'}
+    }
+
+
+def _from_date(days):
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+@pytest.fixture
+def unified(app, upstream):
+    app.config['NEWS_UNIFIED_FETCH'] = True
+    upstream.route('newsapi', {
+        'status': 'ok',
+        'totalResults': 3,
+        'articles': [
+            _article('Attack reported', 1),
+            _article('Festival opens', 2),
+            _article('Murder trial begins', 5),
+        ]
+    })
+    return upstream
+
+
+def test_danger_and_general_news_share_one_fetch(client, unified):
+    danger = client.post('/api/news/location_news', json={'country': 'Japan'}).get_json()
+    general = client.post('/api/news/general_news',
+                          json={'country': 'Japan', 'days': 3}).get_json()
+
+    assert [a['title'] for a in danger['articles']] == ['Attack reported', 'Murder trial begins']
+    # 短い期間は7日分の取得結果を絞り込んで返す
+    assert [a['title'] for a in general['articles']] == ['Attack reported', 'Festival opens']
+    calls = unified.calls_to('newsapi')
+    assert len(calls) == 1
+    assert calls[0]['from'] == _from_date(7)
+
+
+def test_longer_window_is_fetched_separately(client, unified):
+    client.post('/api/news/location_news', json={'country': 'Japan'})
+    client.post('/api/news/general_news', json={'country': 'Japan', 'days': 14})
+
+    assert [c['from'] for c in unified.calls_to('newsapi')] == [_from_date(7), _from_date(14)]
+
+
+def test_configured_window_covers_general_default(client, app, unified):
+    app.config['NEWS_UNIFIED_DAYS'] = 14
+    client.post('/api/news/general_news', json={'country': 'Japan', 'days': 14})
+    client.post('/api/news/location_news', json={'country': 'Japan'})
+
+    assert [c['from'] for c in unified.calls_to('newsapi')] == [_from_date(14)]
+
+
+def test_count_and_refresh_use_shared_key(app, unified):
+    with app.test_request_context():
+        assert refresh_news_by_location('Japan') is True
+        assert count_news_by_location('Japan') == 2
+        assert refresh_news_by_location('Japan', min_remaining=1) is False
+
+    assert len(unified.calls_to('newsapi')) == 1
+
+
+@pytest.mark.parametrize('days', [0, 31, '7', 2.5, True, None, [7]])
+def test_general_news_rejects_invalid_days(client, unified, days):
+    response = client.post('/api/news/general_news', json={'country': 'Japan', 'days': days})
+
+    assert response.status_code == 400
+    assert 'days' in response.get_json()['error']
+    assert unified.calls_to('newsapi') == []
+
+
+@pytest.fixture
+def offset_local_time(monkeypatch):
+    """ローカル時刻の日付がUTCの日付とずれるタイムゾーンにする"""
+    # UTC+14 は UTC 10時以降、UTC-12 は UTC 12時前に日付がずれる
+    zone = 'Etc/GMT-14' if datetime.now(timezone.utc).hour >= 12 else 'Etc/GMT+12'
+    monkeypatch.setenv('TZ', zone)
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_filter_recent_uses_utc_dates(offset_local_time):
+    articles = [_article('kept', 3), _article('dropped', 4)]
+
+    assert [a['title'] for a in _filter_recent(articles, 3, 7)] == ['kept']
@@ -0,0 +1,70 @@
+"""
+天気予報一括取得(/api/weather/weather_forecast_batch)のテスト
+"""
+import pytest
+
+from conftest import onecall_payload, weather_payload
+
+URL = '/api/weather/weather_forecast_batch'
+
+
+@pytest.fixture
+def weather_upstream(upstream):
+    def current(params):
+        if params['q'] == 'Atlantis':
+            from conftest import FakeResponse
+            return FakeResponse({'message': 'city not found'}, 404)
+        return weather_payload(name=params['q'])
+
+    upstream.route('/weather', current)
+    upstream.route('/onecall', onecall_payload())
+    return upstream
+
+
+def test_batch_returns_each_city(client, weather_upstream):
+    response = client.post(URL, json={'cities': ['Tokyo', ' Paris ', 'Tokyo', 'Atlantis'],
+                                      'days': 3})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert set(body['results']) == {'Tokyo', 'Paris', 'Atlantis'}
+    assert len(body['results']['Tokyo']['forecast']) == 3
+    assert body['failed'] == ['Atlantis']
+    # 重複した都市は1回だけ取得する
+    assert len(weather_upstream.calls_to('/onecall')) == 2
+
+
+@pytest.mark.parametrize('payload', [
+    {},
+    {'cities': []},
+    {'cities': 'Tokyo'},
+    {'cities': ['Tokyo', '']},
+    {'cities': ['Tokyo', '  ']},
+    {'cities': ['Tokyo', 1]},
+    {'cities': ['Tokyo'], 'days': '7'},
+    {'cities': ['Tokyo'], 'days': [7]},
+    {'cities': ['Tokyo'], 'days': {'n': 7}},
+    {'cities': ['Tokyo'], 'days': 0},
+    {'cities': ['Tokyo'], 'days': 9},
+    {'cities': ['Tokyo'], 'days': 2.5},
+    {'cities': ['Tokyo'], 'days': True},
+    ['Tokyo']
+])
+def test_batch_rejects_invalid_input_before_calling_upstream(client, upstream, payload):
+    response = client.post(URL, json=payload)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+    assert upstream.calls == []
+
+
+def test_batch_rejects_non_json_body(client, upstream):
+    response = client.post(URL, data='cities=Tokyo')
+    assert response.status_code == 400
+
+
+def test_batch_limits_number_of_cities(client, app, upstream):
+    app.config['WEATHER_BATCH_MAX_CITIES'] = 2
+    response = client.post(URL, json={'cities': ['A', 'B', 'C']})
+    assert response.status_code == 400
+    assert upstream.calls == []